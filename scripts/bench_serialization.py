@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmarks response serialization for list_parts and search on a throwaway database:
+
+    PYTHONPATH=src/backend python scripts/bench_serialization.py --parts 20000
+
+"before" is what the handlers used to do: load ORM instances (or take the cached search
+result) and have FastAPI validate it against the response_model and dump it with
+pydantic. "after" is the current path: select the response columns as plain rows (or
+reuse the cached result as is) and encode them with FastJSONResponse and orjson.
+"fallback" is the current path without orjson (jsonable_encoder and stdlib json), which
+FastJSONResponse only uses when orjson cannot be imported; "after" is skipped then.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+
+async def timed(label: str, fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    median = statistics.median(samples) * 1000
+    print(f"  {label:<8} {median:8.2f} ms  (median of {repeat})")
+    return median
+
+
+async def compare(title: str, before, after, repeat: int):
+    from core import responses
+
+    orjson = responses.orjson
+
+    async def fallback():
+        responses.orjson = None
+        try:
+            return await after()
+        finally:
+            responses.orjson = orjson
+
+    # Every path must produce the same JSON document
+    expected = json.loads(await before())
+    assert json.loads(await fallback()) == expected, title
+    print(title)
+    slow = await timed("before", before, repeat)
+    fallback_ms = await timed("fallback", fallback, repeat)
+    print(f"  speedup  {slow / fallback_ms:8.2f}x  (fallback)")
+    if orjson is None:
+        print("  after    skipped, orjson is not installed")
+        return
+    assert json.loads(await after()) == expected, title
+    fast = await timed("after", after, repeat)
+    print(f"  speedup  {slow / fast:8.2f}x")
+
+
+async def run(parts: int, page: int, repeat: int):
+    from core.responses import FastJSONResponse
+    from parts.core.pagination import paginate
+    from parts.db.models import Part
+    from parts.db.search_index import search_parts
+    from parts.schemas.part import PartRead
+    from parts.schemas.search import SearchResult
+    from pydantic import TypeAdapter
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel import SQLModel, insert
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    path = Path(tempfile.mkdtemp()) / "bench.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    rows = [
+        {
+            "id": uuid4(),
+            "internal_part_code": f"BEN-BRA-PAD-{i:05d}",
+            "manufacturer_part_number": f"MPN-{i}",
+            "oe_part_number": f"1K0-615-{i:05d}",
+            "description": f"Brake pad set {i}, front axle",
+            "part_type": "Pad",
+            "system": "Brakes",
+            "last_known_price": 42.5,
+            "notes": "Ceramic compound",
+            "alternatives": [],
+            "version": 1,
+        }
+        for i in range(parts)
+    ]
+    print(f"{parts} parts")
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        await session.exec(insert(Part.__table__), params=rows)
+        await session.commit()
+
+        parts_adapter = TypeAdapter(list[PartRead])
+        ordering = ("internal_part_code",)
+
+        async def list_before():
+            result = await paginate(session, Part, ordering, limit=page)
+            # A request starts with an empty identity map
+            session.expunge_all()
+            validated = parts_adapter.validate_python(result.items, from_attributes=True)
+            return parts_adapter.dump_json(validated)
+
+        async def list_after():
+            fields = list(PartRead.model_fields)
+            result = await paginate(session, Part, ordering, limit=page, fields=fields)
+            return FastJSONResponse(result.items).body
+
+        await compare(f"list_parts, page of {page}:", list_before, list_after, repeat)
+
+        found = await search_parts(session, "brake pad", page)
+        cached = SearchResult(parts=found, vehicles=[]).model_dump(mode="json")
+        result_adapter = TypeAdapter(SearchResult)
+
+        async def search_before():
+            return result_adapter.dump_json(result_adapter.validate_python(cached))
+
+        async def search_after():
+            return FastJSONResponse(cached).body
+
+        title = f"search, cached result of {len(found)} parts:"
+        await compare(title, search_before, search_after, repeat)
+    await engine.dispose()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--parts", type=int, default=20000, help="parts to seed")
+    parser.add_argument("--page", type=int, default=1000, help="list page and search size")
+    parser.add_argument("--repeat", type=int, default=20)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    asyncio.run(run(args.parts, args.page, args.repeat))
@@ -1,6 +1,19 @@
 #!/usr/bin/env python3
+"""
+Seeds the Parts Service database, or bulk imports a catalogue file:
+
+    PYTHONPATH=src/backend python scripts/seed.py parts catalogue.csv
+    PYTHONPATH=src/backend python scripts/seed.py vehicles vehicles.ndjson
+    PYTHONPATH=src/backend python scripts/seed.py links fitment.csv
+"""
+
+import argparse
 import asyncio
 import os
+import sys
+from pathlib import Path
+
+IMPORT_KINDS = ("parts", "vehicles", "links")
 
 
 async def main():
@@ -9,6 +22,40 @@ async def main():
     print("✅ Seeding complete.")
 
 
+async def import_file(kind: str, path: Path, fmt: str | None, chunk_size: int) -> int:
+    from db.session import get_session, init_db
+    from parts.core.bulk_import import import_links, import_parts, import_vehicles, parse_rows
+    from parts.core.export import DataFormat
+    from parts.db import search_index  # noqa: F401  (registers the search index DDL)
+
+    importers = {"parts": import_parts, "vehicles": import_vehicles, "links": import_links}
+    data_format = DataFormat(fmt or path.suffix.lstrip(".").replace("jsonl", "ndjson"))
+
+    await init_db()
+    async for session in get_session():
+        rows = parse_rows(path.read_text(encoding="utf-8-sig"), data_format)
+        result = await importers[kind](session, rows, chunk_size=chunk_size)
+
+    print(f"📦 {kind}: {result.received} rows, {result.created} created")
+    if result.errors:
+        print(f"❌ {len(result.errors)} rows rejected:")
+    for error in result.errors:
+        print(f"  - line {error.line}: {'; '.join(error.errors)}")
+    return 1 if result.errors else 0
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("kind", choices=IMPORT_KINDS)
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="default: file extension")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        args = parse_args(sys.argv[1:])
+        sys.exit(asyncio.run(import_file(args.kind, args.path, args.format, args.chunk_size)))
     if os.getenv("AUTO_SEED_DATA") == "true":
         asyncio.run(main())
@@ -1,9 +1,15 @@
 import asyncio
 
 import pytest
-from db.session import get_session
+from core.cache import clear_caches
+from core.metrics import METRICS_ENABLED, instrument
+from core.profiling import QUERY_PROFILING, QueryProfilingMiddleware
+from core.shared_cache import clear_shared_caches
+from db.session import get_read_session, get_session
 from httpx import ASGITransport, AsyncClient
 from main import app
+from parts.core.fuzzy import fuzzy_index
+from parts.core.typeahead import typeahead_index
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
@@ -14,6 +20,14 @@ sqlite_url = "sqlite+aiosqlite:///./test.db"
 engine = create_async_engine(sqlite_url, connect_args={"check_same_thread": False})
 async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Profiling and metrics are off by default. The query budget tests capture profiles
+# through the profiling middleware, which then records only inside capture_queries();
+# metrics are added last so they stay outermost, as in main
+if not QUERY_PROFILING:
+    app.add_middleware(QueryProfilingMiddleware, enabled=False)
+if not METRICS_ENABLED:
+    instrument(app, {"primary": engine})
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -44,6 +58,12 @@ async def client_fixture(session: AsyncSession):
         yield session
 
     app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_read_session] = get_session_override
+    # Each test gets a fresh database, so cached reads from earlier tests are stale
+    clear_caches()
+    await clear_shared_caches()
+    typeahead_index.clear()
+    fuzzy_index.clear()
 
     async with AsyncClient(
         transport=ASGITransport(app=app),
@@ -52,3 +72,25 @@ async def client_fixture(session: AsyncSession):
     ) as ac:
         yield ac
     app.dependency_overrides.clear()
+
+
+@pytest.fixture(name="create_part")
+def create_part_fixture(client: AsyncClient):
+    """
+    Creates a part through the API and returns its id. Keyword arguments override the
+    other PartCreate fields.
+    """
+
+    async def create_part(manufacturer_part_number: str, **fields) -> str:
+        payload = {
+            "manufacturer_part_number": manufacturer_part_number,
+            "description": f"Part {manufacturer_part_number}",
+            "part_type": "Pad",
+            "system": "Brakes",
+            **fields,
+        }
+        resp = await client.post("/api/v1/parts/", json=payload)
+        assert resp.status_code == 201, resp.text
+        return resp.json()["id"]
+
+    return create_part
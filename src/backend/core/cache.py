@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+REFERENCE_CACHE_TTL_SECONDS = float(os.getenv("REFERENCE_CACHE_TTL_SECONDS", "300"))
+REFERENCE_CACHE_MAXSIZE = int(os.getenv("REFERENCE_CACHE_MAXSIZE", "1024"))
+# Cache misses are loaded from read replicas, which may still return pre-write rows for a
+# while after a write. Values loaded this long after an invalidation are returned but not
+# cached, so a lagging replica cannot refill the cache with stale data for a whole TTL.
+CACHE_FILL_HOLDOFF_SECONDS = float(
+    os.getenv("CACHE_FILL_HOLDOFF_SECONDS") or ("5" if os.getenv("DATABASE_REPLICA_URLS") else "0")
+)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded in-process cache with LRU eviction and a per-entry time to live.
+
+    Writers call `invalidate`/`clear`, which bump `generation`. Readers capture the
+    generation before querying the database and pass it to `set`, so a value read before
+    a concurrent write can never be stored after that write invalidated the cache. For
+    `holdoff` seconds after an invalidation nothing is stored at all (replica lag).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int = REFERENCE_CACHE_MAXSIZE,
+        ttl: float = REFERENCE_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        holdoff: float = CACHE_FILL_HOLDOFF_SECONDS,
+    ):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.holdoff = holdoff
+        self._clock = clock
+        self._fill_after = 0.0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, generation: int | None = None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if self._clock() < self._fill_after:
+                return
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value for `key`, or awaits `load()` and caches its result.
+        None results are not cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            generation = self.generation
+            value = await load()
+            if value is not None:
+                self.set(key, value, generation)
+        return value
+
+    def invalidate(self, *keys: Hashable, where: Callable[[Hashable], bool] | None = None):
+        """
+        Drops the given keys, and every key matching `where` if given.
+        """
+        with self._lock:
+            self.generation += 1
+            self._fill_after = self._clock() + self.holdoff
+            for key in keys:
+                self._entries.pop(key, None)
+            if where is not None:
+                for key in [key for key in self._entries if where(key)]:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._fill_after = self._clock() + self.holdoff
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_registry: dict[str, TTLCache] = {}
+
+
+def get_cache(name: str, **kwargs) -> TTLCache:
+    """
+    Returns the process-wide cache called `name`, creating it on first use.
+    """
+    if name not in _registry:
+        _registry[name] = TTLCache(name, **kwargs)
+    return _registry[name]
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _registry.items()}
+
+
+def clear_caches():
+    for cache in _registry.values():
+        cache.clear()
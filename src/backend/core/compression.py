@@ -0,0 +1,105 @@
+import os
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are sent as is; compressing them saves less than it costs
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+# Dynamic responses favour speed: gzip 6 and brotli 4 get most of the size reduction
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+
+def accepted_encodings(headers: Headers) -> set[str]:
+    """
+    Content codings the client accepts, from Accept-Encoding, minus those with q=0.
+    """
+    accepted = set()
+    for item in headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            weight = float(q) if q else 1.0
+        except ValueError:
+            weight = 1.0
+        if coding and weight > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class WeakETagResponder(IdentityResponder):
+    """
+    Marks the ETag of a response this responder compressed as weak: the compressed body
+    is a different representation, and a strong validator must only match identical
+    bytes. If-None-Match uses weak comparison, so revalidation keeps working.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async def send_weak_etag(message: Message):
+            if message["type"] == "http.response.start" and not self.content_encoding_set:
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if "content-encoding" in headers and etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+            await send(message)
+
+        await super().__call__(scope, receive, send_weak_etag)
+
+
+class GZipWeakETagResponder(WeakETagResponder, GZipResponder):
+    pass
+
+
+class BrotliResponder(WeakETagResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if more_body:
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compresses responses of at least `minimum_size` bytes with brotli when the client
+    accepts it and the brotli package is installed, otherwise with gzip. Streaming
+    responses (exports) are compressed chunk by chunk, and responses that already carry
+    a Content-Encoding (pre-compressed static assets) pass through untouched. Compressed
+    responses get a weak ETag.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MINIMUM_SIZE,
+        compresslevel: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+    ):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encodings = accepted_encodings(Headers(scope=scope))
+        responder: ASGIApp
+        if brotli is not None and "br" in encodings:
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif "gzip" in encodings:
+            responder = GZipWeakETagResponder(
+                self.app, self.minimum_size, compresslevel=self.compresslevel
+            )
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -0,0 +1,284 @@
+import os
+import time
+from collections.abc import Iterable
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from core.cache import cache_stats
+from core.shared_cache import shared_cache_stats
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+# Directory the workers share metric values through; prometheus_client reads the same
+# variable. Must be emptied before the workers start.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
+# Seconds; request and query latencies of a parts API sit between a millisecond and seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# Route label for requests no route matched, so unknown paths cannot grow the label set
+UNMATCHED_ROUTE = "<unmatched>"
+
+registry = CollectorRegistry()
+# Collectors reading this process's state at scrape time (caches, connection pools)
+_state_collectors: list[Collector] = []
+
+http_requests = Counter(
+    "http_requests_total",
+    "HTTP requests handled.",
+    ("method", "route", "status"),
+    registry=registry,
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency, until the response body is sent.",
+    ("method", "route"),
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being handled.",
+    ("method",),
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+db_queries = Counter("db_queries_total", "SQL statements executed.", registry=registry)
+db_query_duration = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time.",
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+http_request_db_queries = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request.",
+    ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+    registry=registry,
+)
+http_request_db_duration = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent executing SQL per HTTP request.",
+    ("method", "route"),
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+
+
+def register_state_collector(collector: Collector) -> Collector:
+    registry.register(collector)
+    _state_collectors.append(collector)
+    return collector
+
+
+def render() -> bytes:
+    """
+    The metrics in the Prometheus text format. With PROMETHEUS_MULTIPROC_DIR set, the
+    request and query metrics are those of every worker, aggregated from the shared
+    directory; cache and pool state is always that of the worker answering the scrape.
+    """
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return generate_latest(registry)
+    scrape = CollectorRegistry()
+    multiprocess.MultiProcessCollector(scrape, path=PROMETHEUS_MULTIPROC_DIR)
+    for collector in _state_collectors:
+        scrape.register(collector)
+    return generate_latest(scrape)
+
+
+def mark_process_dead(pid: int | None = None):
+    """
+    Drops the in-flight gauge of a worker that exited. Called on shutdown.
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid or os.getpid(), PROMETHEUS_MULTIPROC_DIR)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(render(), media_type=CONTENT_TYPE_LATEST)
+
+
+@dataclass
+class RequestQueries:
+    """
+    SQL executed on behalf of the current request. The statements themselves are only
+    kept when `statements` is a list (query profiling, see core.profiling).
+    """
+
+    count: int = 0
+    seconds: float = 0.0
+    statements: list[tuple[str, float]] | None = None
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        if self.statements is not None:
+            self.statements.append((statement, seconds))
+
+
+current_request_queries: ContextVar[RequestQueries | None] = ContextVar(
+    "current_request_queries", default=None
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started_at")
+    if not started:
+        return
+    seconds = time.perf_counter() - started.pop()
+    db_queries.inc()
+    db_query_duration.observe(seconds)
+    queries = current_request_queries.get()
+    if queries is not None:
+        queries.record(statement, seconds)
+
+
+def route_template(scope: Scope) -> str:
+    """
+    The path template of the route that handled the request (`/api/v1/parts/{part_id}`),
+    rather than the path itself, which would create a label per part. Routes of included
+    routers only know their own path, so the prefix is the part of the request path in
+    front of what the route matched.
+    """
+    route = scope.get("route")
+    template, regex = getattr(route, "path", None), getattr(route, "path_regex", None)
+    if template is None or regex is None:
+        return UNMATCHED_ROUTE
+    path = scope["path"]
+    start = 0
+    while start != -1:
+        if regex.match(path[start:]):
+            return path[:start] + template
+        start = path.find("/", start + 1)
+    return template
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status, in-flight requests and the SQL executed per route template.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        queries = RequestQueries()
+        token = current_request_queries.set(queries)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.labels(method=method).inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request_queries.reset(token)
+            http_requests_in_flight.labels(method=method).dec()
+            route = route_template(scope)
+            http_requests.labels(method=method, route=route, status=str(status)).inc()
+            http_request_duration.labels(method=method, route=route).observe(elapsed)
+            http_request_db_queries.labels(method=method, route=route).observe(queries.count)
+            http_request_db_duration.labels(method=method, route=route).observe(queries.seconds)
+
+
+class CacheCollector(Collector):
+    """
+    Hit and miss counts of the process-local and shared caches, and process-local sizes.
+    """
+
+    def collect(self) -> Iterable[Metric]:
+        local, shared = cache_stats(), shared_cache_stats()
+        stats = [("local", name, values) for name, values in local.items()]
+        stats += [("shared", name, values) for name, values in shared.items()]
+        for metric, help in (("hits", "Cache lookups answered."), ("misses", "Cache misses.")):
+            family = CounterMetricFamily(f"cache_{metric}", help, labels=("tier", "cache"))
+            for tier, name, values in stats:
+                family.add_metric((tier, name), values[metric])
+            yield family
+        entries = GaugeMetricFamily(
+            "cache_entries", "Entries held by process-local caches.", labels=("tier", "cache")
+        )
+        for name, values in local.items():
+            entries.add_metric(("local", name), values["size"])
+        yield entries
+
+
+class EnginePoolCollector(Collector):
+    """
+    Connection pool usage of the named engines. Pools that do not track checkouts
+    (SQLite in-memory, NullPool) are left out.
+    """
+
+    GAUGES = (
+        ("db_pool_size", "Connections the pool keeps open.", lambda pool: pool.size()),
+        ("db_pool_checked_out", "Connections in use by sessions.", lambda pool: pool.checkedout()),
+        ("db_pool_checked_in", "Idle connections in the pool.", lambda pool: pool.checkedin()),
+        (
+            "db_pool_overflow",
+            "Connections open beyond the pool size.",
+            lambda pool: max(pool.overflow(), 0),
+        ),
+    )
+
+    def __init__(self, engines: dict[str, AsyncEngine | Engine]):
+        self.engines = engines
+
+    def collect(self) -> Iterable[Metric]:
+        pools = {
+            name: getattr(engine, "sync_engine", engine).pool
+            for name, engine in self.engines.items()
+        }
+        pools = {name: pool for name, pool in pools.items() if hasattr(pool, "checkedout")}
+        for metric, help, read in self.GAUGES:
+            family = GaugeMetricFamily(metric, help, labels=("engine",))
+            for name, pool in pools.items():
+                family.add_metric((name,), read(pool))
+            yield family
+
+
+register_state_collector(CacheCollector())
+
+
+def instrument(app: Starlette, engines: dict[str, AsyncEngine | Engine]):
+    """
+    Adds the metrics middleware, outermost so latency includes the other middleware,
+    the connection pool metrics of `engines` and the /metrics endpoint.
+    """
+    app.add_middleware(MetricsMiddleware)
+    register_state_collector(EnginePoolCollector(engines))
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
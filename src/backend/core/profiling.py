@@ -0,0 +1,184 @@
+import logging
+import os
+import re
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from core.metrics import RequestQueries, current_request_queries, route_template
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Development and test aid: record every statement per request, add Server-Timing headers
+# and log statements repeated within a request. Off in production.
+QUERY_PROFILING = os.getenv("QUERY_PROFILING", "false").lower() == "true"
+# A statement shape executed this many times in one request is reported as an N+1
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "3"))
+
+_WHITESPACE = re.compile(r"\s+")
+# Bound parameter placeholders of the supported drivers: ?, $1, %s, %(name)s and :name
+_PLACEHOLDER = r"(?:\?|\$\d+|%s|%\(\w+\)s|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    A statement with whitespace normalised and placeholder lists (IN lists, VALUES rows)
+    collapsed, so executions differing only in parameters compare equal.
+    """
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+@dataclass
+class QueryProfile:
+    """
+    The statements one request executed, with their execution time in seconds.
+    """
+
+    method: str
+    route: str
+    statements: list[tuple[str, float]]
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def seconds(self) -> float:
+        return sum(seconds for _, seconds in self.statements)
+
+    def repeated(self, threshold: int = QUERY_REPEAT_THRESHOLD) -> dict[str, int]:
+        """
+        Statement shapes executed at least `threshold` times, the signature of an N+1.
+        """
+        shapes = Counter(statement_shape(statement) for statement, _ in self.statements)
+        return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+    def report(self) -> str:
+        lines = [f"{self.method} {self.route}: {self.count} queries, {self.seconds * 1000:.1f} ms"]
+        lines += [
+            f"  {seconds * 1000:7.2f} ms  {statement}" for statement, seconds in self.statements
+        ]
+        return "\n".join(lines)
+
+
+_captured: ContextVar[list[QueryProfile] | None] = ContextVar("captured_profiles", default=None)
+
+
+@contextmanager
+def capture_queries() -> Iterator[list[QueryProfile]]:
+    """
+    Collects the profile of every request handled in this context, in order. Used by
+    tests, which call the app in the same task through httpx's ASGITransport.
+    """
+    profiles: list[QueryProfile] = []
+    token = _captured.set(profiles)
+    try:
+        yield profiles
+    finally:
+        _captured.reset(token)
+
+
+class QueryBudgetError(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(
+    max_queries: int, allow_repeats: bool = False, threshold: int = QUERY_REPEAT_THRESHOLD
+) -> Iterator[list[QueryProfile]]:
+    """
+    Fails when a request made in the block executes more than `max_queries` statements,
+    or repeats a statement shape `threshold` times unless `allow_repeats`, and when no
+    request was profiled at all:
+
+        with query_budget(2):
+            await client.get(f"/api/v1/parts/{part_id}")
+    """
+    with capture_queries() as profiles:
+        yield profiles
+    if not profiles:
+        raise QueryBudgetError("No request was profiled; is QueryProfilingMiddleware installed?")
+    for profile in profiles:
+        if profile.count > max_queries:
+            raise QueryBudgetError(f"Query budget of {max_queries} exceeded\n{profile.report()}")
+        repeated = profile.repeated(threshold)
+        if repeated and not allow_repeats:
+            shapes = "\n".join(f"  {count} x {shape}" for shape, count in repeated.items())
+            raise QueryBudgetError(
+                f"Repeated statements (N+1) in {profile.method} {profile.route}:\n{shapes}"
+            )
+
+
+def server_timing(queries: RequestQueries, elapsed: float) -> str:
+    return (
+        f'db;dur={queries.seconds * 1000:.1f};desc="{queries.count} queries", '
+        f"app;dur={elapsed * 1000:.1f}"
+    )
+
+
+class QueryProfilingMiddleware:
+    """
+    Records every SQL statement a request executes when profiling is enabled or a test
+    captures profiles, adds a Server-Timing header (database and handler time) and logs
+    repeated statement shapes. Otherwise requests pass straight through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        enabled: bool = QUERY_PROFILING,
+        repeat_threshold: int = QUERY_REPEAT_THRESHOLD,
+    ):
+        self.app = app
+        self.enabled = enabled
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        captured = _captured.get()
+        if scope["type"] != "http" or not (self.enabled or captured is not None):
+            await self.app(scope, receive, send)
+            return
+
+        # Share the metrics middleware's accounting when it runs, so statements are
+        # recorded once
+        queries = current_request_queries.get()
+        token = None
+        if queries is None:
+            queries = RequestQueries()
+            token = current_request_queries.set(queries)
+        queries.statements = []
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start" and self.enabled:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing", server_timing(queries, time.perf_counter() - started)
+                )
+                headers.append("Timing-Allow-Origin", "*")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if token is not None:
+                current_request_queries.reset(token)
+            profile = QueryProfile(scope["method"], route_template(scope), queries.statements)
+            queries.statements = None
+            if captured is not None:
+                captured.append(profile)
+            if self.enabled:
+                for shape, count in profile.repeated(self.repeat_threshold).items():
+                    logger.warning(
+                        "Possible N+1 in %s %s: %d x %s",
+                        profile.method,
+                        profile.route,
+                        count,
+                        shape,
+                    )
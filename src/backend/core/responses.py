@@ -0,0 +1,28 @@
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response for content already in its response shape: column projections of
+    trusted database rows and cached, previously validated dicts. Returning it from a
+    route skips the response_model validation of every item.
+
+    Encoded by orjson when installed (UUIDs, datetimes and dict keys of any type are
+    handled natively), otherwise by jsonable_encoder and the standard library.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(
+            jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
@@ -0,0 +1,353 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+from core.cache import CACHE_FILL_HOLDOFF_SECONDS, get_cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_URL = os.getenv("CACHE_URL", "")
+SHARED_CACHE_TTL_SECONDS = int(os.getenv("SHARED_CACHE_TTL_SECONDS", "60"))
+INVALIDATION_CHANNEL = "gms:parts:cache-invalidation"
+
+# While another worker is loading a key we poll for its result this often, up to the lock TTL
+_LOCK_SECONDS = 5
+_LOCK_POLL_SECONDS = 0.05
+
+
+class InMemoryCacheBackend:
+    """
+    Process-local backend with the same semantics as the Redis backend. Used when no
+    CACHE_URL is configured and as the fake in tests; several caches and buses can share
+    one instance to simulate several workers.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._values: dict[str, tuple[float | None, bytes]] = {}
+        self._subscribers: dict[str, list[asyncio.Queue]] = {}
+
+    def _live(self, key: str) -> bytes | None:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= self._clock():
+            del self._values[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> bytes | None:
+        return self._live(key)
+
+    async def set(self, key: str, value: bytes, ttl: int | None = None, nx: bool = False) -> bool:
+        if nx and self._live(key) is not None:
+            return False
+        self._values[key] = (self._clock() + ttl if ttl else None, value)
+        return True
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._values.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        value = int(self._live(key) or 0) + 1
+        self._values[key] = (None, str(value).encode())
+        return value
+
+    async def publish(self, channel: str, message: bytes):
+        for queue in self._subscribers.get(channel, []):
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(channel, []).append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[channel].remove(queue)
+
+
+class RedisCacheBackend:
+    """
+    Backend for any Redis-compatible server (Redis, Valkey, KeyDB, ...).
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int | None = None, nx: bool = False) -> bool:
+        return bool(await self._redis.set(key, value, ex=ttl, nx=nx))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def incr(self, key: str) -> int:
+        return await self._redis.incr(key)
+
+    async def publish(self, channel: str, message: bytes):
+        await self._redis.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.close()
+
+
+def create_backend(url: str):
+    """
+    The backend for CACHE_URL, or a process-local one when none is configured. A
+    configured server that cannot be used is a startup error: falling back to per-process
+    caches would leave the other workers serving stale entries for a whole TTL.
+    """
+    if not url:
+        return InMemoryCacheBackend()
+    try:
+        return RedisCacheBackend(url)
+    except ImportError as e:
+        raise RuntimeError(f"CACHE_URL is set but the redis client is not installed: {e}") from e
+
+
+class SharedCache:
+    """
+    Response cache stored in the shared backend, so every worker serves the same entries.
+
+    Keys live under a namespace version: bumping it (`invalidate_all`) orphans every key
+    in the namespace in O(1). Concurrent misses for the same key are coalesced: within a
+    process they await a single load, and across workers the first one to take a short
+    backend lock loads while the others poll for its result.
+
+    Like core.cache.TTLCache, every invalidation bumps a generation: a load only stores
+    its value if the generation did not move while it ran, so a value read before a write
+    is never stored after the write invalidated it. For `holdoff` seconds after any
+    invalidation loaded values are not stored, so a lagging read replica cannot refill
+    the namespace with pre-write data. Both live in the backend, so every worker honours
+    them.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        backend,
+        ttl: int = SHARED_CACHE_TTL_SECONDS,
+        holdoff: float = CACHE_FILL_HOLDOFF_SECONDS,
+    ):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl = ttl
+        self.holdoff = holdoff
+        self.hits = 0
+        self.misses = 0
+        self._version: int | None = None
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def _key(self, key: str) -> str:
+        if self._version is None:
+            self._version = int(await self.backend.get(f"{self.namespace}:version") or 0)
+        return f"{self.namespace}:v{self._version}:{key}"
+
+    @property
+    def _generation_key(self) -> str:
+        return f"{self.namespace}:generation"
+
+    async def get_or_load(self, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the cached JSON-compatible value for `key`, or the result of `load()`.
+        None results are not cached.
+        """
+        full_key = await self._key(key)
+        cached = await self.backend.get(full_key)
+        if cached is not None:
+            self.hits += 1
+            return json.loads(cached)
+        self.misses += 1
+
+        if full_key in self._inflight:
+            return await asyncio.shield(self._inflight[full_key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            value = await self._load_once(full_key, load)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            if self._inflight.get(full_key) is future:
+                del self._inflight[full_key]
+
+    async def _load_once(self, full_key: str, load):
+        lock_key = f"{full_key}:lock"
+        locked = await self.backend.set(lock_key, b"1", ttl=_LOCK_SECONDS, nx=True)
+        if not locked:
+            deadline = time.monotonic() + _LOCK_SECONDS
+            while time.monotonic() < deadline:
+                await asyncio.sleep(_LOCK_POLL_SECONDS)
+                cached = await self.backend.get(full_key)
+                if cached is not None:
+                    return json.loads(cached)
+        try:
+            generation = await self.backend.get(self._generation_key)
+            value = await load()
+            if value is not None and not await self._settling():
+                if await self.backend.get(self._generation_key) == generation:
+                    await self.backend.set(full_key, json.dumps(value).encode(), ttl=self.ttl)
+                    # An invalidation between the check and the set; it may have deleted
+                    # the key before the set
+                    if await self.backend.get(self._generation_key) != generation:
+                        await self.backend.delete(full_key)
+            return value
+        finally:
+            if locked:
+                await self.backend.delete(lock_key)
+
+    async def invalidate(self, *keys: str):
+        full_keys = [await self._key(key) for key in keys]
+        await self._start_settling()
+        # Bumped before the delete: a load that finishes after it does not store its value
+        await self.backend.incr(self._generation_key)
+        # Misses after this load afresh instead of joining or waiting for a load that
+        # started before
+        await self.backend.delete(*full_keys, *(f"{full_key}:lock" for full_key in full_keys))
+        for full_key in full_keys:
+            self._inflight.pop(full_key, None)
+
+    async def _start_settling(self):
+        if self.holdoff:
+            marker = f"{self.namespace}:settling"
+            await self.backend.set(marker, b"1", ttl=math.ceil(self.holdoff))
+
+    async def _settling(self) -> bool:
+        if not self.holdoff:
+            return False
+        return await self.backend.get(f"{self.namespace}:settling") is not None
+
+    async def invalidate_all(self) -> int:
+        await self._start_settling()
+        self._version = await self.backend.incr(f"{self.namespace}:version")
+        return self._version
+
+    def apply_version(self, version: int):
+        if self._version is None or version > self._version:
+            self._version = version
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class InvalidationBus:
+    """
+    Broadcasts cache invalidations to every worker. Process-local caches (core.cache) drop
+    the listed keys and key prefixes; shared caches adopt the new namespace version.
+    Other in-process structures register a handler for their own message `topic`.
+    """
+
+    def __init__(self, backend, channel: str = INVALIDATION_CHANNEL):
+        self.backend = backend
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self.shared: dict[str, SharedCache] = {}
+        self.handlers: dict[str, list[Callable[[dict[str, Any]], None]]] = {}
+        self._task: asyncio.Task | None = None
+
+    def shared_cache(self, namespace: str, ttl: int = SHARED_CACHE_TTL_SECONDS) -> SharedCache:
+        if namespace not in self.shared:
+            self.shared[namespace] = SharedCache(namespace, self.backend, ttl)
+        return self.shared[namespace]
+
+    def apply(self, message: dict[str, Any]):
+        if "local" in message:
+            prefixes = tuple(message.get("prefixes", ()))
+            get_cache(message["local"]).invalidate(
+                *message.get("keys", ()),
+                where=(lambda key: key.startswith(prefixes)) if prefixes else None,
+            )
+        if "shared" in message and message["shared"] in self.shared:
+            self.shared[message["shared"]].apply_version(message["version"])
+        for handler in self.handlers.get(message.get("topic"), ()):
+            handler(message)
+
+    def on(self, topic: str, handler: Callable[[dict[str, Any]], None]):
+        self.handlers.setdefault(topic, []).append(handler)
+
+    async def publish(self, message: dict[str, Any]):
+        self.apply(message)
+        payload = json.dumps({**message, "origin": self.origin}).encode()
+        try:
+            await self.backend.publish(self.channel, payload)
+        except Exception as e:
+            # Other workers fall back to TTL expiry; never fail the write because of this
+            logger.warning("Cache invalidation broadcast failed: %s", e)
+
+    async def invalidate_local(self, cache: str, *keys: str, prefixes: tuple[str, ...] = ()):
+        await self.publish({"local": cache, "keys": list(keys), "prefixes": list(prefixes)})
+
+    async def invalidate_shared(self, namespace: str):
+        version = await self.shared_cache(namespace).invalidate_all()
+        await self.publish({"shared": namespace, "version": version})
+
+    async def listen(self):
+        async for payload in self.backend.subscribe(self.channel):
+            try:
+                message = json.loads(payload)
+            except (TypeError, ValueError):
+                continue
+            if message.get("origin") != self.origin:
+                self.apply(message)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+cache_backend = create_backend(CACHE_URL)
+invalidation_bus = InvalidationBus(cache_backend)
+
+
+def shared_cache_stats() -> dict[str, dict[str, Any]]:
+    return {name: cache.stats() for name, cache in invalidation_bus.shared.items()}
+
+
+async def clear_shared_caches():
+    for namespace in list(invalidation_bus.shared):
+        await invalidation_bus.invalidate_shared(namespace)
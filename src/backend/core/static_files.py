@@ -0,0 +1,87 @@
+import os
+from mimetypes import guess_type
+
+from core.compression import accepted_encodings
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+# Vite puts a content hash in every asset file name, so a URL never changes content
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Pre-compressed variants written next to the assets at build time, best first
+PRECOMPRESSED_VARIANTS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Serves build assets with long-lived immutable caching, and the `.br`/`.gz` file
+    next to an asset instead of the asset itself when the client accepts that encoding.
+    Which variants exist is looked up once per asset, as the build does not change
+    while the process runs.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._variants: dict[str, list[tuple[str, str, os.stat_result]]] = {}
+
+    def _variants_of(self, full_path: str) -> list[tuple[str, str, os.stat_result]]:
+        variants = self._variants.get(full_path)
+        if variants is None:
+            variants = []
+            for encoding, suffix in PRECOMPRESSED_VARIANTS:
+                try:
+                    stat_result = os.stat(full_path + suffix)
+                except OSError:
+                    continue
+                variants.append((encoding, full_path + suffix, stat_result))
+            self._variants[full_path] = variants
+        return variants
+
+    def file_response(
+        self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers)
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        path, media_type = full_path, None
+        variants = self._variants_of(str(full_path))
+        if variants:
+            headers["Vary"] = "Accept-Encoding"
+        for encoding, variant_path, variant_stat in variants:
+            if encoding in accepted:
+                path, stat_result = variant_path, variant_stat
+                media_type = guess_type(str(full_path))[0] or "application/octet-stream"
+                headers["Content-Encoding"] = encoding
+                break
+
+        response = FileResponse(
+            path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            stat_result=stat_result,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class SpaIndex:
+    """
+    The SPA's index.html, read once and served from memory for every client side route.
+    Not cached by browsers beyond revalidation, so a deploy is picked up on next load.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, "rb") as file:
+                self.content: bytes | None = file.read()
+        except OSError:
+            self.content = None
+
+    def response(self) -> Response | None:
+        if self.content is None:
+            return None
+        return Response(self.content, media_type="text/html", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,129 @@
+import itertools
+import logging
+import time
+from collections.abc import Callable
+from http.cookies import SimpleCookie
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+ROUND_ROBIN = "round_robin"
+LEAST_LOADED = "least_loaded"
+
+# Set after a successful write so the same client reads from the primary for a short
+# window and sees its own writes despite replication lag.
+PRIMARY_READS_COOKIE = "gms_read_primary"
+READ_CONSISTENCY_HEADER = "x-read-consistency"
+
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine | Engine):
+        self.name = name
+        self.engine = engine
+        self.in_flight = 0
+        self.unhealthy_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+
+class ReplicaSet:
+    """
+    Read replicas with round-robin or least-loaded selection. A replica that fails to
+    hand out a connection is skipped for `retry_seconds`, after which it is tried again.
+    """
+
+    def __init__(self, replicas: list[Replica], strategy: str, retry_seconds: float):
+        if strategy not in (ROUND_ROBIN, LEAST_LOADED):
+            raise ValueError(f"Unknown replica strategy: {strategy}")
+        self.replicas = replicas
+        self.strategy = strategy
+        self.retry_seconds = retry_seconds
+        self._counter = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def candidates(self) -> list[Replica]:
+        """
+        Healthy replicas in the order they should be tried.
+        """
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return []
+        if self.strategy == LEAST_LOADED:
+            return sorted(healthy, key=lambda replica: replica.in_flight)
+        start = next(self._counter) % len(healthy)
+        return healthy[start:] + healthy[:start]
+
+    def mark_unhealthy(self, replica: Replica, error: Exception):
+        replica.unhealthy_until = time.monotonic() + self.retry_seconds
+        logger.warning("Read replica %s unavailable, failing over: %s", replica.name, error)
+
+    async def connect(self, connect: Callable):
+        """
+        Returns (replica, connection) from the first candidate that accepts a connection,
+        or None if every replica is down. `connect` opens a connection for an engine.
+        """
+        for replica in self.candidates():
+            try:
+                connection = await connect(replica.engine)
+            except (DBAPIError, OSError, TimeoutError) as e:
+                self.mark_unhealthy(replica, e)
+                continue
+            return replica, connection
+        return None
+
+
+def wants_primary(headers: dict[str, str], cookies: dict[str, str]) -> bool:
+    """
+    True when a read must see the latest writes: the client asked for strong
+    consistency or wrote something within the read-your-writes window.
+    """
+    if headers.get(READ_CONSISTENCY_HEADER, "").lower() == "strong":
+        return True
+    return PRIMARY_READS_COOKIE in cookies
+
+
+class ReadYourWritesMiddleware:
+    """
+    Sets the primary-reads cookie on successful write responses. POST routes that only
+    read (batch fetches) are listed by path suffix in `read_only_paths`.
+    """
+
+    def __init__(self, app, window_seconds: int, read_only_paths: tuple[str, ...] = ()):
+        self.app = app
+        self.window_seconds = window_seconds
+        self.read_only_paths = read_only_paths
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in _WRITE_METHODS
+            or scope["path"].endswith(self.read_only_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = SimpleCookie()
+                cookie[PRIMARY_READS_COOKIE] = "1"
+                cookie[PRIMARY_READS_COOKIE]["max-age"] = self.window_seconds
+                cookie[PRIMARY_READS_COOKIE]["path"] = "/"
+                cookie[PRIMARY_READS_COOKIE]["httponly"] = True
+                cookie[PRIMARY_READS_COOKIE]["samesite"] = "Lax"
+                header = cookie.output(header="").strip().encode("latin-1")
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (b"set-cookie", header)],
+                }
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
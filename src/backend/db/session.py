@@ -1,7 +1,20 @@
+import asyncio
+import importlib.util
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 
+from db.replicas import ROUND_ROBIN, Replica, ReplicaSet, wants_primary
+from db.threaded_session import ThreadedSession
 from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from fastapi import Request
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlmodel import Session, SQLModel, create_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -10,28 +23,160 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
 sqlite_url = "sqlite:///./dev.db"
 
-# Use SQLite if postgres driver is missing
-if DATABASE_URL.startswith("postgresql"):
-    try:
-        import psycopg2  # noqa: F401
-    except ImportError:
-        print("Postgres driver (psycopg2) not found, falling back to SQLite")
-        DATABASE_URL = sqlite_url
+# Engine tuning, all overridable from the environment
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# asyncpg prepared statement caches; set to 0 behind pgbouncer in transaction mode
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+# Worker threads for drivers without asyncio support
+DB_SYNC_THREADS = int(os.getenv("DB_SYNC_THREADS", "8"))
 
-# Handle sync vs async engines for open source compatibility
-if "aiosqlite" in DATABASE_URL or "asyncpg" in DATABASE_URL:
-    engine = create_async_engine(DATABASE_URL, echo=True)
-else:
-    engine = create_engine(DATABASE_URL, echo=True)
+# Comma separated read replica URLs used by GET routes
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+DB_REPLICA_STRATEGY = os.getenv("DB_REPLICA_STRATEGY", ROUND_ROBIN)
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+DB_READ_YOUR_WRITES_SECONDS = int(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
 
+# Async driver (SQLAlchemy dialect driver, importable module) preferred per backend
+ASYNC_DRIVERS = {"sqlite": ("aiosqlite", "aiosqlite"), "postgresql": ("asyncpg", "asyncpg")}
+ASYNC_DRIVER_NAMES = {"aiosqlite", "asyncpg", "psycopg_async"}
 
-async def get_session():
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def resolve_url(database_url: str) -> URL:
+    """
+    Upgrades plain sqlite:// and postgresql:// URLs to their asyncio driver when it is
+    installed. Falls back to SQLite if no Postgres driver is available at all.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+
+    if backend == "postgresql" and not (_has_module("asyncpg") or _has_module("psycopg2")):
+        print("Postgres driver (asyncpg/psycopg2) not found, falling back to SQLite")
+        url = make_url(sqlite_url)
+        backend = "sqlite"
+
+    if url.get_driver_name() not in ASYNC_DRIVER_NAMES and backend in ASYNC_DRIVERS:
+        driver, module = ASYNC_DRIVERS[backend]
+        if _has_module(module):
+            url = url.set(drivername=f"{backend}+{driver}")
+
+    if url.get_driver_name() == "asyncpg" and "prepared_statement_cache_size" not in url.query:
+        url = url.update_query_dict({"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)})
+    return url
+
+
+def engine_options(url: URL) -> dict:
+    """
+    Keyword arguments for create_engine/create_async_engine. SQLite uses SQLAlchemy's
+    default pools; everything else gets a sized, pre-pinged and recycled QueuePool.
+    """
+    options = {"echo": DB_ECHO}
+    if url.get_backend_name() == "sqlite":
+        if url.get_driver_name() not in ASYNC_DRIVER_NAMES:
+            # Sync connections are used from the worker threads
+            options["connect_args"] = {"check_same_thread": False}
+        return options
+
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    return options
+
+
+def build_engine(database_url: str) -> AsyncEngine | Engine:
+    url = resolve_url(database_url)
+    if url.get_driver_name() in ASYNC_DRIVER_NAMES:
+        return create_async_engine(url, **engine_options(url))
+    return create_engine(url, **engine_options(url))
+
+
+engine = build_engine(DATABASE_URL)
+
+async_session_maker = (
+    async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    if isinstance(engine, AsyncEngine)
+    else None
+)
+sync_executor = ThreadPoolExecutor(max_workers=DB_SYNC_THREADS, thread_name_prefix="db")
+
+replicas = ReplicaSet(
+    [
+        Replica(f"replica-{i}", build_engine(url))
+        for i, url in enumerate(DATABASE_REPLICA_URLS, start=1)
+    ],
+    strategy=DB_REPLICA_STRATEGY,
+    retry_seconds=DB_REPLICA_RETRY_SECONDS,
+)
+
+
+@asynccontextmanager
+async def primary_session():
     if isinstance(engine, AsyncEngine):
-        async with AsyncSession(engine) as session:
+        async with async_session_maker() as session:
             yield session
     else:
-        with Session(engine) as session:
+        sync_session = Session(engine, expire_on_commit=False)
+        async with ThreadedSession(sync_session, sync_executor) as session:
+            yield session
+
+
+async def get_session():
+    async with primary_session() as session:
+        yield session
+
+
+async def _connect(bind: AsyncEngine | Engine):
+    if isinstance(bind, AsyncEngine):
+        return await bind.connect()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(sync_executor, bind.connect)
+
+
+async def get_read_session(request: Request):
+    """
+    Session for read-only routes. Served by a healthy read replica when replicas are
+    configured, otherwise (or when the client needs to read its own writes) by the primary.
+    """
+    acquired = None
+    if replicas and not wants_primary(request.headers, request.cookies):
+        acquired = await replicas.connect(_connect)
+    if acquired is None:
+        async with primary_session() as session:
             yield session
+        return
+
+    replica, connection = acquired
+    replica.in_flight += 1
+    try:
+        if isinstance(connection, AsyncConnection):
+            async with AsyncSession(bind=connection, expire_on_commit=False) as session:
+                yield session
+        else:
+            sync_session = Session(bind=connection, expire_on_commit=False)
+            async with ThreadedSession(sync_session, sync_executor) as session:
+                yield session
+    finally:
+        replica.in_flight -= 1
+        if isinstance(connection, AsyncConnection):
+            await connection.close()
+        else:
+            await asyncio.get_running_loop().run_in_executor(sync_executor, connection.close)
 
 
 async def init_db():
@@ -39,4 +184,5 @@ async def init_db():
         async with engine.begin() as conn:
             await conn.run_sync(SQLModel.metadata.create_all)
     else:
-        SQLModel.metadata.create_all(engine)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(sync_executor, SQLModel.metadata.create_all, engine)
@@ -0,0 +1,93 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from sqlmodel import Session
+
+
+class ThreadedResult:
+    """
+    Async view over a streamed sync Result; each fetch runs on the session's executor.
+    """
+
+    def __init__(self, session: "ThreadedSession", result):
+        self._session = session
+        self._result = result
+
+    async def partitions(self, size: int | None = None):
+        partitions = self._result.partitions(size)
+        while True:
+            partition = await self._session._run(next, partitions, None)
+            if partition is None:
+                return
+            yield partition
+
+
+class ThreadedSession:
+    """
+    AsyncSession-compatible wrapper around a sync Session for database drivers without
+    asyncio support. Every call that may do I/O is dispatched to a bounded thread pool,
+    so queries never block the event loop. Calls are awaited one at a time, so the
+    wrapped Session is never used from two threads at once.
+    """
+
+    def __init__(self, session: Session, executor: ThreadPoolExecutor):
+        self.sync_session = session
+        self._executor = executor
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # Carry the request context over, so per-request query accounting sees the thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, partial(context.run, fn, *args, **kwargs))
+
+    @property
+    def bind(self):
+        return self.sync_session.bind
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    def expunge_all(self):
+        self.sync_session.expunge_all()
+
+    async def exec(self, statement, **kwargs):
+        return await self._run(self.sync_session.exec, statement, **kwargs)
+
+    async def execute(self, statement, *args, **kwargs):
+        return await self._run(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await self._run(self.sync_session.get, entity, ident, **kwargs)
+
+    async def stream(self, statement, **kwargs):
+        result = await self._run(self.sync_session.execute, statement, **kwargs)
+        return ThreadedResult(self, result)
+
+    async def refresh(self, instance, **kwargs):
+        await self._run(self.sync_session.refresh, instance, **kwargs)
+
+    async def delete(self, instance):
+        await self._run(self.sync_session.delete, instance)
+
+    async def flush(self):
+        await self._run(self.sync_session.flush)
+
+    async def commit(self):
+        await self._run(self.sync_session.commit)
+
+    async def rollback(self):
+        await self._run(self.sync_session.rollback)
+
+    async def close(self):
+        await self._run(self.sync_session.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
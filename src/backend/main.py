@@ -1,18 +1,39 @@
+import asyncio
 import os
 import sys
 
-from db.session import init_db
+from core.cache import cache_stats
+from core.compression import CompressionMiddleware
+from core.metrics import METRICS_ENABLED, instrument, mark_process_dead
+from core.profiling import QUERY_PROFILING, QueryProfilingMiddleware
+from core.shared_cache import invalidation_bus, shared_cache_stats
+from core.static_files import PrecompressedStaticFiles, SpaIndex
+from db.replicas import ReadYourWritesMiddleware
+from db.session import (
+    DB_READ_YOUR_WRITES_SECONDS,
+    engine,
+    init_db,
+    primary_session,
+    replicas,
+)
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse
 from gms_backend_core.config import GmsBackendSettings
 from gms_backend_core.logging.config import setup_logging
+from parts.api.v1.bulk_import import router as import_router
+from parts.api.v1.fitment import router as fitment_router
 from parts.api.v1.location import router as locations_router
 from parts.api.v1.part import router as parts_router
 from parts.api.v1.search import router as search_router
+from parts.api.v1.stock import router as stock_router
 from parts.api.v1.vehicle import router as vehicles_router
+from parts.core.fuzzy import fuzzy_index
+from parts.core.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from parts.core.stock import STOCK_SNAPSHOT_INTERVAL_SECONDS, take_snapshots_periodically
+from parts.core.typeahead import typeahead_index
 from pydantic import ValidationError
+from sqlalchemy.orm.exc import StaleDataError
 
 # Initialize shared configuration with explicit error handling for open source
 try:
@@ -34,9 +55,32 @@ setup_logging(settings)
 app = FastAPI(title="Parts Service API")
 
 
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    # Another request updated the row between this request reading and writing it
+    return JSONResponse(
+        status_code=409, content={"detail": "The resource was modified concurrently, retry"}
+    )
+
+
 @app.on_event("startup")
 async def on_startup():
     await init_db()
+    invalidation_bus.start()
+    async with primary_session() as session:
+        await typeahead_index.load(session)
+        if session.bind.dialect.name != "postgresql":
+            await fuzzy_index.load(session)
+    if STOCK_SNAPSHOT_INTERVAL_SECONDS > 0:
+        app.state.stock_snapshots = asyncio.create_task(take_snapshots_periodically())
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await invalidation_bus.stop()
+    if hasattr(app.state, "stock_snapshots"):
+        app.state.stock_snapshots.cancel()
+    mark_process_dead()
 
 
 app.add_middleware(
@@ -45,12 +89,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, "ETag"],
 )
+app.add_middleware(CompressionMiddleware)
+if QUERY_PROFILING:
+    app.add_middleware(QueryProfilingMiddleware)
+
+if replicas:
+    app.add_middleware(
+        ReadYourWritesMiddleware,
+        window_seconds=DB_READ_YOUR_WRITES_SECONDS,
+        read_only_paths=("/batch-get", ":batch"),
+    )
+
+if METRICS_ENABLED:
+    instrument(
+        app, {"primary": engine, **{replica.name: replica.engine for replica in replicas.replicas}}
+    )
 
 app.include_router(parts_router, prefix="/api/v1")
 app.include_router(vehicles_router, prefix="/api/v1")
 app.include_router(locations_router, prefix="/api/v1")
 app.include_router(search_router, prefix="/api/v1")
+app.include_router(fitment_router, prefix="/api/v1")
+app.include_router(stock_router, prefix="/api/v1")
+app.include_router(import_router, prefix="/api/v1")
 
 
 @app.get("/health")
@@ -58,23 +121,26 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/health/caches")
+async def health_caches():
+    return {"local": cache_stats(), "shared": shared_cache_stats()}
+
+
 # Static file serving
 # In Docker, files are in /app/static. Locally, they are in src/frontend/dist
 static_dir = "/app/static" if os.path.exists("/app/static") else "src/frontend/dist"
 
 if os.path.exists(static_dir):
-    app.mount("/assets", StaticFiles(directory=f"{static_dir}/assets"), name="assets")
+    app.mount("/assets", PrecompressedStaticFiles(directory=f"{static_dir}/assets"), name="assets")
+    spa_index = SpaIndex(os.path.join(static_dir, "index.html"))
 
     @app.get("/{full_path:path}")
     async def serve_spa(request: Request, full_path: str):
         # API requests should have been handled by routers already
-        if full_path.startswith("api/v1") or full_path == "health":
+        if full_path.startswith("api/v1") or full_path.startswith("health"):
             return None  # Let FastAPI handle 404 for missing API endpoints
 
-        index_path = os.path.join(static_dir, "index.html")
-        if os.path.exists(index_path):
-            return FileResponse(index_path)
-        return {"detail": "Frontend build not found"}
+        return spa_index.response() or {"detail": "Frontend build not found"}
 else:
 
     @app.get("/")
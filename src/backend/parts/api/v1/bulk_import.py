@@ -0,0 +1,92 @@
+from core.cache import get_cache
+from core.security import get_current_user
+from core.shared_cache import invalidation_bus
+from db.session import get_session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from parts.core.bulk_import import import_links, import_parts, import_vehicles, parse_rows
+from parts.core.catalogue_index import reindex
+from parts.core.export import DataFormat
+from parts.core.pagination import invalidate_lists
+from parts.schemas.bulk_import import ImportResult
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+router = APIRouter(prefix="/import", tags=["Import"])
+
+_IMPORTERS = {"parts": import_parts, "vehicles": import_vehicles, "links": import_links}
+# Shared cache namespaces made stale by each kind of import
+_INVALIDATES = {"parts": ("search", "alternatives"), "vehicles": ("search",), "links": ("fitment",)}
+# Process-local caches whose list pages each kind of import makes stale
+_LIST_CACHES = {"vehicles": ("vehicles",)}
+# Imports that add entries to the in-memory catalogue indexes
+_REINDEXES = {"parts", "vehicles"}
+
+
+def _request_format(request: Request, format: DataFormat | None) -> DataFormat:
+    if format is not None:
+        return format
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        return DataFormat.csv
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return DataFormat.ndjson
+    raise HTTPException(
+        status_code=415, detail="Send text/csv or application/x-ndjson, or pass format="
+    )
+
+
+async def _import(kind: str, request: Request, format: DataFormat | None, session: AsyncSession):
+    fmt = _request_format(request, format)
+    try:
+        data = (await request.body()).decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail="Body must be UTF-8 encoded") from e
+    result = await _IMPORTERS[kind](session, parse_rows(data, fmt))
+    if result.created:
+        for namespace in _INVALIDATES[kind]:
+            await invalidation_bus.invalidate_shared(namespace)
+        for name in _LIST_CACHES.get(kind, ()):
+            await invalidate_lists(get_cache(name))
+        if kind in _REINDEXES:
+            await reindex()
+    return result
+
+
+@router.post("/parts", response_model=ImportResult)
+async def bulk_import_parts(
+    request: Request,
+    format: DataFormat | None = None,
+    session: AsyncSession = Depends(get_session),
+    _=Depends(get_current_user),
+):
+    """
+    Bulk import parts from a CSV or NDJSON body of PartCreate records.
+    Invalid rows are reported individually and do not stop the import.
+    """
+    return await _import("parts", request, format, session)
+
+
+@router.post("/vehicles", response_model=ImportResult)
+async def bulk_import_vehicles(
+    request: Request,
+    format: DataFormat | None = None,
+    session: AsyncSession = Depends(get_session),
+    _=Depends(get_current_user),
+):
+    """
+    Bulk import vehicles from a CSV or NDJSON body of VehicleCreate records.
+    """
+    return await _import("vehicles", request, format, session)
+
+
+@router.post("/links", response_model=ImportResult)
+async def bulk_import_links(
+    request: Request,
+    format: DataFormat | None = None,
+    session: AsyncSession = Depends(get_session),
+    _=Depends(get_current_user),
+):
+    """
+    Bulk import part-vehicle fitment links identified by natural keys
+    (see PartVehicleLinkImport). Existing links are left untouched.
+    """
+    return await _import("links", request, format, session)
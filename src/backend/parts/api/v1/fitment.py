@@ -0,0 +1,98 @@
+from core.security import get_current_user
+from core.shared_cache import invalidation_bus
+from db.session import get_read_session, get_session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from parts.core.fitment import fitment_filters, link_pairs, missing_link_ends, unlink_pairs
+from parts.core.pagination import MAX_PAGE_SIZE, paginated_list
+from parts.db.models import Part
+from parts.schemas.fitment import FitmentLinkBatch, FitmentLinkResult
+from parts.schemas.part import PartRead
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+router = APIRouter(prefix="/fitment", tags=["Fitment"])
+
+fitment_cache = invalidation_bus.shared_cache("fitment")
+
+
+@router.get("/parts", response_model=list[PartRead])
+async def find_fitting_parts(
+    make: str | None = None,
+    model: str | None = None,
+    year: int | None = Query(None, ge=1886, le=2100),
+    power_type: str | None = None,
+    drive_type: str | None = None,
+    part_type: str | None = None,
+    system: str | None = None,
+    limit: int | None = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    fields: str | None = None,
+    include_total: bool = False,
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    Parts that fit any vehicle matching the filters, e.g. every brake part for a 2019
+    FWD Nissan Leaf. Keyset paginated by internal part code like GET /parts.
+    """
+    return await paginated_list(
+        session,
+        Part,
+        ("internal_part_code", "id"),
+        PartRead,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+        include_total=include_total,
+        where=fitment_filters(
+            make=make,
+            model=model,
+            year=year,
+            power_type=power_type,
+            drive_type=drive_type,
+            part_type=part_type,
+            system=system,
+        ),
+    )
+
+
+@router.post("/links", response_model=FitmentLinkResult)
+async def link_parts_to_vehicles(
+    batch: FitmentLinkBatch,
+    session: AsyncSession = Depends(get_session),
+    _=Depends(get_current_user),
+):
+    """
+    US-011: Link many parts and vehicles in one transaction.
+    Idempotent: links that already exist are skipped and not counted as created.
+    """
+    pairs = batch.pairs()
+    missing_parts, missing_vehicles = await missing_link_ends(session, pairs)
+    if missing_parts or missing_vehicles:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "missing_part_ids": sorted(map(str, missing_parts)),
+                "missing_vehicle_ids": sorted(map(str, missing_vehicles)),
+            },
+        )
+
+    created = await link_pairs(session, pairs)
+    await session.commit()
+    await fitment_cache.invalidate(*{str(vehicle_id) for _, vehicle_id in pairs})
+    return FitmentLinkResult(requested=len(pairs), created=created)
+
+
+@router.post("/links:delete", response_model=FitmentLinkResult)
+async def unlink_parts_from_vehicles(
+    batch: FitmentLinkBatch,
+    session: AsyncSession = Depends(get_session),
+    _=Depends(get_current_user),
+):
+    """
+    US-012: Unlink many parts and vehicles in one transaction.
+    Idempotent: links that do not exist are ignored and not counted as removed.
+    """
+    pairs = batch.pairs()
+    removed = await unlink_pairs(session, pairs)
+    await session.commit()
+    await fitment_cache.invalidate(*{str(vehicle_id) for _, vehicle_id in pairs})
+    return FitmentLinkResult(requested=len(pairs), removed=removed)
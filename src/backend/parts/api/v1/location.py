@@ -1,15 +1,20 @@
 from uuid import UUID
 
+from core.cache import get_cache
 from core.security import get_current_user
-from db.session import get_session
-from fastapi import APIRouter, Depends, HTTPException, status
+from db.session import get_read_session, get_session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from parts.core.conditional import conditional, entity_etag
+from parts.core.pagination import MAX_PAGE_SIZE, invalidate_lists, paginated_list
 from parts.db.models import Location
 from parts.schemas.location import LocationCreate, LocationRead, LocationUpdate
-from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 router = APIRouter(prefix="/locations", tags=["Locations"])
 
+# Reference data: entity reads and list pages, invalidated by the write handlers below
+locations_cache = get_cache("locations")
+
 
 @router.post("/", response_model=LocationRead, status_code=status.HTTP_201_CREATED)
 async def create_location(
@@ -23,29 +28,57 @@ async def create_location(
     db_location = Location.model_validate(location_in)
     session.add(db_location)
     await session.commit()
-    await session.refresh(db_location)
+    await invalidate_lists(locations_cache)
     return db_location
 
 
 @router.get("/", response_model=list[LocationRead])
-async def list_locations(session: AsyncSession = Depends(get_session)):
+async def list_locations(
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    fields: str | None = None,
+    include_total: bool = False,
+    session: AsyncSession = Depends(get_read_session),
+):
     """
     US-018: View all locations
+    Keyset paginated by name when `limit` is given; the next page's cursor
+    is returned in the X-Next-Cursor header.
     """
-    result = await session.exec(select(Location))
-    locations = result.all()
-    return locations
+    return await paginated_list(
+        session,
+        Location,
+        ("name", "id"),
+        LocationRead,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+        include_total=include_total,
+        cache=locations_cache,
+    )
 
 
 @router.get("/{location_id}", response_model=LocationRead)
-async def get_location(location_id: UUID, session: AsyncSession = Depends(get_session)):
+async def get_location(
+    location_id: UUID,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+):
     """
     US-019: View a single location
+    Returns 304 Not Modified when If-None-Match carries the current ETag.
     """
-    location = await session.get(Location, location_id)
+
+    async def load():
+        location = await session.get(Location, location_id)
+        return LocationRead.model_validate(location) if location else None
+
+    location = await locations_cache.get_or_load(f"item:{location_id}", load)
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
-    return location
+    etag = entity_etag("location", location_id, location.version)
+    return conditional(request, response, etag) or location
 
 
 @router.patch("/{location_id}", response_model=LocationRead)
@@ -68,7 +101,7 @@ async def update_location(
 
     session.add(db_location)
     await session.commit()
-    await session.refresh(db_location)
+    await invalidate_lists(locations_cache, f"item:{location_id}")
     return db_location
 
 
@@ -85,4 +118,5 @@ async def delete_location(
 
     await session.delete(db_location)
     await session.commit()
+    await invalidate_lists(locations_cache, f"item:{location_id}")
     return None
@@ -1,19 +1,70 @@
 from uuid import UUID
 
+from core.responses import FastJSONResponse
 from core.security import get_current_user
-from db.session import get_session
-from fastapi import APIRouter, Depends, HTTPException, status
-from parts.core.logic import generate_internal_part_code
+from core.shared_cache import invalidation_bus
+from db.session import get_read_session, get_session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from parts.core.alternatives import (
+    remove_from_alternatives,
+    resolve_alternatives,
+    set_alternatives,
+    unknown_parts,
+)
+from parts.core.batch import (
+    in_stock,
+    parts_by_id,
+    stock_by_part,
+    stock_totals_by_part,
+    vehicles_by_part,
+)
+from parts.core.catalogue_index import index_part, unindex
+from parts.core.conditional import collection_etag, conditional, entity_etag
+from parts.core.export import MEDIA_TYPES, DataFormat, ExportInclude, export_parts
+from parts.core.logic import format_internal_part_code, internal_part_code_prefix
+from parts.core.pagination import MAX_PAGE_SIZE, paginated_list
+from parts.core.stock import set_stock_level
 from parts.db.models import Part, StockLevel, Vehicle
-from parts.schemas.part import PartCreate, PartRead, PartUpdate
+from parts.db.search_index import lookup_parts
+from parts.db.sequences import reserve_sequence
+from parts.schemas.alternatives import PartAlternativeRead
+from parts.schemas.part import PartBatchRequest, PartCreate, PartRead, PartUpdate
 from parts.schemas.stock import StockLevelCreate, StockLevelRead
 from parts.schemas.vehicle import VehicleRead
 from sqlalchemy.orm import selectinload
-from sqlmodel import func, select
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 router = APIRouter(prefix="/parts", tags=["Parts"])
 
+# Part reads are shared by every worker; writes below invalidate them, and the search and
+# fitment caches that embed parts, on all workers
+parts_cache = invalidation_bus.shared_cache("parts")
+fitment_cache = invalidation_bus.shared_cache("fitment")
+# Resolved alternative sets; any alternatives change can alter every chain through it
+alternatives_cache = invalidation_bus.shared_cache("alternatives")
+
+_NO_STOCK = {"quantity": 0, "reserved": 0, "available": 0}
+
+
+async def _invalidate_part(part_id: UUID):
+    await parts_cache.invalidate(str(part_id))
+    await invalidation_bus.invalidate_shared("search")
+    await invalidation_bus.invalidate_shared("fitment")
+
+
+async def _check_alternatives(
+    session: AsyncSession, alternatives: list[UUID], part_id: UUID | None = None
+):
+    unknown = await unknown_parts(session, alternatives)
+    if unknown:
+        raise HTTPException(
+            status_code=422, detail={"unknown_alternative_ids": sorted(map(str, unknown))}
+        )
+    if part_id in alternatives:
+        raise HTTPException(status_code=422, detail="A part cannot be its own alternative")
+
 
 @router.post("/", response_model=PartRead, status_code=status.HTTP_201_CREATED)
 async def create_part(
@@ -22,45 +73,141 @@ async def create_part(
     """
     REQ-PARTS-001: Create a new part (US-001)
     """
-    statement = select(func.count()).select_from(Part)
-    result = await session.exec(statement)
-    count = result.one()
-
-    internal_code = generate_internal_part_code(
+    await _check_alternatives(session, part_in.alternatives)
+    prefix = internal_part_code_prefix(
         manufacturer=part_in.last_known_supplier or "UNK",
         system=part_in.system,
         part_type=part_in.part_type,
-        sequence=count + 1,
     )
+    sequence = await reserve_sequence(session, prefix)
 
     db_part = Part.model_validate(part_in)
-    db_part.internal_part_code = internal_code
+    db_part.internal_part_code = format_internal_part_code(prefix, sequence)
 
     session.add(db_part)
+    await session.flush()
+    if db_part.alternatives:
+        await set_alternatives(session, db_part.id, db_part.alternatives)
     await session.commit()
-    await session.refresh(db_part)
+    await invalidation_bus.invalidate_shared("search")
+    if db_part.alternatives:
+        await invalidation_bus.invalidate_shared("alternatives")
+    await index_part(db_part)
     return db_part
 
 
 @router.get("/", response_model=list[PartRead])
-async def list_parts(session: AsyncSession = Depends(get_session)):
+async def list_parts(
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    fields: str | None = None,
+    include_total: bool = False,
+    session: AsyncSession = Depends(get_read_session),
+):
     """
     REQ-PARTS-004: View all parts (US-004)
+    Keyset paginated by internal part code (parts without one last) when `limit` is
+    given; the next page's cursor is returned in the X-Next-Cursor header.
+    """
+    return await paginated_list(
+        session,
+        Part,
+        ("internal_part_code", "id"),
+        PartRead,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+        include_total=include_total,
+    )
+
+
+@router.get("/export")
+async def export_parts_catalogue(
+    format: DataFormat = DataFormat.ndjson,
+    include: list[ExportInclude] = Query([]),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    Streams the full parts catalogue as NDJSON or CSV for bulk consumers such as ERP sync.
+    `include` embeds linked vehicles and/or stock levels for each part.
+    """
+    return StreamingResponse(
+        export_parts(session, format, set(include)),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="parts.{format.value}"'},
+    )
+
+
+@router.get("/lookup", response_model=list[PartRead])
+async def lookup_parts_by_number(
+    number: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    Exact part number lookup across internal, OE and manufacturer part numbers.
+    Case, spaces and punctuation are ignored, so "1k0 615 301 aa" finds "1K0-615-301-AA".
+    """
+    return await lookup_parts(session, number, limit)
+
+
+@router.post("/batch-get", response_model=list[PartRead])
+async def batch_get_parts(
+    batch: PartBatchRequest, session: AsyncSession = Depends(get_read_session)
+):
+    """
+    Fetch many parts by id in one query, in request order. Unknown ids are skipped.
+    """
+    return FastJSONResponse(await parts_by_id(session, list(dict.fromkeys(batch.ids))))
+
+
+@router.post("/stock:batch", response_model=dict[UUID, list[StockLevelRead]])
+async def batch_list_stock(
+    batch: PartBatchRequest, session: AsyncSession = Depends(get_read_session)
+):
+    """
+    US-020: Stock levels for many parts in one query, keyed by part id.
+    Every requested id is present; parts without stock (or unknown parts) map to [].
+    """
+    part_ids = list(dict.fromkeys(batch.ids))
+    stock = await stock_by_part(session, part_ids)
+    return FastJSONResponse({part_id: stock.get(part_id, []) for part_id in part_ids})
+
+
+@router.post("/vehicles:batch", response_model=dict[UUID, list[VehicleRead]])
+async def batch_list_vehicles(
+    batch: PartBatchRequest, session: AsyncSession = Depends(get_read_session)
+):
     """
-    result = await session.exec(select(Part))
-    parts = result.all()
-    return parts
+    US-014: Vehicles linked to many parts in one query, keyed by part id.
+    Every requested id is present; unlinked (or unknown) parts map to [].
+    """
+    part_ids = list(dict.fromkeys(batch.ids))
+    vehicles = await vehicles_by_part(session, part_ids)
+    return FastJSONResponse({part_id: vehicles.get(part_id, []) for part_id in part_ids})
 
 
 @router.get("/{part_id}", response_model=PartRead)
-async def get_part(part_id: UUID, session: AsyncSession = Depends(get_session)):
+async def get_part(
+    part_id: UUID,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+):
     """
     REQ-PARTS-005: View a single part (US-005)
+    Returns 304 Not Modified when If-None-Match carries the current ETag.
     """
-    part = await session.get(Part, part_id)
+
+    async def load():
+        part = await session.get(Part, part_id)
+        return PartRead.model_validate(part).model_dump(mode="json") if part else None
+
+    part = await parts_cache.get_or_load(str(part_id), load)
     if not part:
         raise HTTPException(status_code=404, detail="Part not found")
-    return part
+    etag = entity_etag("part", part_id, part["version"])
+    return conditional(request, response, etag) or part
 
 
 @router.patch("/{part_id}", response_model=PartRead)
@@ -78,12 +225,19 @@ async def update_part(
         raise HTTPException(status_code=404, detail="Part not found")
 
     update_data = part_in.model_dump(exclude_unset=True)
+    if update_data.get("alternatives"):
+        await _check_alternatives(session, part_in.alternatives, part_id)
     for key, value in update_data.items():
         setattr(db_part, key, value)
 
     session.add(db_part)
+    if "alternatives" in update_data:
+        await set_alternatives(session, part_id, db_part.alternatives or [])
     await session.commit()
-    await session.refresh(db_part)
+    await _invalidate_part(part_id)
+    if "alternatives" in update_data:
+        await invalidation_bus.invalidate_shared("alternatives")
+    await index_part(db_part)
     return db_part
 
 
@@ -98,11 +252,56 @@ async def delete_part(
     if not db_part:
         raise HTTPException(status_code=404, detail="Part not found")
 
+    listing = await remove_from_alternatives(session, part_id)
     await session.delete(db_part)
     await session.commit()
+    await _invalidate_part(part_id)
+    await parts_cache.invalidate(*map(str, listing))
+    await invalidation_bus.invalidate_shared("alternatives")
+    await unindex("part", part_id)
     return None
 
 
+@router.get("/{part_id}/alternatives", response_model=list[PartAlternativeRead])
+async def list_alternatives_for_part(
+    part_id: UUID,
+    bidirectional: bool = False,
+    in_stock_only: bool = False,
+    location_id: UUID | None = None,
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    Every part that can substitute for this one, following chains of alternatives
+    (supersessions), nearest first, with stock totals (at `location_id` when given).
+    `bidirectional` also follows parts that list this part as their alternative.
+    """
+
+    async def load():
+        if not (await session.exec(select(Part.id).where(Part.id == part_id))).first():
+            return None
+        resolved = await resolve_alternatives(session, part_id, bidirectional)
+        return [[str(id), depth] for id, depth in resolved]
+
+    resolved = await alternatives_cache.get_or_load(f"{part_id}:{bidirectional}", load)
+    if resolved is None:
+        raise HTTPException(status_code=404, detail="Part not found")
+
+    depths = {UUID(id): depth for id, depth in resolved}
+    where = (in_stock(location_id),) if in_stock_only else ()
+    parts = await parts_by_id(session, list(depths), where)
+    totals = await stock_totals_by_part(session, [UUID(part["id"]) for part in parts], location_id)
+    return FastJSONResponse(
+        [
+            {
+                **part,
+                "depth": depths[UUID(part["id"])],
+                "stock": totals.get(UUID(part["id"]), _NO_STOCK),
+            }
+            for part in parts
+        ]
+    )
+
+
 @router.post("/{part_id}/vehicles/{vehicle_id}", status_code=status.HTTP_201_CREATED)
 async def link_part_to_vehicle(
     part_id: UUID,
@@ -131,6 +330,7 @@ async def link_part_to_vehicle(
     part.vehicles.append(vehicle)
     session.add(part)
     await session.commit()
+    await fitment_cache.invalidate(str(vehicle_id))
     return {"message": "Linked successfully"}
 
 
@@ -162,11 +362,12 @@ async def unlink_part_from_vehicle(
     part.vehicles.remove(vehicle)
     session.add(part)
     await session.commit()
+    await fitment_cache.invalidate(str(vehicle_id))
     return None
 
 
 @router.get("/{part_id}/vehicles", response_model=list[VehicleRead])
-async def list_vehicles_for_part(part_id: UUID, session: AsyncSession = Depends(get_session)):
+async def list_vehicles_for_part(part_id: UUID, session: AsyncSession = Depends(get_read_session)):
     """
     US-014: View all vehicles linked to a part
     """
@@ -181,18 +382,30 @@ async def list_vehicles_for_part(part_id: UUID, session: AsyncSession = Depends(
 
 
 @router.get("/{part_id}/stock", response_model=list[StockLevelRead])
-async def list_stock_for_part(part_id: UUID, session: AsyncSession = Depends(get_session)):
+async def list_stock_for_part(
+    part_id: UUID,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+):
     """
     US-020: Read stock levels for a part
+    Returns 304 Not Modified when If-None-Match carries the current ETag, after reading
+    only the stock row versions.
     """
-    # Use select with selectinload
-    statement = select(Part).where(Part.id == part_id).options(selectinload(Part.stock_levels))
-    result = await session.exec(statement)
-    part = result.first()
-
-    if not part:
+    versions = (
+        await session.exec(
+            select(StockLevel.id, StockLevel.version).where(StockLevel.part_id == part_id)
+        )
+    ).all()
+    if not versions and not (await session.exec(select(Part.id).where(Part.id == part_id))).first():
         raise HTTPException(status_code=404, detail="Part not found")
-    return part.stock_levels
+
+    not_modified = conditional(request, response, collection_etag("stock", part_id, versions))
+    if not_modified:
+        return not_modified
+    result = await session.exec(select(StockLevel).where(StockLevel.part_id == part_id))
+    return result.all()
 
 
 @router.post("/{part_id}/stock", response_model=StockLevelRead)
@@ -201,25 +414,11 @@ async def set_stock_for_part(
 ):
     """
     US-020: Set or update stock level for a part at a location
+    Use POST /stock/movements for relative changes.
     """
-    part = await session.get(Part, part_id)
-    if not part:
+    if not (await session.exec(select(Part.id).where(Part.id == part_id))).first():
         raise HTTPException(status_code=404, detail="Part not found")
 
-    statement = select(StockLevel).where(
-        StockLevel.part_id == part_id, StockLevel.location_id == stock_in.location_id
-    )
-    result = await session.exec(statement)
-    db_stock = result.first()
-
-    if db_stock:
-        db_stock.quantity = stock_in.quantity
-    else:
-        db_stock = StockLevel(
-            part_id=part_id, location_id=stock_in.location_id, quantity=stock_in.quantity
-        )
-        session.add(db_stock)
-
+    db_stock = await set_stock_level(session, part_id, stock_in.location_id, stock_in.quantity)
     await session.commit()
-    await session.refresh(db_stock)
     return db_stock
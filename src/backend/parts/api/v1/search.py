@@ -1,46 +1,99 @@
-from db.session import get_session
-from fastapi import APIRouter, Depends
-from parts.db.models import Part, Vehicle
-from parts.schemas.search import SearchResult
-from sqlmodel import col, or_, select
+from uuid import UUID
+
+from core.responses import FastJSONResponse
+from core.shared_cache import invalidation_bus
+from db.session import get_read_session
+from fastapi import APIRouter, Depends, Query
+from parts.core.batch import in_stock, stock_totals_by_part
+from parts.core.fuzzy import fuzzy_search
+from parts.core.typeahead import typeahead_index
+from parts.db.search_index import search_parts, search_vehicles
+from parts.schemas.search import (
+    PartSearchHit,
+    SearchMode,
+    SearchResult,
+    Suggestion,
+    SuggestionKind,
+    VehicleSearchHit,
+)
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 router = APIRouter(prefix="/search", tags=["Search"])
 
+# Invalidated as a whole (namespace version bump) by part and vehicle writes
+search_cache = invalidation_bus.shared_cache("search")
+
+_NO_STOCK = {"quantity": 0, "reserved": 0, "available": 0}
+
 
 @router.get("/", response_model=SearchResult)
-async def search(q: str, session: AsyncSession = Depends(get_session)):
+async def search(
+    q: str,
+    mode: SearchMode = SearchMode.standard,
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0, le=10_000),
+    include_stock: bool = False,
+    in_stock_only: bool = False,
+    location_id: UUID | None = None,
+    session: AsyncSession = Depends(get_read_session),
+):
     """
     US-021: Free text search for parts and vehicles
+    Served from the search index (FTS5 on SQLite, tsvector on Postgres), best matches first.
+    `mode=fuzzy` tolerates typos ("brak pad", swapped digits) by trigram similarity
+    (pg_trgm on Postgres, an in-process index otherwise), ranking part numbers above
+    descriptions above notes, and returns each hit's score.
+    `include_stock` embeds each part's stock totals and `in_stock_only` keeps parts with
+    available stock, both for `location_id` when given.
+    """
+
+    async def load():
+        where = (in_stock(location_id),) if in_stock_only else ()
+        if mode == SearchMode.fuzzy:
+            parts = [
+                PartSearchHit.model_validate(part).model_copy(update={"score": score})
+                for part, score in await fuzzy_search(session, "part", q, limit, offset, where)
+            ]
+            vehicles = [
+                VehicleSearchHit.model_validate(vehicle).model_copy(update={"score": score})
+                for vehicle, score in await fuzzy_search(session, "vehicle", q, limit, offset)
+            ]
+        else:
+            parts = await search_parts(session, q, limit, where, offset)
+            vehicles = await search_vehicles(session, q, limit, offset)
+        return SearchResult(parts=parts, vehicles=vehicles).model_dump(mode="json")
+
+    if in_stock_only:
+        # Stock moves too often for a stock-filtered result to be cached
+        result = await load()
+    else:
+        key = f"{mode.value}:{limit}:{offset}:{' '.join(q.lower().split())}"
+        result = await search_cache.get_or_load(key, load)
+
+    if include_stock and result["parts"]:
+        part_ids = [UUID(part["id"]) for part in result["parts"]]
+        totals = await stock_totals_by_part(session, part_ids, location_id)
+        # Coalesced requests share `result`, so build a new one rather than mutating it
+        parts = [
+            {**part, "stock": totals.get(part_id, _NO_STOCK)}
+            for part_id, part in zip(part_ids, result["parts"], strict=True)
+        ]
+        result = {**result, "parts": parts}
+    # Already validated when it was cached
+    return FastJSONResponse(result)
+
+
+@router.get("/suggest", response_model=list[Suggestion])
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    kinds: list[SuggestionKind] = Query([]),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    Typeahead over part numbers (internal, OE, manufacturer) and vehicle make/model.
+    Prefix matches ignore case and separators, so "1k0 615" finds "1K0-615-301".
+    Served from an in-memory prefix index that writes keep current on every worker.
     """
-    query = f"%{q}%"
-
-    # Search Parts
-    parts_statement = select(Part).where(
-        or_(
-            col(Part.internal_part_code).ilike(query),
-            col(Part.oe_part_number).ilike(query),
-            col(Part.manufacturer_part_number).ilike(query),
-            col(Part.description).ilike(query),
-            col(Part.system).ilike(query),
-            col(Part.notes).ilike(query),
-            col(Part.oe_description).ilike(query),
-        )
-    )
-    parts_result = await session.exec(parts_statement)
-    parts = parts_result.all()
-
-    # Search Vehicles
-    vehicles_statement = select(Vehicle).where(
-        or_(
-            col(Vehicle.make).ilike(query),
-            col(Vehicle.model).ilike(query),
-            col(Vehicle.variant).ilike(query),
-            col(Vehicle.body_style).ilike(query),
-            col(Vehicle.trim_level).ilike(query),
-        )
-    )
-    vehicles_result = await session.exec(vehicles_statement)
-    vehicles = vehicles_result.all()
-
-    return SearchResult(parts=parts, vehicles=vehicles)
+    await typeahead_index.ensure_loaded(session)
+    return FastJSONResponse(typeahead_index.suggest(q, limit, {kind.value for kind in kinds}))
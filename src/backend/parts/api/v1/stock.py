@@ -0,0 +1,170 @@
+from datetime import datetime
+from uuid import UUID
+
+from core.security import get_current_user
+from db.session import get_read_session, get_session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from parts.core.pagination import MAX_PAGE_SIZE, paginated_list
+from parts.core.reports import (
+    CategoryField,
+    low_stock,
+    reports_cache,
+    stock_by_category,
+    stock_by_location,
+)
+from parts.core.stock import (
+    InsufficientStockError,
+    apply_movements,
+    missing_references,
+    stock_as_of,
+    take_snapshot,
+)
+from parts.db.models import StockLedgerEntry, StockLevel
+from parts.schemas.stock import (
+    LowStockItem,
+    StockBalance,
+    StockByCategory,
+    StockByLocation,
+    StockLedgerEntryRead,
+    StockLevelRead,
+    StockMovementBatch,
+    StockSnapshotRead,
+)
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+router = APIRouter(prefix="/stock", tags=["Stock"])
+
+
+@router.post("/movements", response_model=list[StockLevelRead])
+async def apply_stock_movements(
+    batch: StockMovementBatch,
+    session: AsyncSession = Depends(get_session),
+    _=Depends(get_current_user),
+):
+    """
+    Receive, consume, reserve, release or transfer stock, e.g. a whole pick list, in
+    one transaction. Returns the resulting levels of every part/location touched.
+    """
+    missing_parts, missing_locations = await missing_references(session, batch.movements)
+    if missing_parts or missing_locations:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "missing_part_ids": sorted(map(str, missing_parts)),
+                "missing_location_ids": sorted(map(str, missing_locations)),
+            },
+        )
+
+    try:
+        levels = await apply_movements(session, batch.movements, batch.allow_negative)
+    except InsufficientStockError as e:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    await session.commit()
+    return levels
+
+
+@router.get("/ledger", response_model=list[StockLedgerEntryRead])
+async def list_stock_ledger(
+    part_id: UUID | None = None,
+    location_id: UUID | None = None,
+    limit: int | None = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    include_total: bool = False,
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    Stock movement history, oldest first, keyset paginated by entry id.
+    """
+    where = []
+    if part_id is not None:
+        where.append(StockLedgerEntry.part_id == part_id)
+    if location_id is not None:
+        where.append(StockLedgerEntry.location_id == location_id)
+    return await paginated_list(
+        session,
+        StockLedgerEntry,
+        ("id",),
+        StockLedgerEntryRead,
+        limit=limit,
+        cursor=cursor,
+        fields=None,
+        include_total=include_total,
+        where=tuple(where),
+    )
+
+
+@router.get("/levels", response_model=list[StockBalance])
+async def list_stock_levels(
+    as_of: datetime | None = None,
+    part_id: UUID | None = None,
+    location_id: UUID | None = None,
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    Stock levels now, or as of a past time computed from the latest ledger snapshot
+    before it plus the movements since. Naive times are taken as UTC.
+    """
+    if as_of is not None:
+        return await stock_as_of(session, as_of, part_id, location_id)
+
+    statement = select(StockLevel)
+    if part_id is not None:
+        statement = statement.where(StockLevel.part_id == part_id)
+    if location_id is not None:
+        statement = statement.where(StockLevel.location_id == location_id)
+    return (await session.exec(statement)).all()
+
+
+@router.post("/snapshots", response_model=StockSnapshotRead)
+async def create_stock_snapshot(
+    session: AsyncSession = Depends(get_session), _=Depends(get_current_user)
+):
+    """
+    Snapshots the ledger now; snapshots are also taken periodically in the background.
+    """
+    snapshot = await take_snapshot(session)
+    await session.commit()
+    return snapshot
+
+
+@router.get("/reports/by-location", response_model=list[StockByLocation])
+async def report_stock_by_location(session: AsyncSession = Depends(get_read_session)):
+    """
+    Stock totals per location for the ops dashboard. Cached for a few seconds.
+    """
+    return await reports_cache.get_or_load("by-location", lambda: stock_by_location(session))
+
+
+@router.get("/reports/by-category", response_model=list[StockByCategory])
+async def report_stock_by_category(
+    group_by: list[CategoryField] = Query([CategoryField.system]),
+    location_id: UUID | None = None,
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    Stock totals per part system and/or part type. Cached for a few seconds.
+    """
+    group_by = list(dict.fromkeys(group_by))
+    key = f"by-category:{','.join(group_by)}:{location_id}"
+    return await reports_cache.get_or_load(
+        key, lambda: stock_by_category(session, group_by, location_id)
+    )
+
+
+@router.get("/reports/low-stock", response_model=list[LowStockItem])
+async def report_low_stock(
+    threshold: int = 0,
+    location_id: UUID | None = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """
+    Part/location rows with available stock at or below `threshold`, lowest first.
+    Cached for a few seconds.
+    """
+    key = f"low-stock:{threshold}:{location_id}:{limit}"
+    return await reports_cache.get_or_load(
+        key, lambda: low_stock(session, threshold, location_id, limit)
+    )
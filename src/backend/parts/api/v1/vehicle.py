@@ -1,17 +1,26 @@
 from uuid import UUID
 
+from core.cache import get_cache
 from core.security import get_current_user
-from db.session import get_session
-from fastapi import APIRouter, Depends, HTTPException, status
-from parts.db.models import Vehicle
+from core.shared_cache import invalidation_bus
+from db.session import get_read_session, get_session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from parts.core.catalogue_index import index_vehicle, unindex
+from parts.core.conditional import collection_etag, conditional, entity_etag
+from parts.core.pagination import MAX_PAGE_SIZE, invalidate_lists, paginated_list
+from parts.db.models import Part, PartVehicleLink, Vehicle
 from parts.schemas.part import PartRead
 from parts.schemas.vehicle import VehicleCreate, VehicleRead, VehicleUpdate
-from sqlalchemy.orm import selectinload
-from sqlmodel import select
+from sqlmodel import col, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 router = APIRouter(prefix="/vehicles", tags=["Vehicles"])
 
+# Reference data: entity reads and list pages, invalidated by the write handlers below
+vehicles_cache = get_cache("vehicles")
+# Parts fitted to each vehicle, shared by every worker
+fitment_cache = invalidation_bus.shared_cache("fitment")
+
 
 @router.post("/", response_model=VehicleRead, status_code=status.HTTP_201_CREATED)
 async def create_vehicle(
@@ -25,29 +34,59 @@ async def create_vehicle(
     db_vehicle = Vehicle.model_validate(vehicle_in)
     session.add(db_vehicle)
     await session.commit()
-    await session.refresh(db_vehicle)
+    await invalidate_lists(vehicles_cache)
+    await invalidation_bus.invalidate_shared("search")
+    await index_vehicle(db_vehicle)
     return db_vehicle
 
 
 @router.get("/", response_model=list[VehicleRead])
-async def list_vehicles(session: AsyncSession = Depends(get_session)):
+async def list_vehicles(
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    fields: str | None = None,
+    include_total: bool = False,
+    session: AsyncSession = Depends(get_read_session),
+):
     """
     US-009: View all vehicles
+    Keyset paginated by make and model when `limit` is given; the next page's cursor
+    is returned in the X-Next-Cursor header.
     """
-    result = await session.exec(select(Vehicle))
-    vehicles = result.all()
-    return vehicles
+    return await paginated_list(
+        session,
+        Vehicle,
+        ("make", "model", "id"),
+        VehicleRead,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+        include_total=include_total,
+        cache=vehicles_cache,
+    )
 
 
 @router.get("/{vehicle_id}", response_model=VehicleRead)
-async def get_vehicle(vehicle_id: UUID, session: AsyncSession = Depends(get_session)):
+async def get_vehicle(
+    vehicle_id: UUID,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+):
     """
     US-010: View a single vehicle
+    Returns 304 Not Modified when If-None-Match carries the current ETag.
     """
-    vehicle = await session.get(Vehicle, vehicle_id)
+
+    async def load():
+        vehicle = await session.get(Vehicle, vehicle_id)
+        return VehicleRead.model_validate(vehicle) if vehicle else None
+
+    vehicle = await vehicles_cache.get_or_load(f"item:{vehicle_id}", load)
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
-    return vehicle
+    etag = entity_etag("vehicle", vehicle_id, vehicle.version)
+    return conditional(request, response, etag) or vehicle
 
 
 @router.patch("/{vehicle_id}", response_model=VehicleRead)
@@ -70,7 +109,10 @@ async def update_vehicle(
 
     session.add(db_vehicle)
     await session.commit()
-    await session.refresh(db_vehicle)
+    await invalidate_lists(vehicles_cache, f"item:{vehicle_id}")
+    await fitment_cache.invalidate(str(vehicle_id))
+    await invalidation_bus.invalidate_shared("search")
+    await index_vehicle(db_vehicle)
     return db_vehicle
 
 
@@ -87,18 +129,39 @@ async def delete_vehicle(
 
     await session.delete(db_vehicle)
     await session.commit()
+    await invalidate_lists(vehicles_cache, f"item:{vehicle_id}")
+    await fitment_cache.invalidate(str(vehicle_id))
+    await invalidation_bus.invalidate_shared("search")
+    await unindex("vehicle", vehicle_id)
     return None
 
 
 @router.get("/{vehicle_id}/parts", response_model=list[PartRead])
-async def list_parts_for_vehicle(vehicle_id: UUID, session: AsyncSession = Depends(get_session)):
+async def list_parts_for_vehicle(
+    vehicle_id: UUID,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+):
     """
     US-013: View all parts linked to a vehicle
+    Returns 304 Not Modified when If-None-Match carries the current ETag.
     """
-    statement = select(Vehicle).where(Vehicle.id == vehicle_id).options(selectinload(Vehicle.parts))
-    result = await session.exec(statement)
-    vehicle = result.first()
 
-    if not vehicle:
+    async def load():
+        # Straight off the (vehicle_id, part_id) link index, without loading the vehicle
+        statement = (
+            select(Part)
+            .join(PartVehicleLink, col(PartVehicleLink.part_id) == Part.id)
+            .where(PartVehicleLink.vehicle_id == vehicle_id)
+        )
+        parts = (await session.exec(statement)).all()
+        if not parts and not await session.get(Vehicle, vehicle_id):
+            return None
+        return [PartRead.model_validate(part).model_dump(mode="json") for part in parts]
+
+    parts = await fitment_cache.get_or_load(str(vehicle_id), load)
+    if parts is None:
         raise HTTPException(status_code=404, detail="Vehicle not found")
-    return vehicle.parts
+    etag = collection_etag("vehicle-parts", vehicle_id, ((p["id"], p["version"]) for p in parts))
+    return conditional(request, response, etag) or parts
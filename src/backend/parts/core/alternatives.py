@@ -0,0 +1,124 @@
+from collections.abc import Iterable
+from uuid import UUID
+
+from parts.db.models import Part, PartAlternative
+from parts.db.upsert import insert_or_ignore
+from sqlmodel import col, delete, func, literal, or_, select, union_all
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Longest supersession chain followed when resolving alternatives
+MAX_ALTERNATIVE_DEPTH = 10
+
+_edges = PartAlternative.__table__.c
+
+
+async def unknown_parts(session: AsyncSession, part_ids: Iterable[UUID | str]) -> set[UUID]:
+    """
+    The ids in `part_ids` that are not parts, in one query. Writers check alternatives
+    with it first, since an edge is only stored for a part that exists.
+    """
+    ids = {UUID(str(id)) for id in part_ids}
+    if not ids:
+        return set()
+    return ids - set((await session.exec(select(Part.id).where(col(Part.id).in_(ids)))).all())
+
+
+async def add_alternatives(session: AsyncSession, edges: Iterable[tuple[UUID, UUID]]) -> int:
+    """
+    Adds (part_id, alternative_id) edges, skipping self references, alternatives that
+    do not exist and edges already present. Returns the number added. The caller commits.
+    """
+    edges = [(part_id, other) for part_id, other in dict.fromkeys(edges) if part_id != other]
+    if not edges:
+        return 0
+    targets = {other for _, other in edges}
+    existing = set((await session.exec(select(Part.id).where(col(Part.id).in_(targets)))).all())
+    values = [
+        {"part_id": part_id, "alternative_id": other}
+        for part_id, other in edges
+        if other in existing
+    ]
+    if not values:
+        return 0
+    result = await session.exec(insert_or_ignore(session, PartAlternative.__table__).values(values))
+    return result.rowcount
+
+
+async def set_alternatives(session: AsyncSession, part_id: UUID, alternative_ids: list[UUID]):
+    """
+    Replaces the alternatives of `part_id` with `alternative_ids`. The caller commits.
+    """
+    await session.exec(delete(PartAlternative).where(col(PartAlternative.part_id) == part_id))
+    await add_alternatives(session, ((part_id, UUID(str(other))) for other in alternative_ids))
+
+
+async def remove_from_alternatives(session: AsyncSession, part_id: UUID) -> list[UUID]:
+    """
+    Drops every edge to or from `part_id`, ahead of deleting it, and removes it from the
+    alternatives of the parts listing it. Returns the ids of those parts. The caller
+    commits.
+    """
+    statement = (
+        select(Part)
+        .join(PartAlternative, col(PartAlternative.part_id) == Part.id)
+        .where(col(PartAlternative.alternative_id) == part_id)
+    )
+    listing = list((await session.exec(statement)).all())
+    for part in listing:
+        part.alternatives = [other for other in part.alternatives if UUID(str(other)) != part_id]
+        session.add(part)
+    await session.exec(
+        delete(PartAlternative).where(
+            or_(
+                col(PartAlternative.part_id) == part_id,
+                col(PartAlternative.alternative_id) == part_id,
+            )
+        )
+    )
+    return [part.id for part in listing]
+
+
+def _closure(part_id: UUID, bidirectional: bool, max_depth: int):
+    """
+    Recursive CTE walking the alternatives graph from `part_id`, returning every
+    reachable part with its shortest distance. UNION drops repeated (part, depth) rows
+    and the depth limit ends cycles.
+    """
+    edges = select(_edges.part_id.label("source"), _edges.alternative_id.label("target"))
+    if bidirectional:
+        reverse = select(_edges.alternative_id.label("source"), _edges.part_id.label("target"))
+        edges = union_all(edges, reverse)
+    edges = edges.subquery("edges")
+
+    reached = (
+        select(edges.c.target.label("part_id"), literal(1).label("depth"))
+        .where(edges.c.source == part_id)
+        .cte("reached", recursive=True)
+    )
+    reached = reached.union(
+        select(edges.c.target, reached.c.depth + 1)
+        .join(reached, edges.c.source == reached.c.part_id)
+        .where(reached.c.depth < max_depth)
+    )
+    depth = func.min(reached.c.depth).label("depth")
+    return (
+        select(reached.c.part_id, depth)
+        .where(reached.c.part_id != part_id)
+        .group_by(reached.c.part_id)
+        .order_by(depth, reached.c.part_id)
+    )
+
+
+async def resolve_alternatives(
+    session: AsyncSession,
+    part_id: UUID,
+    bidirectional: bool = False,
+    max_depth: int = MAX_ALTERNATIVE_DEPTH,
+) -> list[tuple[UUID, int]]:
+    """
+    Every part that can substitute for `part_id` through a chain of alternatives, as
+    (part_id, hops), nearest first, in one query.
+    With `bidirectional`, parts listing `part_id` (or its alternatives) count too.
+    """
+    statement = _closure(part_id, bidirectional, max_depth)
+    return list((await session.exec(statement)).all())
@@ -0,0 +1,77 @@
+from collections import defaultdict
+from uuid import UUID
+
+from parts.db.models import Part, PartVehicleLink, StockLevel, Vehicle
+from parts.schemas.part import PartRead
+from parts.schemas.stock import StockLevelRead
+from parts.schemas.vehicle import VehicleRead
+from sqlmodel import col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Each helper below resolves any number of parts in a single query
+
+
+async def parts_by_id(session: AsyncSession, part_ids: list[UUID], where=()) -> list[dict]:
+    """
+    Parts for `part_ids` in the order given; unknown ids, and parts not matching the
+    extra `where` clauses, are skipped.
+    """
+    statement = select(Part).where(col(Part.id).in_(part_ids), *where)
+    found = {part.id: part for part in (await session.exec(statement)).all()}
+    return [
+        PartRead.model_validate(found[part_id]).model_dump(mode="json")
+        for part_id in part_ids
+        if part_id in found
+    ]
+
+
+async def vehicles_by_part(session: AsyncSession, part_ids: list[UUID]) -> dict[UUID, list]:
+    statement = (
+        select(PartVehicleLink.part_id, Vehicle)
+        .join(Vehicle, col(Vehicle.id) == PartVehicleLink.vehicle_id)
+        .where(col(PartVehicleLink.part_id).in_(part_ids))
+    )
+    grouped = defaultdict(list)
+    for part_id, vehicle in (await session.exec(statement)).all():
+        grouped[part_id].append(VehicleRead.model_validate(vehicle).model_dump(mode="json"))
+    return grouped
+
+
+async def stock_by_part(session: AsyncSession, part_ids: list[UUID]) -> dict[UUID, list]:
+    statement = select(StockLevel).where(col(StockLevel.part_id).in_(part_ids))
+    grouped = defaultdict(list)
+    for stock in (await session.exec(statement)).all():
+        grouped[stock.part_id].append(StockLevelRead.model_validate(stock).model_dump(mode="json"))
+    return grouped
+
+
+def in_stock(location_id: UUID | None = None):
+    """
+    WHERE clause keeping parts with available stock, anywhere or at `location_id`.
+    """
+    stocked = select(StockLevel.part_id).where(StockLevel.quantity - StockLevel.reserved > 0)
+    if location_id is not None:
+        stocked = stocked.where(StockLevel.location_id == location_id)
+    return col(Part.id).in_(stocked)
+
+
+async def stock_totals_by_part(
+    session: AsyncSession, part_ids: list[UUID], location_id: UUID | None = None
+) -> dict[UUID, dict]:
+    """
+    Quantity, reserved and available stock per part, summed over all locations or
+    for `location_id` only. Parts without stock are absent.
+    """
+    quantity = func.sum(StockLevel.quantity)
+    reserved = func.sum(StockLevel.reserved)
+    statement = (
+        select(StockLevel.part_id, quantity, reserved)
+        .where(col(StockLevel.part_id).in_(part_ids))
+        .group_by(StockLevel.part_id)
+    )
+    if location_id is not None:
+        statement = statement.where(StockLevel.location_id == location_id)
+    return {
+        part_id: {"quantity": quantity, "reserved": reserved, "available": quantity - reserved}
+        for part_id, quantity, reserved in (await session.exec(statement)).all()
+    }
@@ -0,0 +1,298 @@
+import csv
+import io
+import json
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from itertools import islice
+from typing import Any
+from uuid import UUID, uuid4
+
+from parts.core.alternatives import add_alternatives, unknown_parts
+from parts.core.export import DataFormat
+from parts.core.logic import internal_part_code_prefix
+from parts.db.models import Part, PartVehicleLink, Vehicle, part_number_keys
+from parts.db.sequences import allocate_internal_part_codes
+from parts.db.upsert import insert_or_ignore
+from parts.schemas.bulk_import import ImportResult, ImportRowError, PartVehicleLinkImport
+from parts.schemas.part import PartCreate
+from parts.schemas.vehicle import VehicleCreate
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import col, insert, or_, select, tuple_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+IMPORT_CHUNK_SIZE = 1000
+
+# CSV cells holding lists are written as JSON by the export, so the two round-trip
+_JSON_CSV_FIELDS = {"alternatives"}
+
+Row = tuple[int, dict[str, Any] | str]
+
+
+def parse_rows(data: str, fmt: DataFormat) -> Iterator[Row]:
+    """
+    Yields (line, record) pairs from CSV or NDJSON text. Empty CSV cells are dropped so
+    schema defaults apply. Undecodable lines yield an error message instead of a record.
+    """
+    if fmt == DataFormat.ndjson:
+        for line, text in enumerate(data.splitlines(), start=1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except json.JSONDecodeError as e:
+                yield line, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield line, "Expected a JSON object"
+                continue
+            yield line, record
+        return
+
+    reader = csv.DictReader(io.StringIO(data))
+    for record in reader:
+        cleaned = {}
+        for key, value in record.items():
+            if key is None or value is None or value == "":
+                continue
+            if key in _JSON_CSV_FIELDS:
+                try:
+                    value = json.loads(value)
+                except json.JSONDecodeError:
+                    value = [item.strip() for item in value.split(";") if item.strip()]
+            cleaned[key] = value
+        yield reader.line_num, cleaned
+
+
+def _chunks(rows: Iterable[Row], size: int) -> Iterator[list[Row]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _validate(schema: type[BaseModel], chunk: list[Row], result: ImportResult):
+    """
+    Validates a chunk against `schema`, recording failures on `result` and
+    returning the valid (line, model) pairs.
+    """
+    valid = []
+    for line, record in chunk:
+        result.received += 1
+        if isinstance(record, str):
+            result.errors.append(ImportRowError(line=line, errors=[record]))
+            continue
+        try:
+            valid.append((line, schema.model_validate(record)))
+        except ValidationError as e:
+            messages = [
+                f"{'.'.join(str(loc) for loc in error['loc']) or 'row'}: {error['msg']}"
+                for error in e.errors()
+            ]
+            result.errors.append(ImportRowError(line=line, errors=messages))
+    return valid
+
+
+def _database_error(error: DBAPIError) -> str:
+    return f"database: {str(error.orig).splitlines()[0]}"
+
+
+async def _write(
+    session: AsyncSession,
+    valid: list[tuple[int, Any]],
+    write: Callable[[list[tuple[int, Any]]], Awaitable[int]],
+    result: ImportResult,
+):
+    """
+    Writes a chunk's valid (line, item) pairs with `write`, which returns the number of
+    rows created, and commits. If the database rejects the chunk, it is rolled back and
+    retried row by row, so a bad row (a constraint violation, a value too long for its
+    column) is reported on `result` instead of failing the rest of the import.
+    """
+    try:
+        created = await write(valid)
+        await session.commit()
+        result.created += created
+        return
+    except DBAPIError as e:
+        await session.rollback()
+        if len(valid) == 1:
+            result.errors.append(ImportRowError(line=valid[0][0], errors=[_database_error(e)]))
+            return
+    for item in valid:
+        try:
+            created = await write([item])
+            await session.commit()
+            result.created += created
+        except DBAPIError as e:
+            await session.rollback()
+            result.errors.append(ImportRowError(line=item[0], errors=[_database_error(e)]))
+
+
+async def import_parts(
+    session: AsyncSession, rows: Iterable[Row], chunk_size: int = IMPORT_CHUNK_SIZE
+) -> ImportResult:
+    """
+    Validates parts with PartCreate and writes each chunk as one multi-row INSERT
+    in its own transaction, reserving a block of internal part codes per prefix.
+    Imported parts get new ids, so alternatives can only name existing parts; rows
+    naming others are reported.
+    """
+    result = ImportResult(received=0, created=0)
+    for chunk in _chunks(rows, chunk_size):
+        valid = await _known_alternatives(session, _validate(PartCreate, chunk, result), result)
+        if not valid:
+            continue
+        await _write(session, valid, lambda items: _insert_parts(session, items), result)
+    return result
+
+
+async def _known_alternatives(
+    session: AsyncSession, valid: list[tuple[int, PartCreate]], result: ImportResult
+) -> list[tuple[int, PartCreate]]:
+    unknown = await unknown_parts(
+        session, (other for _, part_in in valid for other in part_in.alternatives)
+    )
+    known = []
+    for line, part_in in valid:
+        missing = [str(other) for other in part_in.alternatives if other in unknown]
+        if missing:
+            message = f"alternatives: unknown part {', '.join(missing)}"
+            result.errors.append(ImportRowError(line=line, errors=[message]))
+        else:
+            known.append((line, part_in))
+    return known
+
+
+async def _insert_parts(session: AsyncSession, valid: list[tuple[int, PartCreate]]) -> int:
+    prefixes = [
+        internal_part_code_prefix(
+            manufacturer=part_in.last_known_supplier or "UNK",
+            system=part_in.system,
+            part_type=part_in.part_type,
+        )
+        for _, part_in in valid
+    ]
+    codes = await allocate_internal_part_codes(session, prefixes)
+    values = [
+        {**part_in.model_dump(mode="json"), "id": uuid4(), "internal_part_code": code}
+        for (_, part_in), code in zip(valid, codes, strict=True)
+    ]
+    for row in values:
+        row.update(part_number_keys(row))
+    await session.exec(insert(Part.__table__), params=values)
+    await add_alternatives(
+        session, ((row["id"], UUID(other)) for row in values for other in row["alternatives"])
+    )
+    return len(values)
+
+
+async def import_vehicles(
+    session: AsyncSession, rows: Iterable[Row], chunk_size: int = IMPORT_CHUNK_SIZE
+) -> ImportResult:
+    """
+    Validates vehicles with VehicleCreate and writes each chunk as one multi-row INSERT.
+    """
+    result = ImportResult(received=0, created=0)
+    for chunk in _chunks(rows, chunk_size):
+        valid = _validate(VehicleCreate, chunk, result)
+        if not valid:
+            continue
+        await _write(session, valid, lambda items: _insert_vehicles(session, items), result)
+    return result
+
+
+async def _insert_vehicles(session: AsyncSession, valid: list[tuple[int, VehicleCreate]]) -> int:
+    values = [{**vehicle_in.model_dump(), "id": uuid4()} for _, vehicle_in in valid]
+    await session.exec(insert(Vehicle.__table__), params=values)
+    return len(values)
+
+
+async def _resolve_parts(session: AsyncSession, links: list[PartVehicleLinkImport]):
+    codes = {link.internal_part_code for link in links if link.internal_part_code}
+    numbers = {
+        link.manufacturer_part_number
+        for link in links
+        if not link.internal_part_code and link.manufacturer_part_number
+    }
+    statement = select(Part.id, Part.internal_part_code, Part.manufacturer_part_number).where(
+        or_(
+            col(Part.internal_part_code).in_(codes),
+            col(Part.manufacturer_part_number).in_(numbers),
+        )
+    )
+    by_code, by_number = {}, {}
+    for part_id, code, number in (await session.exec(statement)).all():
+        if code in codes:
+            by_code[code] = part_id
+        if number in numbers:
+            by_number.setdefault(number, []).append(part_id)
+    return by_code, by_number
+
+
+async def _resolve_vehicles(session: AsyncSession, links: list[PartVehicleLinkImport]):
+    keys = {(link.make, link.model, link.from_year) for link in links}
+    statement = select(Vehicle.id, Vehicle.make, Vehicle.model, Vehicle.from_year, Vehicle.variant)
+    statement = statement.where(
+        tuple_(Vehicle.make, Vehicle.model, Vehicle.from_year).in_(list(keys))
+    )
+    by_key = {}
+    for vehicle_id, make, model, from_year, variant in (await session.exec(statement)).all():
+        by_key.setdefault((make, model, from_year), []).append((vehicle_id, variant))
+    return by_key
+
+
+async def import_links(
+    session: AsyncSession, rows: Iterable[Row], chunk_size: int = IMPORT_CHUNK_SIZE
+) -> ImportResult:
+    """
+    Resolves part-vehicle links by natural keys with two lookups per chunk and
+    inserts them with insert-or-ignore, so re-importing a file is idempotent.
+    `created` counts only links that did not already exist.
+    """
+    result = ImportResult(received=0, created=0)
+    for chunk in _chunks(rows, chunk_size):
+        valid = _validate(PartVehicleLinkImport, chunk, result)
+        if not valid:
+            continue
+        links = [link for _, link in valid]
+        parts_by_code, parts_by_number = await _resolve_parts(session, links)
+        vehicles_by_key = await _resolve_vehicles(session, links)
+
+        values: dict[tuple[UUID, UUID], tuple[int, dict]] = {}
+        for line, link in valid:
+            if link.internal_part_code:
+                code_match = parts_by_code.get(link.internal_part_code)
+                part_ids = [code_match] if code_match else []
+            else:
+                part_ids = parts_by_number.get(link.manufacturer_part_number, [])
+            vehicle_ids = [
+                vehicle_id
+                for vehicle_id, variant in vehicles_by_key.get(
+                    (link.make, link.model, link.from_year), []
+                )
+                if link.variant is None or variant == link.variant
+            ]
+
+            errors = []
+            for label, matches in (("part", part_ids), ("vehicle", vehicle_ids)):
+                if not matches:
+                    errors.append(f"{label}: no match")
+                elif len(matches) > 1:
+                    errors.append(f"{label}: {len(matches)} matches, key is ambiguous")
+            if errors:
+                result.errors.append(ImportRowError(line=line, errors=errors))
+                continue
+            values[(part_ids[0], vehicle_ids[0])] = (
+                line,
+                {"part_id": part_ids[0], "vehicle_id": vehicle_ids[0]},
+            )
+
+        if values:
+            links = list(values.values())
+            await _write(session, links, lambda items: _insert_links(session, items), result)
+    return result
+
+
+async def _insert_links(session: AsyncSession, links: list[tuple[int, dict]]) -> int:
+    statement = insert_or_ignore(session, PartVehicleLink.__table__)
+    outcome = await session.exec(statement.values([value for _, value in links]))
+    return outcome.rowcount
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any
+
+from core.shared_cache import invalidation_bus
+from parts.db.models import Part, Vehicle
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+CATALOGUE_TOPIC = "catalogue"
+# Shared cache key counting the changes published on CATALOGUE_TOPIC
+GENERATION_KEY = "catalogue:generation"
+# How often a worker compares its indexes with the shared generation
+CATALOGUE_CHECK_SECONDS = float(os.getenv("CATALOGUE_CHECK_SECONDS") or "5")
+
+# Text fields held by the in-memory catalogue indexes, per kind of entity
+PART_FIELDS = (
+    "internal_part_code",
+    "oe_part_number",
+    "manufacturer_part_number",
+    "description",
+    "part_type",
+    "system",
+    "notes",
+    "oe_description",
+)
+VEHICLE_FIELDS = (
+    "make",
+    "model",
+    "variant",
+    "body_style",
+    "trim_level",
+    "from_year",
+    "to_year",
+)
+_MODELS = {"part": (Part, PART_FIELDS), "vehicle": (Vehicle, VEHICLE_FIELDS)}
+
+Fields = dict[str, Any]
+
+
+class CatalogueIndex(ABC):
+    """
+    Base of the in-process part and vehicle indexes. Each worker loads its own copy from
+    the database on first use and then follows the changes published on the invalidation
+    bus by the write handlers (see index_part, index_vehicle, unindex and reindex), once
+    `apply` is registered for CATALOGUE_TOPIC.
+
+    Pub/sub does not deliver messages published while a subscriber is disconnected, so
+    every change also increments a generation in the shared cache. An index that has
+    not caught up with a generation one check period after seeing it reloads.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.loaded = False
+        # Generation of the last change applied, or of the shared one when loaded
+        self.generation = 0
+        self._clock = clock
+        self._checked_at: float | None = None
+        # Shared generation seen ahead of this index at the last check
+        self._lagging: int | None = None
+        self._lock = asyncio.Lock()
+        # Changes that arrive while a load is reading the database, replayed after it
+        self._pending: list[dict[str, Any]] | None = None
+
+    @abstractmethod
+    def upsert(self, kind: str, id: str, fields: Fields): ...
+
+    @abstractmethod
+    def remove(self, kind: str, id: str): ...
+
+    @abstractmethod
+    def build(self, documents: list[tuple[str, str, Fields]]):
+        """
+        Replaces the whole index with `documents` given as (kind, id, fields).
+        """
+
+    def clear(self):
+        self.build([])
+        self.loaded = False
+
+    async def load(self, session: AsyncSession):
+        """
+        Builds the index from the database with one column-only query per kind.
+        """
+        async with self._lock:
+            if self.loaded:
+                return
+            self._pending = []
+            try:
+                # Read first: changes counted by it were committed before the rows are
+                generation = await _shared_generation()
+                documents = []
+                for kind, (model, fields) in _MODELS.items():
+                    columns = [model.id, *(getattr(model, name) for name in fields)]
+                    for row in (await session.exec(select(*columns))).all():
+                        values = dict(zip(fields, row[1:], strict=True))
+                        documents.append((kind, str(row.id), values))
+                self.build(documents)
+                self.loaded = True
+                self.generation, self._lagging = generation, None
+                self._checked_at = self._clock()
+                for message in self._pending:
+                    self.apply(message)
+            finally:
+                self._pending = None
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if self.loaded and await self._missed_changes():
+            logger.warning("Catalogue index missed published changes, reloading")
+            self.clear()
+        if not self.loaded:
+            await self.load(session)
+
+    async def _missed_changes(self) -> bool:
+        now = self._clock()
+        if self._checked_at is not None and now - self._checked_at < CATALOGUE_CHECK_SECONDS:
+            return False
+        self._checked_at = now
+        shared = await _shared_generation()
+        # Messages still in flight at the previous check have arrived by now
+        missed = self._lagging is not None and self.generation < self._lagging
+        self._lagging = shared if shared > self.generation else None
+        return missed
+
+    def apply(self, message: dict[str, Any]):
+        """
+        Invalidation bus handler for the changes published below.
+        """
+        if self._pending is not None:
+            self._pending.append(message)
+        elif message["op"] == "reload":
+            self.clear()
+        elif not self.loaded:
+            return
+        else:
+            if message["op"] == "upsert":
+                self.upsert(message["kind"], message["id"], message["fields"])
+            else:
+                self.remove(message["kind"], message["id"])
+            self.generation = max(self.generation, message.get("generation") or 0)
+
+
+async def _shared_generation() -> int:
+    return int(await invalidation_bus.backend.get(GENERATION_KEY) or 0)
+
+
+async def _publish(message: dict[str, Any]):
+    try:
+        message["generation"] = await invalidation_bus.backend.incr(GENERATION_KEY)
+    except Exception as e:
+        # Never fail the write; other workers catch up when the cache is back
+        logger.warning("Catalogue generation update failed: %s", e)
+    await invalidation_bus.publish({"topic": CATALOGUE_TOPIC, **message})
+
+
+async def _publish_upsert(kind: str, entity):
+    fields = {name: getattr(entity, name) for name in _MODELS[kind][1]}
+    await _publish({"op": "upsert", "kind": kind, "id": str(entity.id), "fields": fields})
+
+
+async def index_part(part: Part):
+    await _publish_upsert("part", part)
+
+
+async def index_vehicle(vehicle: Vehicle):
+    await _publish_upsert("vehicle", vehicle)
+
+
+async def unindex(kind: str, id: Any):
+    await _publish({"op": "remove", "kind": kind, "id": str(id)})
+
+
+async def reindex():
+    """
+    Drops the indexes on every worker; each reloads them on next use.
+    Used after bulk changes, where one message per row would cost more than a reload.
+    """
+    await _publish({"op": "reload"})
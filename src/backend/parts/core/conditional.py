@@ -0,0 +1,51 @@
+import hashlib
+from collections.abc import Iterable
+from typing import Any
+
+from fastapi import Request, Response
+
+# Browsers keep the body but revalidate with If-None-Match on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def entity_etag(kind: str, id: Any, version: int) -> str:
+    """
+    Strong ETag for a single versioned row.
+    """
+    return f'"{kind}-{id}-v{version}"'
+
+
+def collection_etag(kind: str, owner_id: Any, rows: Iterable[tuple[Any, int]]) -> str:
+    """
+    Strong ETag for a set of versioned rows given as (id, version) pairs, in any order.
+    Changes whenever a row is added, removed or updated.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for id, version in sorted((str(id), version) for id, version in rows):
+        digest.update(f"{id}:{version};".encode())
+    return f'"{kind}-{owner_id}-{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    If-None-Match evaluation, using weak comparison as RFC 9110 requires.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (candidate.strip().removeprefix("W/") for candidate in header.split(","))
+    return etag in candidates
+
+
+def conditional(request: Request, response: Response, etag: str) -> Response | None:
+    """
+    Returns a 304 response if the client already has `etag`; otherwise adds the
+    validator headers to `response` and returns None so the handler builds the body.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
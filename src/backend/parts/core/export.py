@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+from enum import StrEnum
+
+from parts.core.batch import stock_by_part, vehicles_by_part
+from parts.db.models import Part
+from parts.schemas.part import PartRead
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+EXPORT_BATCH_SIZE = 500
+
+
+class DataFormat(StrEnum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class ExportInclude(StrEnum):
+    vehicles = "vehicles"
+    stock = "stock"
+
+
+MEDIA_TYPES = {DataFormat.ndjson: "application/x-ndjson", DataFormat.csv: "text/csv"}
+
+
+def _csv_cell(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+
+async def export_parts(
+    session: AsyncSession,
+    fmt: DataFormat,
+    include: set[ExportInclude],
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[str]:
+    """
+    Streams the whole parts catalogue as NDJSON lines or CSV rows.
+    Rows are read through a server-side cursor in `batch_size` partitions as plain column
+    tuples (no identity map), and embedded vehicles/stock are fetched once per partition,
+    so memory use is bounded by the batch size rather than the catalogue size.
+    """
+    columns = list(PartRead.model_fields)
+    if ExportInclude.vehicles in include:
+        columns.append("vehicles")
+    if ExportInclude.stock in include:
+        columns.append("stock")
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, lineterminator="\n")
+    if fmt == DataFormat.csv:
+        writer.writeheader()
+
+    statement = select(Part.__table__).execution_options(yield_per=batch_size)
+    result = await session.stream(statement)
+    async for partition in result.partitions():
+        records = [
+            PartRead.model_validate(row._mapping).model_dump(mode="json") for row in partition
+        ]
+        part_ids = [row.id for row in partition]
+
+        if ExportInclude.vehicles in include:
+            vehicles = await vehicles_by_part(session, part_ids)
+            for part_id, record in zip(part_ids, records, strict=True):
+                record["vehicles"] = vehicles.get(part_id, [])
+        if ExportInclude.stock in include:
+            stock = await stock_by_part(session, part_ids)
+            for part_id, record in zip(part_ids, records, strict=True):
+                record["stock"] = stock.get(part_id, [])
+
+        if fmt == DataFormat.ndjson:
+            for record in records:
+                buffer.write(json.dumps(record, separators=(",", ":")))
+                buffer.write("\n")
+        else:
+            writer.writerows({k: _csv_cell(v) for k, v in record.items()} for record in records)
+
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,84 @@
+from uuid import UUID
+
+from parts.db.models import Part, PartVehicleLink, Vehicle
+from parts.db.upsert import insert_or_ignore
+from sqlmodel import col, delete, or_, select, tuple_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+def fitment_filters(
+    *,
+    make: str | None = None,
+    model: str | None = None,
+    year: int | None = None,
+    power_type: str | None = None,
+    drive_type: str | None = None,
+    part_type: str | None = None,
+    system: str | None = None,
+) -> tuple:
+    """
+    WHERE clauses selecting the parts that fit at least one vehicle matching the vehicle
+    filters. `year` must fall inside the vehicle's from_year..to_year production range
+    (an open to_year means still in production). Vehicle filters are resolved through a
+    semi-join on PartVehicleLink, so a part fitting several matching vehicles is returned
+    once.
+    """
+    vehicle_filters = []
+    if make is not None:
+        vehicle_filters.append(Vehicle.make == make)
+    if model is not None:
+        vehicle_filters.append(Vehicle.model == model)
+    if year is not None:
+        vehicle_filters.append(Vehicle.from_year <= year)
+        vehicle_filters.append(or_(col(Vehicle.to_year).is_(None), Vehicle.to_year >= year))
+    if power_type is not None:
+        vehicle_filters.append(Vehicle.power_type == power_type)
+    if drive_type is not None:
+        vehicle_filters.append(Vehicle.drive_type == drive_type)
+
+    fitting = select(PartVehicleLink.part_id)
+    if vehicle_filters:
+        fitting = fitting.join(Vehicle, col(Vehicle.id) == PartVehicleLink.vehicle_id).where(
+            *vehicle_filters
+        )
+    filters = [col(Part.id).in_(fitting)]
+    if part_type is not None:
+        filters.append(Part.part_type == part_type)
+    if system is not None:
+        filters.append(Part.system == system)
+    return tuple(filters)
+
+
+async def missing_link_ends(
+    session: AsyncSession, pairs: list[tuple[UUID, UUID]]
+) -> tuple[set[UUID], set[UUID]]:
+    """
+    Part and vehicle ids referenced by `pairs` that do not exist, in two queries.
+    """
+    part_ids = {part_id for part_id, _ in pairs}
+    vehicle_ids = {vehicle_id for _, vehicle_id in pairs}
+    found_parts = (await session.exec(select(Part.id).where(col(Part.id).in_(part_ids)))).all()
+    found_vehicles = (
+        await session.exec(select(Vehicle.id).where(col(Vehicle.id).in_(vehicle_ids)))
+    ).all()
+    return part_ids - set(found_parts), vehicle_ids - set(found_vehicles)
+
+
+async def link_pairs(session: AsyncSession, pairs: list[tuple[UUID, UUID]]) -> int:
+    """
+    Inserts the (part_id, vehicle_id) links in one statement, skipping existing ones.
+    Returns the number of links created. The caller commits.
+    """
+    values = [{"part_id": part_id, "vehicle_id": vehicle_id} for part_id, vehicle_id in pairs]
+    result = await session.exec(insert_or_ignore(session, PartVehicleLink.__table__).values(values))
+    return result.rowcount
+
+
+async def unlink_pairs(session: AsyncSession, pairs: list[tuple[UUID, UUID]]) -> int:
+    """
+    Deletes the (part_id, vehicle_id) links by primary key in one statement.
+    Returns the number of links removed. The caller commits.
+    """
+    key = tuple_(PartVehicleLink.part_id, PartVehicleLink.vehicle_id)
+    result = await session.exec(delete(PartVehicleLink).where(key.in_(pairs)))
+    return result.rowcount
@@ -0,0 +1,149 @@
+import os
+import re
+from collections import Counter
+from uuid import UUID
+
+from core.shared_cache import invalidation_bus
+from parts.core.catalogue_index import CATALOGUE_TOPIC, CatalogueIndex, Fields
+from parts.core.logic import normalise
+from parts.db.models import PART_NUMBER_KEYS, Part, Vehicle
+from parts.db.search_index import PART_FUZZY_WEIGHTS, VEHICLE_FUZZY_WEIGHTS, fuzzy_search_postgres
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Share of the query's trigrams a column must contain to match
+FUZZY_MIN_SIMILARITY = float(os.getenv("FUZZY_MIN_SIMILARITY", "0.5"))
+# Ranked matches considered when extra filters (e.g. in stock) apply to the in-process index
+FUZZY_MAX_CANDIDATES = 1000
+
+_WEIGHTS = {"part": PART_FUZZY_WEIGHTS, "vehicle": VEHICLE_FUZZY_WEIGHTS}
+_MODELS = {"part": Part, "vehicle": Vehicle}
+_WORD_RE = re.compile(r"[0-9a-z]+")
+
+
+def trigrams(text: str) -> frozenset[str]:
+    """
+    pg_trgm style trigrams: each word, lower cased and padded with two spaces before and
+    one after, split into every three character window.
+    """
+    grams = set()
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def _code_trigrams(text: str) -> frozenset[str]:
+    # Part numbers are one word once separators are dropped, so digit swaps cost little
+    return trigrams(normalise(text))
+
+
+class TrigramIndex(CatalogueIndex):
+    """
+    In-process trigram index of the weighted part and vehicle columns, for databases
+    without pg_trgm. A query only scores the rows sharing trigrams with it, found
+    through the inverted index.
+    """
+
+    def __init__(self):
+        # (kind, id) -> [(weight, is part number, trigrams)] per non-empty column
+        self.documents: dict[tuple[str, str], list[tuple[float, bool, frozenset[str]]]] = {}
+        # trigram -> rows with a column containing it
+        self.postings: dict[str, set[tuple[str, str]]] = {}
+        super().__init__()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def upsert(self, kind: str, id: str, fields: Fields):
+        self.remove(kind, id)
+        columns = []
+        for name, weight in _WEIGHTS[kind].items():
+            value = fields.get(name)
+            if not value:
+                continue
+            is_code = name in PART_NUMBER_KEYS
+            grams = _code_trigrams(value) if is_code else trigrams(value)
+            columns.append((weight, is_code, grams))
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add((kind, id))
+        self.documents[kind, id] = columns
+
+    def remove(self, kind: str, id: str):
+        columns = self.documents.pop((kind, id), None)
+        for _, _, grams in columns or ():
+            for gram in grams:
+                rows = self.postings.get(gram)
+                if rows is not None:
+                    rows.discard((kind, id))
+                    if not rows:
+                        del self.postings[gram]
+
+    def build(self, documents: list[tuple[str, str, Fields]]):
+        self.documents, self.postings = {}, {}
+        for kind, id, fields in documents:
+            self.upsert(kind, id, fields)
+
+    def search(
+        self, kind: str, q: str, min_similarity: float = FUZZY_MIN_SIMILARITY
+    ) -> list[tuple[str, float]]:
+        """
+        (id, score) of the rows of `kind` matching `q`, best first. A column's similarity
+        is the share of the query's trigrams it contains; a row scores its best column's
+        similarity times the column weight.
+        """
+        words, code = trigrams(q), _code_trigrams(q)
+        if not words:
+            return []
+        hits = Counter()
+        for gram in words | code:
+            hits.update(row for row in self.postings.get(gram, ()) if row[0] == kind)
+        # A row sharing too few trigrams with the query cannot have a matching column
+        needed = min_similarity * min(len(words), len(code))
+
+        scored = []
+        for row, count in hits.items():
+            if count < needed:
+                continue
+            best = 0.0
+            for weight, is_code, grams in self.documents[row]:
+                query = code if is_code else words
+                similarity = len(query & grams) / len(query)
+                if similarity >= min_similarity:
+                    best = max(best, weight * similarity)
+            if best:
+                scored.append((row[1], best))
+        scored.sort(key=lambda match: (-match[1], match[0]))
+        return scored
+
+
+fuzzy_index = TrigramIndex()
+invalidation_bus.on(CATALOGUE_TOPIC, fuzzy_index.apply)
+
+
+async def fuzzy_search(
+    session: AsyncSession, kind: str, q: str, limit: int, offset: int = 0, where: tuple = ()
+) -> list[tuple]:
+    """
+    Parts or vehicles similar to `q` despite typos, as (row, score) best first.
+    Postgres ranks with pg_trgm in the database; other databases use the in-process
+    trigram index and then read the page of rows by id.
+    """
+    if session.bind.dialect.name == "postgresql":
+        return await fuzzy_search_postgres(session, kind, q, limit, offset, where)
+
+    await fuzzy_index.ensure_loaded(session)
+    ranked = fuzzy_index.search(kind, q)
+    model = _MODELS[kind]
+    if where:
+        candidates = [UUID(id) for id, _ in ranked[:FUZZY_MAX_CANDIDATES]]
+        statement = select(model.id).where(col(model.id).in_(candidates), *where)
+        kept = set((await session.exec(statement)).all())
+        ranked = [(id, score) for id, score in ranked if UUID(id) in kept]
+    page = ranked[offset : offset + limit]
+    if not page:
+        return []
+    ids = [UUID(id) for id, _ in page]
+    rows = (await session.exec(select(model).where(col(model.id).in_(ids)))).all()
+    found = {row.id: row for row in rows}
+    return [(found[id], score) for id, (_, score) in zip(ids, page, strict=True) if id in found]
@@ -1,20 +1,46 @@
 import re
 
+_NOT_ALNUM = re.compile(r"[^0-9A-Z]+")
 
-def generate_internal_part_code(
-    manufacturer: str, system: str, part_type: str, sequence: int
-) -> str:
+
+def normalise(text: str) -> str:
     """
-    Generates an internal part code using manufacturer, system, part type, and a sequential number.
-    Format: MFG-SYS-TYPE-SEQ
-    All components are normalised to upper case and non-alphanumeric characters are removed.
+    Upper case with every non-alphanumeric character removed.
     """
+    return _NOT_ALNUM.sub("", text.upper())
 
-    def normalise(text: str) -> str:
-        return re.sub(r"[^A-Z0-0]", "", text.upper())
 
+def normalise_part_number(number: str | None) -> str | None:
+    """
+    Lookup key of a part number, so "1K0-615-301-AA", "1k0 615 301 aa" and
+    "1K0615301AA" are the same part. None when nothing alphanumeric is left.
+    """
+    return normalise(number or "") or None
+
+
+def internal_part_code_prefix(manufacturer: str, system: str, part_type: str) -> str:
+    """
+    Generates the MFG-SYS-TYPE prefix of an internal part code. Sequence numbers are
+    allocated per prefix.
+    All components are normalised to upper case and non-alphanumeric characters are removed.
+    """
     mfg = normalise(manufacturer)[:3]
     sys = normalise(system)[:3]
     typ = normalise(part_type)[:3]
 
-    return f"{mfg}-{sys}-{typ}-{sequence:05d}"
+    return f"{mfg}-{sys}-{typ}"
+
+
+def format_internal_part_code(prefix: str, sequence: int) -> str:
+    return f"{prefix}-{sequence:05d}"
+
+
+def generate_internal_part_code(
+    manufacturer: str, system: str, part_type: str, sequence: int
+) -> str:
+    """
+    Generates an internal part code using manufacturer, system, part type, and a sequential number.
+    Format: MFG-SYS-TYPE-SEQ
+    """
+    prefix = internal_part_code_prefix(manufacturer, system, part_type)
+    return format_internal_part_code(prefix, sequence)
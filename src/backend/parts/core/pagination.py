@@ -0,0 +1,252 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+from core.cache import TTLCache
+from core.responses import FastJSONResponse
+from core.shared_cache import invalidation_bus
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy.types import TypeDecorator
+from sqlmodel import and_, func, or_, select, tuple_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+@dataclass
+class Page:
+    items: list[Any]
+    next_cursor: str | None = None
+    total: int | None = None
+
+
+def encode_cursor(values: list[Any]) -> str:
+    """
+    Encodes the sort key of the last row on a page as an opaque, URL-safe cursor.
+    """
+    payload = json.dumps(jsonable_encoder(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def _nullable(column: Any) -> bool:
+    return bool(getattr(column.expression, "nullable", False))
+
+
+def _python_type(column: Any) -> type:
+    column_type = column.type
+    try:
+        return column_type.python_type
+    except NotImplementedError:
+        # Type decorators such as sqlmodel's AutoString do not always report one
+        if isinstance(column_type, TypeDecorator):
+            return column_type.impl_instance.python_type
+        raise
+
+
+def _decode_value(column: Any, value: Any) -> Any:
+    if value is None:
+        if not _nullable(column):
+            raise ValueError("Invalid cursor")
+        return None
+    python_type = _python_type(column)
+    if python_type is UUID:
+        try:
+            return UUID(value)
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+    if python_type is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    # JSON booleans are ints to isinstance
+    if not isinstance(value, python_type) or (isinstance(value, bool) and python_type is not bool):
+        raise ValueError("Invalid cursor")
+    return value
+
+
+def decode_cursor(cursor: str, columns: list[Any]) -> list[Any]:
+    """
+    Decodes a cursor produced by `encode_cursor` for the given sort columns.
+    Raises ValueError if the cursor is malformed, was issued for a different ordering,
+    or holds a value of the wrong type (None is only valid for nullable columns).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Invalid cursor")
+
+    return [_decode_value(column, value) for column, value in zip(columns, values, strict=True)]
+
+
+def _after(key_columns: list[Any], values: list[Any]):
+    """
+    Rows after `values` in `key_columns` order, with NULLs sorting last. Keys without
+    nullable columns compare as a row value, which the key's index serves directly.
+    """
+    if not any(_nullable(column) for column in key_columns):
+        if len(key_columns) == 1:
+            return key_columns[0] > values[0]
+        return tuple_(*key_columns) > tuple_(*values)
+    alternatives, equal = [], []
+    for column, value in zip(key_columns, values, strict=True):
+        # NULL is the largest value of a nullable column: nothing sorts after it
+        if value is not None:
+            greater = column > value
+            if _nullable(column):
+                greater = or_(greater, column.is_(None))
+            alternatives.append(and_(*equal, greater))
+        equal.append(column.is_(None) if value is None else column == value)
+    return or_(*alternatives)
+
+
+def parse_fields(fields: str | None, allowed: list[str]) -> list[str] | None:
+    """
+    Parses a comma separated `fields=` projection, preserving the requested order.
+    Raises ValueError on unknown field names.
+    """
+    if not fields:
+        return None
+    requested = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested or None
+
+
+async def paginate(
+    session: AsyncSession,
+    model: Any,
+    order_by: tuple[str, ...],
+    *,
+    limit: int | None = None,
+    cursor: str | None = None,
+    fields: list[str] | None = None,
+    include_total: bool = False,
+    where: tuple = (),
+) -> Page:
+    """
+    Keyset pagination over `model` ordered by the `order_by` columns, which must form a
+    unique key backed by an index. Nullable key columns sort their NULLs last on every
+    database. The cost of a page does not depend on its position.
+    When `fields` is given only those columns are selected and items are plain dicts.
+    `where` filters both the page and the total.
+    """
+    key_columns = [getattr(model, name) for name in order_by]
+
+    if fields is None:
+        statement = select(model)
+    else:
+        selected = list(dict.fromkeys([*fields, *order_by]))
+        statement = select(*(getattr(model, name) for name in selected))
+    if where:
+        statement = statement.where(*where)
+
+    if cursor is not None:
+        statement = statement.where(_after(key_columns, decode_cursor(cursor, key_columns)))
+
+    statement = statement.order_by(
+        *(column.nulls_last() if _nullable(column) else column for column in key_columns)
+    )
+    if limit is not None:
+        # One extra row tells us whether there is a next page without a COUNT
+        statement = statement.limit(limit + 1)
+
+    result = await session.exec(statement)
+    rows = list(result.all()) if fields is None else [row._mapping for row in result.all()]
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            [last[name] if fields is not None else getattr(last, name) for name in order_by]
+        )
+
+    if fields is not None:
+        rows = [{name: row[name] for name in fields} for row in rows]
+
+    total = None
+    if include_total:
+        count = select(func.count()).select_from(model)
+        if where:
+            count = count.where(*where)
+        total = (await session.exec(count)).one()
+
+    return Page(items=rows, next_cursor=next_cursor, total=total)
+
+
+LIST_KEY_PREFIX = "list:"
+
+
+async def invalidate_lists(cache: TTLCache, *keys: str):
+    """
+    Drops `keys` and every cached list page from `cache` on every worker.
+    """
+    await invalidation_bus.invalidate_local(cache.name, *keys, prefixes=(LIST_KEY_PREFIX,))
+
+
+async def paginated_list(
+    session: AsyncSession,
+    model: Any,
+    order_by: tuple[str, ...],
+    read_schema: type[BaseModel],
+    *,
+    limit: int | None,
+    cursor: str | None,
+    fields: str | None,
+    include_total: bool,
+    cache: TTLCache | None = None,
+    where: tuple = (),
+):
+    """
+    Shared implementation of the list endpoints: validates the paging parameters,
+    fetches the page and exposes the next cursor and total as response headers.
+    Pages select exactly the `read_schema` columns (or the requested `fields`) and are
+    returned as plain row dicts, skipping ORM instances and response_model validation;
+    every `read_schema` field must therefore be a column of `model`.
+    When `cache` is given pages are cached per parameter set; writers must call
+    `invalidate_lists`. Filtered (`where`) lists are never cached.
+    """
+    try:
+        projection = parse_fields(fields, list(read_schema.model_fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    selected = projection or list(read_schema.model_fields)
+
+    async def load() -> Page:
+        try:
+            page = await paginate(
+                session,
+                model,
+                order_by,
+                limit=limit,
+                cursor=cursor,
+                fields=selected,
+                include_total=include_total,
+                where=where,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        return page
+
+    if cache is None or where:
+        page = await load()
+    else:
+        key = f"{LIST_KEY_PREFIX}{limit}:{cursor}:{','.join(projection or ())}:{include_total}"
+        page = await cache.get_or_load(key, load)
+
+    headers = {}
+    if page.next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.total is not None:
+        headers[TOTAL_COUNT_HEADER] = str(page.total)
+
+    return FastJSONResponse(content=page.items, headers=headers)
@@ -0,0 +1,87 @@
+import os
+from enum import StrEnum
+from uuid import UUID
+
+from core.cache import get_cache
+from parts.db.models import Location, Part, StockLevel
+from sqlmodel import col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Dashboards refresh often; reports may be this many seconds stale
+STOCK_REPORT_CACHE_TTL_SECONDS = float(os.getenv("STOCK_REPORT_CACHE_TTL_SECONDS", "10"))
+
+reports_cache = get_cache("stock_reports", ttl=STOCK_REPORT_CACHE_TTL_SECONDS)
+
+
+class CategoryField(StrEnum):
+    system = "system"
+    part_type = "part_type"
+
+
+def _totals():
+    return (
+        func.count(func.distinct(StockLevel.part_id)).label("parts"),
+        func.coalesce(func.sum(StockLevel.quantity), 0).label("quantity"),
+        func.coalesce(func.sum(StockLevel.reserved), 0).label("reserved"),
+    )
+
+
+async def stock_by_location(session: AsyncSession) -> list[dict]:
+    """
+    Stock totals per location, including locations without stock.
+    """
+    statement = (
+        select(Location.id.label("location_id"), Location.name.label("location_name"), *_totals())
+        .outerjoin(StockLevel, col(StockLevel.location_id) == Location.id)
+        .group_by(Location.id, Location.name)
+        .order_by(Location.name, Location.id)
+    )
+    return [dict(row._mapping) for row in (await session.exec(statement)).all()]
+
+
+async def stock_by_category(
+    session: AsyncSession, group_by: list[CategoryField], location_id: UUID | None = None
+) -> list[dict]:
+    """
+    Stock totals per part system and/or part type, optionally for one location.
+    """
+    keys = [getattr(Part, field.value) for field in group_by]
+    statement = (
+        select(*keys, *_totals())
+        .join(Part, col(Part.id) == StockLevel.part_id)
+        .group_by(*keys)
+        .order_by(*keys)
+    )
+    if location_id is not None:
+        statement = statement.where(StockLevel.location_id == location_id)
+    return [dict(row._mapping) for row in (await session.exec(statement)).all()]
+
+
+async def low_stock(
+    session: AsyncSession, threshold: int, location_id: UUID | None = None, limit: int = 100
+) -> list[dict]:
+    """
+    Part/location rows whose available stock (quantity - reserved) is at or below
+    `threshold`, lowest first.
+    """
+    available = (StockLevel.quantity - StockLevel.reserved).label("available")
+    statement = (
+        select(
+            StockLevel.part_id,
+            Part.internal_part_code,
+            Part.description,
+            StockLevel.location_id,
+            Location.name.label("location_name"),
+            StockLevel.quantity,
+            StockLevel.reserved,
+            available,
+        )
+        .join(Part, col(Part.id) == StockLevel.part_id)
+        .join(Location, col(Location.id) == StockLevel.location_id)
+        .where(StockLevel.quantity - StockLevel.reserved <= threshold)
+        .order_by(available, Part.internal_part_code)
+        .limit(limit)
+    )
+    if location_id is not None:
+        statement = statement.where(StockLevel.location_id == location_id)
+    return [dict(row._mapping) for row in (await session.exec(statement)).all()]
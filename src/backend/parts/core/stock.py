@@ -0,0 +1,406 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from uuid import UUID, uuid4
+
+from db.session import primary_session
+from parts.db.models import (
+    Location,
+    Part,
+    StockLedgerEntry,
+    StockLevel,
+    StockSnapshot,
+    StockSnapshotLevel,
+)
+from parts.db.upsert import dialect_insert, insert_or_ignore
+from parts.schemas.stock import MovementType, StockMovement
+from sqlmodel import col, delete, func, insert, literal, select, tuple_, union_all, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# How often each worker snapshots the ledger; 0 disables periodic snapshots
+STOCK_SNAPSHOT_INTERVAL_SECONDS = int(os.getenv("STOCK_SNAPSHOT_INTERVAL_SECONDS", "3600"))
+# Ledger ids are allocated before commit, so a slow transaction can commit an id lower
+# than one already visible. Snapshots only cover entries older than this.
+STOCK_SNAPSHOT_SETTLE_SECONDS = 60
+# Snapshots taken longer ago are deleted, except the latest; 0 keeps every snapshot
+STOCK_SNAPSHOT_RETENTION_DAYS = int(os.getenv("STOCK_SNAPSHOT_RETENTION_DAYS") or "90")
+# PostgreSQL advisory lock held by the worker taking the periodic snapshot
+_SNAPSHOT_LOCK_KEY = 7_210_045_115
+
+_stock = StockLevel.__table__.c
+_ledger = StockLedgerEntry.__table__.c
+
+
+class InsufficientStockError(ValueError):
+    def __init__(self, index: int, part_id: UUID, location_id: UUID):
+        super().__init__(
+            f"Movement {index}: not enough stock of part {part_id} at location {location_id}"
+        )
+        self.index = index
+        self.part_id = part_id
+        self.location_id = location_id
+
+
+def _as_utc(value: datetime) -> datetime:
+    """
+    `value` as aware UTC; naive values are taken as UTC. The stored times are UTC, and
+    SQLite compares them as text, so other offsets must be converted before comparing.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value.astimezone(UTC)
+
+
+@dataclass(frozen=True)
+class _Delta:
+    index: int
+    movement_type: str
+    part_id: UUID
+    location_id: UUID
+    quantity: int = 0
+    reserved: int = 0
+
+
+def _deltas(movements: list[StockMovement]) -> list[_Delta]:
+    """
+    Splits movements into signed per-location changes, sorted by (part, location).
+    The sort is stable, so changes to one row keep their order, and every transaction
+    locks rows in the same order, which rules out deadlocks between concurrent batches.
+    """
+    deltas = []
+    for index, movement in enumerate(movements):
+        kind, part, location = movement.type.value, movement.part_id, movement.location_id
+        qty = movement.quantity
+        if movement.type == MovementType.receive:
+            deltas.append(_Delta(index, kind, part, location, quantity=qty))
+        elif movement.type == MovementType.consume:
+            deltas.append(_Delta(index, kind, part, location, quantity=-qty))
+        elif movement.type == MovementType.reserve:
+            deltas.append(_Delta(index, kind, part, location, reserved=qty))
+        elif movement.type == MovementType.release:
+            deltas.append(_Delta(index, kind, part, location, reserved=-qty))
+        else:
+            deltas.append(_Delta(index, kind, part, location, quantity=-qty))
+            deltas.append(_Delta(index, kind, part, movement.to_location_id, quantity=qty))
+    return sorted(deltas, key=lambda delta: (str(delta.part_id), str(delta.location_id)))
+
+
+def _upsert(session: AsyncSession, part_id: UUID, location_id: UUID, **values):
+    statement = dialect_insert(session, StockLevel.__table__).values(
+        id=uuid4(), part_id=part_id, location_id=location_id, version=1, **values
+    )
+    return statement, statement.excluded
+
+
+async def _apply(session: AsyncSession, delta: _Delta, allow_negative: bool):
+    if delta.quantity < 0 or delta.reserved > 0:
+        # Takes from the available stock
+        needed = -delta.quantity or delta.reserved
+        guard = None if allow_negative else _stock.quantity - _stock.reserved >= needed
+    elif delta.reserved < 0:
+        guard = _stock.reserved >= -delta.reserved
+    else:
+        guard = None
+
+    if guard is None:
+        statement, excluded = _upsert(
+            session,
+            delta.part_id,
+            delta.location_id,
+            quantity=delta.quantity,
+            reserved=delta.reserved,
+        )
+        await session.exec(
+            statement.on_conflict_do_update(
+                index_elements=[_stock.part_id, _stock.location_id],
+                set_={
+                    "quantity": _stock.quantity + excluded.quantity,
+                    "reserved": _stock.reserved + excluded.reserved,
+                    "version": _stock.version + 1,
+                },
+            )
+        )
+        return
+
+    result = await session.exec(
+        update(StockLevel.__table__)
+        .where(
+            _stock.part_id == delta.part_id,
+            _stock.location_id == delta.location_id,
+            guard,
+        )
+        .values(
+            quantity=_stock.quantity + delta.quantity,
+            reserved=_stock.reserved + delta.reserved,
+            version=_stock.version + 1,
+        )
+    )
+    if result.rowcount == 0:
+        raise InsufficientStockError(delta.index, delta.part_id, delta.location_id)
+
+
+async def _append_to_ledger(session: AsyncSession, deltas: list[_Delta]):
+    batch_id, now = uuid4(), datetime.now(UTC)
+    values = [
+        {
+            "batch_id": batch_id,
+            "movement_type": delta.movement_type,
+            "part_id": delta.part_id,
+            "location_id": delta.location_id,
+            "quantity_delta": delta.quantity,
+            "reserved_delta": delta.reserved,
+            "created_at": now,
+        }
+        for delta in deltas
+    ]
+    await session.exec(insert(StockLedgerEntry.__table__).values(values))
+
+
+async def missing_references(
+    session: AsyncSession, movements: list[StockMovement]
+) -> tuple[set[UUID], set[UUID]]:
+    """
+    Part and location ids referenced by `movements` that do not exist, in two queries.
+    """
+    part_ids = {movement.part_id for movement in movements}
+    location_ids = {movement.location_id for movement in movements}
+    location_ids |= {m.to_location_id for m in movements if m.to_location_id is not None}
+    found_parts = (await session.exec(select(Part.id).where(col(Part.id).in_(part_ids)))).all()
+    found_locations = (
+        await session.exec(select(Location.id).where(col(Location.id).in_(location_ids)))
+    ).all()
+    return part_ids - set(found_parts), location_ids - set(found_locations)
+
+
+async def apply_movements(
+    session: AsyncSession, movements: list[StockMovement], allow_negative: bool = False
+) -> list[StockLevel]:
+    """
+    Applies `movements` as atomic single-statement increments (UPDATE ... SET quantity =
+    quantity + :delta, or an upsert for rows that may not exist yet). Nothing is read
+    before writing, so concurrent movements on the same row never lose updates.
+    Every change is also appended to the stock ledger in the same transaction.
+    Raises InsufficientStockError, leaving the rollback to the caller, if a movement
+    would take available stock (or a reservation) below zero.
+    Returns the resulting stock levels of every row touched. The caller commits.
+    """
+    deltas = _deltas(movements)
+    for delta in deltas:
+        await _apply(session, delta, allow_negative)
+    await _append_to_ledger(session, deltas)
+
+    keys = list(dict.fromkeys((delta.part_id, delta.location_id) for delta in deltas))
+    statement = (
+        select(StockLevel)
+        .where(tuple_(StockLevel.part_id, StockLevel.location_id).in_(keys))
+        .execution_options(populate_existing=True)
+    )
+    return list((await session.exec(statement)).all())
+
+
+async def set_stock_level(
+    session: AsyncSession, part_id: UUID, location_id: UUID, quantity: int
+) -> StockLevel:
+    """
+    Sets the absolute on-hand quantity of a part at a location (a stock count).
+    The row is locked while the difference is recorded in the ledger. A missing row is
+    created empty first, since locking a row that does not exist locks nothing and two
+    first counts would both record their full quantity. The caller commits.
+    """
+    await session.exec(
+        insert_or_ignore(session, StockLevel.__table__).values(
+            id=uuid4(), part_id=part_id, location_id=location_id, version=1
+        )
+    )
+    statement = (
+        select(StockLevel.quantity)
+        .where(StockLevel.part_id == part_id, StockLevel.location_id == location_id)
+        .with_for_update()
+    )
+    current = (await session.exec(statement)).one()
+    statement = (
+        update(StockLevel)
+        .where(StockLevel.part_id == part_id, StockLevel.location_id == location_id)
+        .values(quantity=quantity, version=StockLevel.version + 1)
+        .returning(StockLevel)
+        .execution_options(populate_existing=True)
+    )
+    level = (await session.exec(statement)).scalar_one()
+    delta = _Delta(0, "count", part_id, location_id, quantity=quantity - current)
+    await _append_to_ledger(session, [delta])
+    return level
+
+
+def _balances(
+    snapshot: StockSnapshot | None,
+    tail_filters: list,
+    part_id: UUID | None = None,
+    location_id: UUID | None = None,
+):
+    """
+    Stock per (part, location) as the snapshot's levels plus the ledger entries matching
+    `tail_filters`, in one GROUP BY over both.
+    """
+    ledger = select(
+        _ledger.part_id,
+        _ledger.location_id,
+        _ledger.quantity_delta.label("quantity"),
+        _ledger.reserved_delta.label("reserved"),
+    ).where(*tail_filters)
+    snapshot_levels = StockSnapshotLevel.__table__.c
+    if part_id is not None:
+        ledger = ledger.where(_ledger.part_id == part_id)
+    if location_id is not None:
+        ledger = ledger.where(_ledger.location_id == location_id)
+
+    rows = ledger
+    if snapshot is not None:
+        base = select(
+            snapshot_levels.part_id,
+            snapshot_levels.location_id,
+            snapshot_levels.quantity,
+            snapshot_levels.reserved,
+        ).where(snapshot_levels.snapshot_id == snapshot.id)
+        if part_id is not None:
+            base = base.where(snapshot_levels.part_id == part_id)
+        if location_id is not None:
+            base = base.where(snapshot_levels.location_id == location_id)
+        rows = union_all(base, ledger)
+
+    rows = rows.subquery()
+    return select(
+        rows.c.part_id,
+        rows.c.location_id,
+        func.sum(rows.c.quantity).label("quantity"),
+        func.sum(rows.c.reserved).label("reserved"),
+    ).group_by(rows.c.part_id, rows.c.location_id)
+
+
+async def take_snapshot(session: AsyncSession, now: datetime | None = None) -> StockSnapshot:
+    """
+    Records the stock levels implied by the ledger up to STOCK_SNAPSHOT_SETTLE_SECONDS
+    ago, starting from the previous snapshot, so the cost is proportional to the ledger
+    entries since then. The caller commits.
+    """
+    now = _as_utc(now or datetime.now(UTC))
+    covers_until = now - timedelta(seconds=STOCK_SNAPSHOT_SETTLE_SECONDS)
+    last_entry_id = (
+        await session.exec(select(func.max(_ledger.id)).where(_ledger.created_at <= covers_until))
+    ).one() or 0
+    previous = (
+        await session.exec(select(StockSnapshot).order_by(col(StockSnapshot.id).desc()))
+    ).first()
+
+    tail = [_ledger.id <= last_entry_id]
+    if previous is not None:
+        tail.append(_ledger.id > previous.last_entry_id)
+    snapshot = StockSnapshot(taken_at=now, covers_until=covers_until, last_entry_id=last_entry_id)
+    session.add(snapshot)
+    await session.flush()
+
+    balances = _balances(previous, tail).subquery()
+    await session.exec(
+        insert(StockSnapshotLevel.__table__).from_select(
+            ["snapshot_id", "part_id", "location_id", "quantity", "reserved"],
+            select(
+                literal(snapshot.id),
+                balances.c.part_id,
+                balances.c.location_id,
+                balances.c.quantity,
+                balances.c.reserved,
+            ),
+        )
+    )
+    return snapshot
+
+
+async def stock_as_of(
+    session: AsyncSession,
+    at: datetime,
+    part_id: UUID | None = None,
+    location_id: UUID | None = None,
+) -> list:
+    """
+    Stock levels at time `at`: the latest snapshot covering it plus the
+    ledger entries recorded after that snapshot and no later than `at`.
+    """
+    at = _as_utc(at)
+    snapshot = (
+        await session.exec(
+            select(StockSnapshot)
+            .where(StockSnapshot.covers_until <= at)
+            .order_by(col(StockSnapshot.covers_until).desc())
+        )
+    ).first()
+    tail = [_ledger.created_at <= at]
+    if snapshot is not None:
+        tail.append(_ledger.id > snapshot.last_entry_id)
+    statement = _balances(snapshot, tail, part_id, location_id)
+    return list((await session.exec(statement)).all())
+
+
+async def prune_snapshots(
+    session: AsyncSession,
+    now: datetime | None = None,
+    retention_days: int = STOCK_SNAPSHOT_RETENTION_DAYS,
+) -> int:
+    """
+    Deletes the snapshots taken more than `retention_days` ago, except the latest, which
+    the next snapshot builds on. As-of queries before the oldest remaining snapshot sum
+    the ledger from its start instead. Returns the number deleted. The caller commits.
+    """
+    if retention_days <= 0:
+        return 0
+    cutoff = _as_utc(now or datetime.now(UTC)) - timedelta(days=retention_days)
+    latest = select(func.max(StockSnapshot.id)).scalar_subquery()
+    ids = (
+        await session.exec(
+            select(StockSnapshot.id).where(
+                StockSnapshot.taken_at < cutoff, StockSnapshot.id != latest
+            )
+        )
+    ).all()
+    if ids:
+        levels = StockSnapshotLevel.__table__
+        await session.exec(delete(levels).where(levels.c.snapshot_id.in_(ids)))
+        await session.exec(delete(StockSnapshot.__table__).where(col(StockSnapshot.id).in_(ids)))
+    return len(ids)
+
+
+async def claim_periodic_snapshot(
+    session: AsyncSession, interval: int, now: datetime | None = None
+) -> bool:
+    """
+    Whether this worker takes the periodic snapshot. Every worker runs the task, so on
+    PostgreSQL only the one holding the advisory lock (released when the transaction
+    ends) proceeds, and on any database none does while the latest snapshot is less than
+    half an interval old, which absorbs the drift between the workers' timers.
+    """
+    if session.bind.dialect.name == "postgresql":
+        locked = await session.exec(select(func.pg_try_advisory_xact_lock(_SNAPSHOT_LOCK_KEY)))
+        if not locked.one():
+            return False
+    latest = (await session.exec(select(func.max(StockSnapshot.taken_at)))).one()
+    now = _as_utc(now or datetime.now(UTC))
+    return latest is None or _as_utc(latest) <= now - timedelta(seconds=interval / 2)
+
+
+async def take_snapshots_periodically(interval: int = STOCK_SNAPSHOT_INTERVAL_SECONDS):
+    """
+    Background task of every worker: each `interval` seconds one of them snapshots the
+    ledger and prunes the snapshots past STOCK_SNAPSHOT_RETENTION_DAYS.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with primary_session() as session:
+                if await claim_periodic_snapshot(session, interval):
+                    await take_snapshot(session)
+                    await prune_snapshots(session)
+                await session.commit()
+        except Exception:
+            logger.exception("Stock snapshot failed")
@@ -0,0 +1,100 @@
+from bisect import bisect_left, insort
+
+from core.shared_cache import invalidation_bus
+from parts.core.catalogue_index import CATALOGUE_TOPIC, CatalogueIndex, Fields
+from parts.core.logic import normalise
+
+Row = tuple[str, str, str, str]
+
+
+def suggestion_values(kind: str, fields: Fields) -> list[str]:
+    """
+    The values a part (its part numbers) or vehicle (make and model) is suggested for.
+    """
+    if kind == "part":
+        codes = ("internal_part_code", "oe_part_number", "manufacturer_part_number")
+        return [fields[name] for name in codes if fields[name]]
+    make, model = fields["make"], fields["model"]
+    return [make, model, f"{make} {model}"]
+
+
+def suggestion_label(kind: str, fields: Fields) -> str:
+    if kind == "part":
+        return fields["description"]
+    years = f"{fields['from_year']}-{fields['to_year'] or ''}"
+    return " ".join(filter(None, (fields["make"], fields["model"], fields["variant"], years)))
+
+
+class PrefixIndex(CatalogueIndex):
+    """
+    Sorted array of (normalised value, kind, id, value) searched with bisect. Lookups
+    cost O(log n) plus the matches returned; single-entity changes are O(n) list inserts,
+    which at catalogue size is far cheaper than a rebuild.
+    """
+
+    def __init__(self):
+        self.keys: list[Row] = []
+        # (kind, id) -> (label, its rows in `keys`)
+        self.entries: dict[tuple[str, str], tuple[str, list[Row]]] = {}
+        super().__init__()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _rows(self, kind: str, id: str, fields: Fields) -> list[Row]:
+        rows = {(normalise(value), kind, id, value) for value in suggestion_values(kind, fields)}
+        return sorted(row for row in rows if row[0])
+
+    def upsert(self, kind: str, id: str, fields: Fields):
+        self.remove(kind, id)
+        rows = self._rows(kind, id, fields)
+        for row in rows:
+            insort(self.keys, row)
+        self.entries[kind, id] = (suggestion_label(kind, fields), rows)
+
+    def remove(self, kind: str, id: str):
+        entry = self.entries.pop((kind, id), None)
+        if entry is None:
+            return
+        for row in entry[1]:
+            index = bisect_left(self.keys, row)
+            if index < len(self.keys) and self.keys[index] == row:
+                del self.keys[index]
+
+    def build(self, documents: list[tuple[str, str, Fields]]):
+        keys, entries = [], {}
+        for kind, id, fields in documents:
+            rows = self._rows(kind, id, fields)
+            keys.extend(rows)
+            entries[kind, id] = (suggestion_label(kind, fields), rows)
+        keys.sort()
+        self.keys, self.entries = keys, entries
+
+    def suggest(
+        self, prefix: str, limit: int = 10, kinds: set[str] | None = None
+    ) -> list[dict[str, str]]:
+        """
+        Up to `limit` entities with a value starting with `prefix`, in the alphabetical
+        order of their normalised values, one suggestion per entity.
+        """
+        key = normalise(prefix)
+        if not key:
+            return []
+        suggestions, seen = [], set()
+        for index in range(bisect_left(self.keys, (key,)), len(self.keys)):
+            normalised, kind, id, value = self.keys[index]
+            if not normalised.startswith(key):
+                break
+            if (kinds and kind not in kinds) or (kind, id) in seen:
+                continue
+            seen.add((kind, id))
+            suggestions.append(
+                {"kind": kind, "id": id, "value": value, "label": self.entries[kind, id][0]}
+            )
+            if len(suggestions) == limit:
+                break
+        return suggestions
+
+
+typeahead_index = PrefixIndex()
+invalidation_bus.on(CATALOGUE_TOPIC, typeahead_index.apply)
@@ -1,35 +1,150 @@
+from datetime import UTC, datetime
+from typing import Any
 from uuid import UUID, uuid4
 
-from sqlmodel import JSON, Field, Relationship, SQLModel
+from parts.core.logic import normalise_part_number
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    and_,
+    bindparam,
+    delete,
+    event,
+    func,
+    insert,
+    inspect,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlmodel import JSON, Field, Index, Relationship, SQLModel
+
+
+def _version_field() -> Any:
+    # Row version behind the ETags of the read endpoints. Models map it as their
+    # `version_id_col`, so ORM updates increment it in SQL and fail with StaleDataError
+    # when another writer changed the row since it was read.
+    return Field(default=1, sa_column=Column("version", Integer, nullable=False, default=1))
 
 
 class PartVehicleLink(SQLModel, table=True):
+    # The primary key serves part -> vehicles; this index serves vehicle -> parts
+    __table_args__ = (Index("ix_partvehiclelink_vehicle_part", "vehicle_id", "part_id"),)
+
     part_id: UUID = Field(foreign_key="part.id", primary_key=True)
     vehicle_id: UUID = Field(foreign_key="vehicle.id", primary_key=True)
 
 
+class PartAlternative(SQLModel, table=True):
+    """
+    Edge of the alternatives graph: `alternative_id` can substitute for `part_id`.
+    Mirrors Part.alternatives, which remains the API representation.
+    """
+
+    # The primary key serves part -> alternatives; this index serves the reverse lookup
+    __table_args__ = (Index("ix_partalternative_alternative_part", "alternative_id", "part_id"),)
+
+    part_id: UUID = Field(foreign_key="part.id", primary_key=True)
+    alternative_id: UUID = Field(foreign_key="part.id", primary_key=True)
+
+
+class PartCodeSequence(SQLModel, table=True):
+    """
+    Last internal part code sequence number issued per MFG-SYS-TYPE prefix.
+    """
+
+    prefix: str = Field(primary_key=True)
+    last_value: int = Field(default=0)
+
+
 class StockLevel(SQLModel, table=True):
+    __table_args__ = (
+        # One row per part and location; the conflict target of the stock upserts
+        Index("ux_stocklevel_part_location", "part_id", "location_id", unique=True),
+        # Covers the per-location and low-stock reports without reading the table
+        Index("ix_stocklevel_location_stock", "location_id", "part_id", "quantity", "reserved"),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     part_id: UUID = Field(foreign_key="part.id")
     location_id: UUID = Field(foreign_key="location.id")
     quantity: int = Field(default=0)
+    # Held for jobs; available stock is quantity - reserved
+    reserved: int = Field(default=0)
+    version: int = _version_field()
+    __mapper_args__ = {"version_id_col": version.sa_column}
 
     part: "Part" = Relationship(back_populates="stock_levels")
     location: "Location" = Relationship(back_populates="stock_levels")
 
 
+class StockLedgerEntry(SQLModel, table=True):
+    """
+    Append-only record of every stock change; StockLevel is its running total.
+    Rows are never updated or deleted.
+    """
+
+    __table_args__ = (
+        Index("ix_stockledgerentry_part_location_id", "part_id", "location_id", "id"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    batch_id: UUID = Field(index=True)
+    movement_type: str
+    part_id: UUID = Field(foreign_key="part.id")
+    location_id: UUID = Field(foreign_key="location.id")
+    quantity_delta: int = Field(default=0)
+    reserved_delta: int = Field(default=0)
+    # Aware UTC, whatever the SQLModel version maps a bare datetime to
+    created_at: datetime = Field(sa_type=DateTime(timezone=True), index=True)
+
+
+class StockSnapshot(SQLModel, table=True):
+    """
+    Stock levels as of `covers_until`: the sum of every ledger entry up to `last_entry_id`.
+    """
+
+    id: int | None = Field(default=None, primary_key=True)
+    taken_at: datetime = Field(sa_type=DateTime(timezone=True))
+    covers_until: datetime = Field(sa_type=DateTime(timezone=True), index=True)
+    last_entry_id: int
+
+
+class StockSnapshotLevel(SQLModel, table=True):
+    snapshot_id: int = Field(foreign_key="stocksnapshot.id", primary_key=True)
+    part_id: UUID = Field(primary_key=True)
+    location_id: UUID = Field(primary_key=True)
+    quantity: int
+    reserved: int
+
+
 class Location(SQLModel, table=True):
+    # Keyset pagination order for list_locations
+    __table_args__ = (Index("ix_location_name_id", "name", "id"),)
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     name: str = Field(index=True)
     address: str
     notes: str | None = None
     telephone: str | None = None
     email: str | None = None
+    version: int = _version_field()
+    __mapper_args__ = {"version_id_col": version.sa_column}
 
     stock_levels: list[StockLevel] = Relationship(back_populates="location")
 
 
 class Vehicle(SQLModel, table=True):
+    __table_args__ = (
+        # Keyset pagination order for list_vehicles
+        Index("ix_vehicle_make_model_id", "make", "model", "id"),
+        # Fitment queries: make/model equality, then the year range
+        Index("ix_vehicle_fitment", "make", "model", "from_year", "to_year"),
+        Index("ix_vehicle_power_drive", "power_type", "drive_type"),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     make: str = Field(index=True)
     model: str = Field(index=True)
@@ -40,11 +155,20 @@ class Vehicle(SQLModel, table=True):
     body_style: str  # Hatchback, Saloon, etc.
     drive_type: str  # FWD, RWD, AWD
     trim_level: str | None = None
+    version: int = _version_field()
+    __mapper_args__ = {"version_id_col": version.sa_column}
 
     parts: list["Part"] = Relationship(back_populates="vehicles", link_model=PartVehicleLink)
 
 
 class Part(SQLModel, table=True):
+    __table_args__ = (
+        # Keyset pagination order for list_parts and the fitment query
+        Index("ix_part_internal_part_code_id", "internal_part_code", "id"),
+        # Part filters of the fitment query
+        Index("ix_part_system_part_type", "system", "part_type"),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     internal_part_code: str | None = Field(default=None, unique=True, index=True)
     oe_part_number: str | None = Field(default=None, index=True)
@@ -60,6 +184,197 @@ class Part(SQLModel, table=True):
     oe_description: str | None = None
     availability: str = Field(default="Available")  # Available, Backordered, Discontinued
     alternatives: list[UUID] = Field(default_factory=list, sa_type=JSON)
+    version: int = _version_field()
+    __mapper_args__ = {"version_id_col": version.sa_column}
+    # Lookup keys of the part numbers (see PART_NUMBER_KEYS), maintained on every write
+    internal_part_code_key: str | None = Field(default=None, index=True)
+    oe_part_number_key: str | None = Field(default=None, index=True)
+    manufacturer_part_number_key: str | None = Field(default=None, index=True)
 
     stock_levels: list[StockLevel] = Relationship(back_populates="part")
     vehicles: list[Vehicle] = Relationship(back_populates="parts", link_model=PartVehicleLink)
+
+
+# Part number column -> its normalised lookup key column
+PART_NUMBER_KEYS = {
+    "internal_part_code": "internal_part_code_key",
+    "oe_part_number": "oe_part_number_key",
+    "manufacturer_part_number": "manufacturer_part_number_key",
+}
+
+
+def part_number_keys(values: dict[str, Any]) -> dict[str, str | None]:
+    """
+    Lookup key columns for a row of Part values, for writes that bypass the ORM.
+    """
+    return {key: normalise_part_number(values.get(name)) for name, key in PART_NUMBER_KEYS.items()}
+
+
+@event.listens_for(Part, "before_insert")
+@event.listens_for(Part, "before_update")
+def _set_part_number_keys(mapper, connection, target):
+    for name, key in PART_NUMBER_KEYS.items():
+        setattr(target, key, normalise_part_number(getattr(target, name)))
+
+
+@event.listens_for(Part, "before_insert")
+@event.listens_for(Part, "before_update")
+def _serialise_alternatives(mapper, connection, target):
+    # The JSON column cannot encode UUID objects
+    if target.alternatives:
+        target.alternatives = [str(id) for id in target.alternatives]
+
+
+@event.listens_for(StockLedgerEntry.__table__, "after_create")
+def _open_ledger(target, connection, **kw):
+    # When the ledger is added to an existing database, current levels become its
+    # opening balances so that ledger totals match StockLevel from the start
+    levels = StockLevel.__table__.c
+    opening = select(
+        literal(uuid4(), target.c.batch_id.type),
+        literal("opening"),
+        levels.part_id,
+        levels.location_id,
+        levels.quantity,
+        levels.reserved,
+        literal(datetime.now(UTC), target.c.created_at.type),
+    )
+    connection.execute(
+        insert(target).from_select(
+            [
+                "batch_id",
+                "movement_type",
+                "part_id",
+                "location_id",
+                "quantity_delta",
+                "reserved_delta",
+                "created_at",
+            ],
+            opening,
+        )
+    )
+
+
+@event.listens_for(PartAlternative.__table__, "after_create")
+def _backfill_alternatives(target, connection, **kw):
+    # When the edge table is added to an existing database, build it from Part.alternatives
+    parts = Part.__table__.c
+    rows = connection.execute(select(parts.id, parts.alternatives)).all()
+    existing = {row.id for row in rows}
+    edges = [
+        {"part_id": row.id, "alternative_id": alternative_id}
+        for row in rows
+        for alternative_id in dict.fromkeys(UUID(str(id)) for id in row.alternatives or ())
+        if alternative_id in existing and alternative_id != row.id
+    ]
+    if edges:
+        connection.execute(insert(target), edges)
+
+
+# Columns added to tables that existing databases already have -> the SQL default that
+# fills their existing rows (None leaves them NULL). `create_all` only creates missing
+# tables, so these are added by `_add_missing_columns`.
+ADDED_COLUMNS: dict[str, dict[str, str | None]] = {
+    "part": {"version": "1", **dict.fromkeys(PART_NUMBER_KEYS.values())},
+    "vehicle": {"version": "1"},
+    "location": {"version": "1"},
+    "stocklevel": {"version": "1", "reserved": "0"},
+}
+
+
+@event.listens_for(SQLModel.metadata, "before_create")
+def _add_missing_columns(target, connection, **kw):
+    # Runs before the missing tables are created, so their after_create hooks can read
+    # the new columns of existing tables
+    inspector = inspect(connection)
+    for name, columns in ADDED_COLUMNS.items():
+        if not inspector.has_table(name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(name)}
+        table = target.tables[name]
+        for column_name, default in columns.items():
+            if column_name in existing:
+                continue
+            column = table.c[column_name]
+            ddl = f"ALTER TABLE {name} ADD COLUMN {column_name} "
+            ddl += column.type.compile(dialect=connection.dialect)
+            if default is not None:
+                ddl += f" DEFAULT {default}" + ("" if column.nullable else " NOT NULL")
+            connection.exec_driver_sql(ddl)
+
+
+def _merge_duplicate_stock_levels(connection):
+    # Databases from before ux_stocklevel_part_location can hold several rows per part
+    # and location; they are merged into the oldest so that the index can be created
+    levels = StockLevel.__table__
+    c = levels.c
+    duplicates = connection.execute(
+        select(c.part_id, c.location_id).group_by(c.part_id, c.location_id).having(func.count() > 1)
+    ).all()
+    for part_id, location_id in duplicates:
+        keep, *rest = connection.execute(
+            select(c.id, c.quantity, c.reserved, c.version)
+            .where(c.part_id == part_id, c.location_id == location_id)
+            .order_by(c.id)
+        ).all()
+        rows = [keep, *rest]
+        connection.execute(
+            update(levels)
+            .where(c.id == keep.id)
+            .values(
+                quantity=sum(row.quantity for row in rows),
+                reserved=sum(row.reserved for row in rows),
+                version=max(row.version for row in rows) + 1,
+            )
+        )
+        connection.execute(delete(levels).where(c.id.in_([row.id for row in rest])))
+
+
+def _backfill_part_number_keys(connection):
+    # Parts written before the lookup key columns existed
+    c = Part.__table__.c
+    missing = or_(
+        *(and_(c[key].is_(None), c[name].is_not(None)) for name, key in PART_NUMBER_KEYS.items())
+    )
+    rows = connection.execute(select(c.id, *(c[name] for name in PART_NUMBER_KEYS)).where(missing))
+    values = [{"part_id": row.id, **part_number_keys(row._mapping)} for row in rows]
+    if values:
+        connection.execute(
+            update(Part.__table__)
+            .where(c.id == bindparam("part_id"))
+            .values({key: bindparam(key) for key in PART_NUMBER_KEYS.values()}),
+            values,
+        )
+
+
+# Columns that older SQLModel versions created as TIMESTAMP WITHOUT TIME ZONE
+TIMESTAMPTZ_COLUMNS = {
+    "stockledgerentry": ("created_at",),
+    "stocksnapshot": ("taken_at", "covers_until"),
+}
+
+
+def _convert_to_timestamptz(connection):
+    # The naive values written so far are UTC. SQLite has no time zone aware type.
+    if connection.dialect.name != "postgresql":
+        return
+    inspector = inspect(connection)
+    for name, columns in TIMESTAMPTZ_COLUMNS.items():
+        types = {column["name"]: column["type"] for column in inspector.get_columns(name)}
+        for column in columns:
+            if not getattr(types[column], "timezone", False):
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {name} ALTER COLUMN {column} TYPE timestamptz "
+                    f"USING {column} AT TIME ZONE 'UTC'"
+                )
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def _upgrade_existing_tables(target, connection, **kw):
+    _merge_duplicate_stock_levels(connection)
+    _backfill_part_number_keys(connection)
+    _convert_to_timestamptz(connection)
+    # `create_all` creates indexes only along with their table
+    for table in target.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
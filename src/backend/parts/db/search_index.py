@@ -0,0 +1,302 @@
+import re
+
+from parts.core.logic import normalise_part_number
+from parts.db.models import PART_NUMBER_KEYS, Part, Vehicle
+from sqlalchemy import event, text
+from sqlmodel import SQLModel, col, column, func, literal, literal_column, or_, select, table
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Columns covered by the search index, in the order they are indexed.
+PART_SEARCH_COLUMNS = (
+    "internal_part_code",
+    "oe_part_number",
+    "manufacturer_part_number",
+    "description",
+    "system",
+    "notes",
+    "oe_description",
+)
+VEHICLE_SEARCH_COLUMNS = ("make", "model", "variant", "body_style", "trim_level")
+
+# Fuzzy search ranks a row by its best matching column, times that column's weight:
+# part numbers above descriptions above notes
+PART_FUZZY_WEIGHTS = {
+    "internal_part_code": 3.0,
+    "oe_part_number": 3.0,
+    "manufacturer_part_number": 3.0,
+    "description": 2.0,
+    "part_type": 2.0,
+    "oe_description": 1.5,
+    "system": 1.0,
+    "notes": 1.0,
+}
+VEHICLE_FUZZY_WEIGHTS = {
+    "make": 3.0,
+    "model": 3.0,
+    "variant": 2.0,
+    "trim_level": 2.0,
+    "body_style": 1.0,
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenise(q: str) -> list[str]:
+    """
+    Splits a free text query into the word tokens understood by the search index.
+    """
+    return _TOKEN_RE.findall(q.lower())
+
+
+def build_fts5_match(q: str) -> str | None:
+    """
+    Builds an FTS5 MATCH expression where every token must match as a prefix.
+    Tokens are quoted so user input can never inject FTS5 query syntax.
+    """
+    tokens = tokenise(q)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def build_tsquery(q: str) -> str | None:
+    """
+    Builds a Postgres to_tsquery expression where every token must match as a prefix.
+    """
+    tokens = tokenise(q)
+    if not tokens:
+        return None
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+def _tsvector_sql(columns: tuple[str, ...]) -> str:
+    # Must be byte-for-byte identical in the index DDL and in queries for Postgres to use the index
+    joined = " || ' ' || ".join(f"coalesce({name}, '')" for name in columns)
+    return f"to_tsvector('simple', {joined})"
+
+
+PART_TSVECTOR = _tsvector_sql(PART_SEARCH_COLUMNS)
+VEHICLE_TSVECTOR = _tsvector_sql(VEHICLE_SEARCH_COLUMNS)
+
+
+def _sqlite_fts_ddl(source: str, columns: tuple[str, ...]) -> list[str]:
+    """
+    FTS5 table over `source`, kept in sync by triggers so that every write path (ORM,
+    bulk INSERT, raw SQL) updates the index. `source` has a UUID primary key and its
+    implicit rowid may change on VACUUM, so documents are keyed by `{source}_fts_doc`,
+    whose INTEGER PRIMARY KEY is stable.
+    """
+    fts, docs = f"{source}_fts", f"{source}_fts_doc"
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{name}" for name in columns)
+    assignments = ", ".join(f"{name} = new.{name}" for name in columns)
+    doc_of = f"(SELECT doc_id FROM {docs} WHERE id = {{}}.id)"
+    return [
+        f"CREATE TABLE {docs} (doc_id INTEGER PRIMARY KEY, id CHAR(32) NOT NULL UNIQUE)",
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {docs}(id) VALUES (new.id); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES ({doc_of.format('new')}, {new_cols}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {source} BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = {doc_of.format('old')}; "
+        f"DELETE FROM {docs} WHERE id = old.id; END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {source} BEGIN "
+        f"UPDATE {fts} SET {assignments} WHERE rowid = {doc_of.format('new')}; END",
+        # Backfill rows that existed before the index was created
+        f"INSERT INTO {docs}(id) SELECT id FROM {source}",
+        f"INSERT INTO {fts}(rowid, {cols}) SELECT {docs}.doc_id, "
+        + ", ".join(f"{source}.{name}" for name in columns)
+        + f" FROM {source} JOIN {docs} ON {docs}.id = {source}.id",
+    ]
+
+
+def _drop_sqlite_fts(connection, source: str):
+    fts = f"{source}_fts"
+    for trigger in ("ai", "ad", "au"):
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {fts}_{trigger}"))
+    connection.execute(text(f"DROP TABLE IF EXISTS {fts}"))
+    connection.execute(text(f"DROP TABLE IF EXISTS {fts}_doc"))
+
+
+_INDEXES = (
+    ("part", PART_SEARCH_COLUMNS, PART_TSVECTOR),
+    ("vehicle", VEHICLE_SEARCH_COLUMNS, VEHICLE_TSVECTOR),
+)
+
+
+def _fuzzy_column(source: str, name: str) -> str:
+    # Part numbers are compared by their normalised lookup keys
+    return PART_NUMBER_KEYS.get(name, name) if source == "part" else name
+
+
+_FUZZY_INDEXES = (("part", PART_FUZZY_WEIGHTS), ("vehicle", VEHICLE_FUZZY_WEIGHTS))
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def create_search_indexes(target, connection, **kw):
+    """
+    Creates the dialect specific search index after `create_all`.
+    Runs on every `create_all`, so it is idempotent and also upgrades existing databases.
+    """
+    dialect = connection.dialect.name
+    for source, columns, tsvector in _INDEXES:
+        if dialect == "sqlite":
+            existing = connection.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": f"{source}_fts"},
+            ).first()
+            if existing and "content=" not in existing.sql:
+                continue
+            # Replaces indexes that still use the source table's rowid as external content
+            _drop_sqlite_fts(connection, source)
+            for statement in _sqlite_fts_ddl(source, columns):
+                connection.execute(text(statement))
+        elif dialect == "postgresql":
+            connection.execute(
+                text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{source}_search_tsv "
+                    f"ON {source} USING gin (({tsvector}))"
+                )
+            )
+    if dialect == "postgresql":
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for source, weights in _FUZZY_INDEXES:
+            for name in weights:
+                column = _fuzzy_column(source, name)
+                connection.execute(
+                    text(
+                        f"CREATE INDEX IF NOT EXISTS ix_{source}_{column}_trgm "
+                        f"ON {source} USING gin ({column} gin_trgm_ops)"
+                    )
+                )
+
+
+@event.listens_for(SQLModel.metadata, "before_drop")
+def drop_search_indexes(target, connection, **kw):
+    """
+    Drops the FTS5 tables and their document ids alongside the tables they index.
+    """
+    if connection.dialect.name == "sqlite":
+        for source, _, _ in _INDEXES:
+            _drop_sqlite_fts(connection, source)
+
+
+def _dialect_name(session: AsyncSession) -> str:
+    return session.bind.dialect.name
+
+
+def _ranked(statement, source: str, tsvector: str, dialect: str, q: str):
+    """
+    Applies the index match and relevance ordering for `dialect` to `statement`.
+    Returns None when the query contains no searchable tokens.
+    """
+    if dialect == "sqlite":
+        match = build_fts5_match(q)
+        if match is None:
+            return None
+        fts = table(f"{source}_fts", column("rowid"), column("rank"))
+        docs = table(f"{source}_fts_doc", column("doc_id"), column("id"))
+        return (
+            statement.join(docs, docs.c.id == literal_column(f"{source}.id"))
+            .join(fts, fts.c.rowid == docs.c.doc_id)
+            .where(literal_column(f"{source}_fts").op("MATCH")(match))
+            .order_by(fts.c.rank)
+        )
+    tsquery = build_tsquery(q)
+    if tsquery is None:
+        return None
+    vector = literal_column(tsvector)
+    query = func.to_tsquery(literal_column("'simple'"), tsquery)
+    return statement.where(vector.op("@@")(query)).order_by(func.ts_rank(vector, query).desc())
+
+
+async def _search(
+    session: AsyncSession, model, source: str, columns, tsvector: str, q, limit, where=(), offset=0
+):
+    dialect = _dialect_name(session)
+    if dialect in ("sqlite", "postgresql"):
+        statement = _ranked(select(model).where(*where), source, tsvector, dialect, q)
+        if statement is None:
+            return []
+    else:
+        pattern = f"%{q}%"
+        statement = select(model).where(
+            or_(*(col(getattr(model, name)).ilike(pattern) for name in columns)), *where
+        )
+    result = await session.exec(statement.offset(offset).limit(limit))
+    return list(result.all())
+
+
+async def lookup_parts(
+    session: AsyncSession, number: str, limit: int, where: tuple = ()
+) -> list[Part]:
+    """
+    Parts with an internal, OE or manufacturer part number equal to `number`, ignoring
+    case and punctuation. One probe of each lookup key index.
+    """
+    key = normalise_part_number(number)
+    if key is None:
+        return []
+    matches = or_(*(col(getattr(Part, name)) == key for name in PART_NUMBER_KEYS.values()))
+    result = await session.exec(select(Part).where(matches, *where).limit(limit))
+    return list(result.all())
+
+
+async def search_parts(
+    session: AsyncSession, q: str, limit: int, where: tuple = (), offset: int = 0
+) -> list[Part]:
+    """
+    Returns parts matching `q` and the extra `where` clauses, best match first.
+    A pasted part number in any format matches exactly and comes first.
+    """
+    end = offset + limit
+    exact = await lookup_parts(session, q, end, where)
+    ranked = await _search(session, Part, "part", PART_SEARCH_COLUMNS, PART_TSVECTOR, q, end, where)
+    seen = {part.id for part in exact}
+    return (exact + [part for part in ranked if part.id not in seen])[offset:end]
+
+
+async def search_vehicles(
+    session: AsyncSession, q: str, limit: int, offset: int = 0
+) -> list[Vehicle]:
+    """
+    Returns vehicles matching `q`, best match first.
+    """
+    return await _search(
+        session,
+        Vehicle,
+        "vehicle",
+        VEHICLE_SEARCH_COLUMNS,
+        VEHICLE_TSVECTOR,
+        q,
+        limit,
+        offset=offset,
+    )
+
+
+async def fuzzy_search_postgres(
+    session: AsyncSession, kind: str, q: str, limit: int, offset: int = 0, where: tuple = ()
+) -> list[tuple]:
+    """
+    pg_trgm fuzzy search: rows where `q` is word-similar (the `<%` operator, served by
+    the trigram indexes) to any weighted column, as (row, score) best first.
+    """
+    model, weights = (
+        (Part, PART_FUZZY_WEIGHTS) if kind == "part" else (Vehicle, VEHICLE_FUZZY_WEIGHTS)
+    )
+    code = normalise_part_number(q) or q
+    terms, matches = [], []
+    for name, weight in weights.items():
+        column = col(getattr(model, _fuzzy_column(kind, name)))
+        query = literal(code if name in PART_NUMBER_KEYS else q)
+        terms.append(weight * func.word_similarity(query, func.coalesce(column, "")))
+        matches.append(query.op("<%")(column))
+    score = func.greatest(*terms).label("score")
+    statement = (
+        select(model, score)
+        .where(or_(*matches), *where)
+        .order_by(score.desc(), col(model.id))
+        .offset(offset)
+        .limit(limit)
+    )
+    return list((await session.exec(statement)).all())
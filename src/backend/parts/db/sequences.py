@@ -0,0 +1,75 @@
+from parts.core.logic import format_internal_part_code
+from parts.db.models import Part, PartCodeSequence
+from parts.db.upsert import dialect_insert
+from sqlmodel import col, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+async def _highest_issued(session: AsyncSession, prefix: str) -> int:
+    """
+    Highest sequence already used by an existing part with this prefix. Only consulted
+    the first time a prefix is seen, so databases created before the counter table existed
+    continue their numbering instead of colliding with existing codes.
+    """
+    statement = select(col(Part.internal_part_code)).where(
+        col(Part.internal_part_code).like(f"{prefix}-%")
+    )
+    highest = 0
+    for code in (await session.exec(statement)).all():
+        suffix = code[len(prefix) + 1 :]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
+
+
+async def reserve_sequence(session: AsyncSession, prefix: str, count: int = 1) -> int:
+    """
+    Atomically reserves `count` consecutive sequence numbers for `prefix` and returns the
+    first one. The counter row is incremented in a single UPDATE ... RETURNING (or an
+    upsert for a new prefix), so concurrent writers in any process never receive the same
+    number and numbers are never reissued after a delete. The reservation is part of the
+    caller's transaction.
+    """
+    table = PartCodeSequence.__table__
+    statement = (
+        update(table)
+        .where(table.c.prefix == prefix)
+        .values(last_value=table.c.last_value + count)
+        .returning(table.c.last_value)
+    )
+    last_value = (await session.exec(statement)).scalar_one_or_none()
+
+    if last_value is None:
+        seed = await _highest_issued(session, prefix)
+        statement = (
+            dialect_insert(session, table)
+            .values(prefix=prefix, last_value=seed + count)
+            .on_conflict_do_update(
+                index_elements=[table.c.prefix],
+                set_={"last_value": table.c.last_value + count},
+            )
+            .returning(table.c.last_value)
+        )
+        last_value = (await session.exec(statement)).scalar_one()
+
+    return last_value - count + 1
+
+
+async def allocate_internal_part_codes(session: AsyncSession, prefixes: list[str]) -> list[str]:
+    """
+    Allocates one internal part code for each entry in `prefixes`, reserving a single
+    block per distinct prefix.
+    """
+    needed: dict[str, int] = {}
+    for prefix in prefixes:
+        needed[prefix] = needed.get(prefix, 0) + 1
+
+    next_sequence = {}
+    for prefix, count in needed.items():
+        next_sequence[prefix] = await reserve_sequence(session, prefix, count)
+
+    codes = []
+    for prefix in prefixes:
+        codes.append(format_internal_part_code(prefix, next_sequence[prefix]))
+        next_sequence[prefix] += 1
+    return codes
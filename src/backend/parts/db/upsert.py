@@ -0,0 +1,21 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+_DIALECT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def dialect_insert(session: AsyncSession, table):
+    """
+    Returns the dialect specific INSERT construct for `table`, which supports ON CONFLICT.
+    """
+    dialect = session.bind.dialect.name
+    if dialect not in _DIALECT_INSERTS:
+        raise NotImplementedError(f"ON CONFLICT is not supported on {dialect}")
+    return _DIALECT_INSERTS[dialect](table)
+
+
+def insert_or_ignore(session: AsyncSession, table):
+    """
+    INSERT that silently skips rows conflicting with an existing primary or unique key.
+    """
+    return dialect_insert(session, table).on_conflict_do_nothing()
@@ -0,0 +1,8 @@
+from parts.schemas.part import PartRead
+from parts.schemas.search import PartStockTotals
+
+
+class PartAlternativeRead(PartRead):
+    # Hops from the requested part; 1 for its direct alternatives
+    depth: int
+    stock: PartStockTotals
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, model_validator
+
+
+class PartVehicleLinkImport(BaseModel):
+    """
+    A fitment link identified by natural keys rather than IDs.
+    The part is matched on internal_part_code, or manufacturer_part_number if no code is given.
+    The vehicle is matched on make, model and from_year, narrowed by variant when given.
+    """
+
+    internal_part_code: str | None = None
+    manufacturer_part_number: str | None = None
+    make: str
+    model: str
+    from_year: int
+    variant: str | None = None
+
+    @model_validator(mode="after")
+    def check_part_key(self):
+        if not self.internal_part_code and not self.manufacturer_part_number:
+            raise ValueError("internal_part_code or manufacturer_part_number is required")
+        return self
+
+
+class ImportRowError(BaseModel):
+    line: int
+    errors: list[str]
+
+
+class ImportResult(BaseModel):
+    received: int
+    created: int
+    errors: list[ImportRowError] = []
@@ -0,0 +1,41 @@
+from uuid import UUID
+
+from parts.schemas.part import MAX_BATCH_SIZE
+from pydantic import BaseModel, model_validator
+
+
+class PartVehicleLinkPair(BaseModel):
+    part_id: UUID
+    vehicle_id: UUID
+
+
+class FitmentLinkBatch(BaseModel):
+    """
+    Fitment links to create or remove, given either as one part and its vehicles
+    (`part_id` + `vehicle_ids`) or as explicit (part, vehicle) `links`.
+    """
+
+    part_id: UUID | None = None
+    vehicle_ids: list[UUID] = []
+    links: list[PartVehicleLinkPair] = []
+
+    @model_validator(mode="after")
+    def check_shape(self):
+        if (self.part_id is None) != (not self.vehicle_ids):
+            raise ValueError("part_id and vehicle_ids must be given together")
+        if not self.vehicle_ids and not self.links:
+            raise ValueError("vehicle_ids or links is required")
+        if len(self.vehicle_ids) + len(self.links) > MAX_BATCH_SIZE:
+            raise ValueError(f"At most {MAX_BATCH_SIZE} links per request")
+        return self
+
+    def pairs(self) -> list[tuple[UUID, UUID]]:
+        pairs = [(self.part_id, vehicle_id) for vehicle_id in self.vehicle_ids]
+        pairs += [(link.part_id, link.vehicle_id) for link in self.links]
+        return list(dict.fromkeys(pairs))
+
+
+class FitmentLinkResult(BaseModel):
+    requested: int
+    created: int = 0
+    removed: int = 0
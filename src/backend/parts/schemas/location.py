@@ -25,6 +25,7 @@ class LocationUpdate(BaseModel):
 
 class LocationRead(LocationBase):
     id: UUID
+    version: int
 
     class Config:
         from_attributes = True
@@ -1,6 +1,9 @@
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+# Largest number of ids accepted by the batch endpoints
+MAX_BATCH_SIZE = 1000
 
 
 class PartBase(BaseModel):
@@ -41,7 +44,12 @@ class PartUpdate(BaseModel):
 
 class PartRead(PartBase):
     id: UUID
+    version: int
     internal_part_code: str
 
     class Config:
         from_attributes = True
+
+
+class PartBatchRequest(BaseModel):
+    ids: list[UUID] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
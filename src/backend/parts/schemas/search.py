@@ -1,8 +1,47 @@
+from enum import StrEnum
+
 from parts.schemas.part import PartRead
 from parts.schemas.vehicle import VehicleRead
 from pydantic import BaseModel
 
 
+class PartStockTotals(BaseModel):
+    quantity: int
+    reserved: int
+    available: int
+
+
+class SearchMode(StrEnum):
+    # Full text index, every word must match as a prefix
+    standard = "standard"
+    # Trigram similarity, tolerates typos
+    fuzzy = "fuzzy"
+
+
+class PartSearchHit(PartRead):
+    # Only set when stock was requested
+    stock: PartStockTotals | None = None
+    # Relevance, only set by fuzzy search
+    score: float | None = None
+
+
+class VehicleSearchHit(VehicleRead):
+    score: float | None = None
+
+
 class SearchResult(BaseModel):
-    parts: list[PartRead]
-    vehicles: list[VehicleRead]
+    parts: list[PartSearchHit]
+    vehicles: list[VehicleSearchHit]
+
+
+class SuggestionKind(StrEnum):
+    part = "part"
+    vehicle = "vehicle"
+
+
+class Suggestion(BaseModel):
+    kind: SuggestionKind
+    id: str
+    # The part number or make/model that matched
+    value: str
+    label: str
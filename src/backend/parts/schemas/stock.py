@@ -1,6 +1,9 @@
+from datetime import datetime
+from enum import StrEnum
 from uuid import UUID
 
-from pydantic import BaseModel
+from parts.schemas.part import MAX_BATCH_SIZE
+from pydantic import BaseModel, Field, model_validator
 
 
 class StockLevelBase(BaseModel):
@@ -19,6 +22,109 @@ class StockLevelRead(StockLevelBase):
     id: UUID
     part_id: UUID
     location_id: UUID
+    reserved: int = 0
+    version: int
 
     class Config:
         from_attributes = True
+
+
+class MovementType(StrEnum):
+    receive = "receive"
+    consume = "consume"
+    reserve = "reserve"
+    release = "release"
+    transfer = "transfer"
+
+
+class StockMovement(BaseModel):
+    """
+    A stock change at a location. `receive` and `consume` move the on-hand quantity,
+    `reserve` and `release` hold or free stock for a job, and `transfer` moves stock
+    from `location_id` to `to_location_id`.
+    """
+
+    type: MovementType
+    part_id: UUID
+    location_id: UUID
+    quantity: int = Field(gt=0)
+    to_location_id: UUID | None = None
+
+    @model_validator(mode="after")
+    def check_destination(self):
+        if (self.type == MovementType.transfer) != (self.to_location_id is not None):
+            raise ValueError("to_location_id is required for, and only for, transfers")
+        if self.to_location_id == self.location_id:
+            raise ValueError("Cannot transfer to the same location")
+        return self
+
+
+class StockMovementBatch(BaseModel):
+    """
+    Movements applied atomically, in order: if any of them would take a location's
+    available stock below zero the whole batch is rejected, unless `allow_negative`.
+    """
+
+    movements: list[StockMovement] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+    allow_negative: bool = False
+
+
+class StockLedgerEntryRead(BaseModel):
+    id: int
+    batch_id: UUID
+    movement_type: str
+    part_id: UUID
+    location_id: UUID
+    quantity_delta: int
+    reserved_delta: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class StockBalance(BaseModel):
+    part_id: UUID
+    location_id: UUID
+    quantity: int
+    reserved: int
+
+    class Config:
+        from_attributes = True
+
+
+class StockSnapshotRead(BaseModel):
+    id: int
+    taken_at: datetime
+    covers_until: datetime
+    last_entry_id: int
+
+    class Config:
+        from_attributes = True
+
+
+class StockTotals(BaseModel):
+    parts: int
+    quantity: int
+    reserved: int
+
+
+class StockByLocation(StockTotals):
+    location_id: UUID
+    location_name: str
+
+
+class StockByCategory(StockTotals):
+    system: str | None = None
+    part_type: str | None = None
+
+
+class LowStockItem(BaseModel):
+    part_id: UUID
+    internal_part_code: str | None
+    description: str
+    location_id: UUID
+    location_name: str
+    quantity: int
+    reserved: int
+    available: int
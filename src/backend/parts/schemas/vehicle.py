@@ -33,6 +33,7 @@ class VehicleUpdate(BaseModel):
 
 class VehicleRead(VehicleBase):
     id: UUID
+    version: int
 
     class Config:
         from_attributes = True
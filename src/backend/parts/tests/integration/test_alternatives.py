@@ -0,0 +1,71 @@
+import pytest
+from httpx import AsyncClient
+
+
+def _resolved(resp) -> dict[str, int]:
+    assert resp.status_code == 200
+    return {part["id"]: part["depth"] for part in resp.json()}
+
+
+@pytest.mark.asyncio
+async def test_alternatives_follow_supersession_chains(client: AsyncClient, create_part):
+    # a -> b -> c -> a (cycle), and d lists a
+    c = await create_part("C")
+    b = await create_part("B", alternatives=[c])
+    a = await create_part("A", alternatives=[b])
+    await client.patch(f"/api/v1/parts/{c}", json={"alternatives": [a]})
+    d = await create_part("D", alternatives=[a])
+
+    assert _resolved(await client.get(f"/api/v1/parts/{a}/alternatives")) == {b: 1, c: 2}
+    resp = await client.get(f"/api/v1/parts/{a}/alternatives", params={"bidirectional": True})
+    assert _resolved(resp) == {b: 1, c: 1, d: 1}
+
+    # Editing the chain is reflected, despite the cached closure
+    await client.patch(f"/api/v1/parts/{b}", json={"alternatives": []})
+    assert _resolved(await client.get(f"/api/v1/parts/{a}/alternatives")) == {b: 1}
+
+    await client.delete(f"/api/v1/parts/{b}")
+    assert _resolved(await client.get(f"/api/v1/parts/{a}/alternatives")) == {}
+    resp = await client.get(f"/api/v1/parts/{b}/alternatives")
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_alternatives_with_availability(client: AsyncClient, create_part):
+    c = await create_part("C")
+    b = await create_part("B", alternatives=[c])
+    a = await create_part("A", alternatives=[b])
+    location = (await client.post("/api/v1/locations/", json={"name": "M", "address": "x"})).json()
+    movement = {"type": "receive", "part_id": c, "location_id": location["id"], "quantity": 4}
+    await client.post("/api/v1/stock/movements", json={"movements": [movement]})
+
+    resp = await client.get(f"/api/v1/parts/{a}/alternatives")
+    stock = {part["id"]: part["stock"] for part in resp.json()}
+    assert stock == {
+        b: {"quantity": 0, "reserved": 0, "available": 0},
+        c: {"quantity": 4, "reserved": 0, "available": 4},
+    }
+
+    resp = await client.get(f"/api/v1/parts/{a}/alternatives", params={"in_stock_only": True})
+    assert _resolved(resp) == {c: 2}
+
+
+@pytest.mark.asyncio
+async def test_alternatives_must_name_existing_parts(client: AsyncClient, create_part):
+    b = await create_part("B")
+    a = await create_part("A", alternatives=[b])
+    unknown = "00000000-0000-0000-0000-000000000000"
+    payload = {"manufacturer_part_number": "X", "description": "X", "part_type": "F"}
+    payload |= {"system": "E", "alternatives": [unknown]}
+    resp = await client.post("/api/v1/parts/", json=payload)
+    assert resp.status_code == 422
+    assert resp.json()["detail"] == {"unknown_alternative_ids": [unknown]}
+    resp = await client.patch(f"/api/v1/parts/{a}", json={"alternatives": [b, unknown]})
+    assert resp.status_code == 422
+    resp = await client.patch(f"/api/v1/parts/{a}", json={"alternatives": [a]})
+    assert resp.status_code == 422
+
+    # Deleting a part removes it from the lists naming it
+    await client.delete(f"/api/v1/parts/{b}")
+    part = (await client.get(f"/api/v1/parts/{a}")).json()
+    assert (part["alternatives"], part["version"]) == ([], 2)
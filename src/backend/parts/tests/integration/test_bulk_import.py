@@ -0,0 +1,162 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+from parts.core.bulk_import import import_vehicles
+from sqlmodel import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+PARTS_CSV = """\
+manufacturer_part_number,description,part_type,system,last_known_supplier,alternatives
+BI-1,"Brake pad, front",Pad,Braking,Bosch,
+BI-2,Brake pad rear,Pad,Braking,Bosch,[]
+,Missing MPN,Pad,Braking,Bosch,
+"""
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_parts_csv_reports_row_errors(client: AsyncClient):
+    resp = await client.post(
+        "/api/v1/import/parts", content=PARTS_CSV, headers={"Content-Type": "text/csv"}
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["received"] == 3
+    assert data["created"] == 2
+    assert data["errors"][0]["line"] == 4
+    assert "manufacturer_part_number" in data["errors"][0]["errors"][0]
+
+    parts = (await client.get("/api/v1/parts/")).json()
+    codes = sorted(p["internal_part_code"] for p in parts)
+    assert codes == ["BOS-BRA-PAD-00001", "BOS-BRA-PAD-00002"]
+
+    # Rows written by the bulk INSERT get part number lookup keys too
+    resp = await client.get("/api/v1/parts/lookup", params={"number": "bi 2"})
+    assert [p["manufacturer_part_number"] for p in resp.json()] == ["BI-2"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_vehicles_and_links_ndjson(client: AsyncClient):
+    await client.post(
+        "/api/v1/import/parts", content=PARTS_CSV, headers={"Content-Type": "text/csv"}
+    )
+    vehicles = [
+        {
+            "make": "VW",
+            "model": "Golf",
+            "from_year": 2020,
+            "power_type": "MHEV",
+            "body_style": "Hatchback",
+            "drive_type": "FWD",
+            "variant": variant,
+        }
+        for variant in ("eTSI", "GTE")
+    ]
+    resp = await client.post(
+        "/api/v1/import/vehicles",
+        params={"format": "ndjson"},
+        content="\n".join(json.dumps(v) for v in vehicles) + "\nnot json\n",
+    )
+    assert resp.json()["created"] == 2
+    assert resp.json()["errors"][0]["line"] == 3
+
+    links = [
+        {"manufacturer_part_number": "BI-1", "make": "VW", "model": "Golf", "from_year": 2020},
+        {
+            "internal_part_code": "BOS-BRA-PAD-00001",
+            "make": "VW",
+            "model": "Golf",
+            "from_year": 2020,
+            "variant": "GTE",
+        },
+        {"manufacturer_part_number": "NOPE", "make": "VW", "model": "Golf", "from_year": 2020},
+    ]
+    body = "\n".join(json.dumps(link) for link in links)
+    resp = await client.post(
+        "/api/v1/import/links", content=body, headers={"Content-Type": "application/x-ndjson"}
+    )
+    data = resp.json()
+    assert data["created"] == 1
+    assert [e["line"] for e in data["errors"]] == [1, 3]
+    assert "ambiguous" in data["errors"][0]["errors"][0]
+
+    # Re-importing is idempotent
+    resp = await client.post("/api/v1/import/links", params={"format": "ndjson"}, content=body)
+    assert resp.json()["created"] == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_vehicles_refreshes_the_vehicle_list(client: AsyncClient):
+    vehicle = {
+        "make": "Nissan",
+        "model": "Leaf",
+        "from_year": 2019,
+        "power_type": "EV",
+        "body_style": "Hatchback",
+        "drive_type": "FWD",
+    }
+    await client.post("/api/v1/vehicles/", json=vehicle)
+    assert len((await client.get("/api/v1/vehicles/")).json()) == 1
+
+    resp = await client.post(
+        "/api/v1/import/vehicles",
+        params={"format": "ndjson"},
+        content=json.dumps({**vehicle, "model": "Ariya", "from_year": 2022}),
+    )
+    assert resp.json()["created"] == 1
+    models = [v["model"] for v in (await client.get("/api/v1/vehicles/")).json()]
+    assert models == ["Ariya", "Leaf"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_requires_format(client: AsyncClient):
+    resp = await client.post(
+        "/api/v1/import/parts", content="{}", headers={"Content-Type": "text/plain"}
+    )
+    assert resp.status_code == 415
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_reports_rows_the_database_rejects(session: AsyncSession):
+    await session.exec(
+        text(
+            "CREATE TRIGGER reject_vehicle BEFORE INSERT ON vehicle WHEN new.model = 'Broken' "
+            "BEGIN SELECT RAISE(ABORT, 'vehicle rejected'); END"
+        )
+    )
+    await session.commit()
+    vehicle = {"make": "VW", "from_year": 2010, "power_type": "ICE"}
+    vehicle |= {"body_style": "Hatchback", "drive_type": "FWD"}
+    rows = [
+        (line, {**vehicle, "model": model})
+        for line, model in enumerate(["Golf", "Polo", "Broken", "Up"], start=1)
+    ]
+
+    result = await import_vehicles(session, rows, chunk_size=2)
+
+    # The first chunk is written as is; the second is retried row by row
+    assert (result.received, result.created) == (4, 3)
+    assert [(error.line, error.errors) for error in result.errors] == [
+        (3, ["database: vehicle rejected"])
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_rejects_unknown_alternatives(client: AsyncClient):
+    payload = {"manufacturer_part_number": "ALT", "description": "Alt"}
+    payload |= {"part_type": "Pad", "system": "Braking"}
+    existing = (await client.post("/api/v1/parts/", json=payload)).json()["id"]
+    unknown = "00000000-0000-0000-0000-000000000000"
+    rows = [
+        {**payload, "manufacturer_part_number": mpn, "alternatives": alternatives}
+        for mpn, alternatives in (("OK", [existing]), ("BAD", [existing, unknown]))
+    ]
+    resp = await client.post(
+        "/api/v1/import/parts",
+        content="\n".join(json.dumps(row) for row in rows),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert resp.json()["created"] == 1
+    assert resp.json()["errors"] == [
+        {"line": 2, "errors": [f"alternatives: unknown part {unknown}"]}
+    ]
@@ -0,0 +1,117 @@
+import pytest
+from httpx import AsyncClient
+
+
+async def _vehicle(client: AsyncClient, **overrides) -> str:
+    payload = {
+        "make": "Nissan",
+        "model": "Leaf",
+        "from_year": 2018,
+        "to_year": 2022,
+        "power_type": "EV",
+        "body_style": "Hatchback",
+        "drive_type": "FWD",
+        **overrides,
+    }
+    return (await client.post("/api/v1/vehicles/", json=payload)).json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_fitment_filters(client: AsyncClient, create_part):
+    leaf = await _vehicle(client)
+    leaf_awd = await _vehicle(client, drive_type="AWD", to_year=None)
+    golf = await _vehicle(client, make="VW", model="Golf", power_type="MHEV")
+
+    brake = await create_part("BR-1", system="Brakes")
+    wiper = await create_part("WI-1", system="Body")
+    golf_brake = await create_part("BR-2", system="Brakes")
+    await create_part("UNFITTED", system="Brakes")
+    for part_id, vehicle_id in [
+        (brake, leaf),
+        (brake, leaf_awd),
+        (wiper, leaf_awd),
+        (golf_brake, golf),
+    ]:
+        await client.post(f"/api/v1/parts/{part_id}/vehicles/{vehicle_id}")
+
+    async def ids(**params) -> set[str]:
+        response = await client.get("/api/v1/fitment/parts", params=params)
+        assert response.status_code == 200
+        return {part["id"] for part in response.json()}
+
+    assert await ids() == {brake, wiper, golf_brake}
+    assert await ids(make="Nissan", model="Leaf") == {brake, wiper}
+    assert await ids(make="Nissan", system="Brakes") == {brake}
+    assert await ids(make="Nissan", drive_type="FWD") == {brake}
+    # Only the open-ended AWD Leaf is still in production in 2030
+    assert await ids(make="Nissan", year=2030) == {brake, wiper}
+    assert await ids(make="Nissan", year=2017) == set()
+    assert await ids(power_type="MHEV") == {golf_brake}
+
+
+@pytest.mark.asyncio
+async def test_fitment_is_paginated(client: AsyncClient, create_part):
+    vehicle_id = await _vehicle(client)
+    for i in range(3):
+        part_id = await create_part(f"BR-{i}", system="Brakes")
+        await client.post(f"/api/v1/parts/{part_id}/vehicles/{vehicle_id}")
+
+    first = await client.get(
+        "/api/v1/fitment/parts", params={"make": "Nissan", "limit": 2, "include_total": True}
+    )
+    assert len(first.json()) == 2
+    assert first.headers["X-Total-Count"] == "3"
+    second = await client.get(
+        "/api/v1/fitment/parts",
+        params={"make": "Nissan", "limit": 2, "cursor": first.headers["X-Next-Cursor"]},
+    )
+    assert len(second.json()) == 1
+    assert "X-Next-Cursor" not in second.headers
+
+
+@pytest.mark.asyncio
+async def test_bulk_link_and_unlink(client: AsyncClient, create_part):
+    part_id = await create_part("BR-1", system="Brakes")
+    other_part = await create_part("BR-2", system="Brakes")
+    vehicle_ids = [await _vehicle(client, from_year=2018 + i) for i in range(3)]
+
+    # Warm the fitment cache to check it is invalidated
+    await client.get(f"/api/v1/vehicles/{vehicle_ids[0]}/parts")
+
+    linked = await client.post(
+        "/api/v1/fitment/links", json={"part_id": part_id, "vehicle_ids": vehicle_ids}
+    )
+    assert linked.json() == {"requested": 3, "created": 3, "removed": 0}
+    again = await client.post(
+        "/api/v1/fitment/links",
+        json={
+            "part_id": part_id,
+            "vehicle_ids": vehicle_ids[:1],
+            "links": [{"part_id": other_part, "vehicle_id": vehicle_ids[0]}],
+        },
+    )
+    assert again.json()["created"] == 1
+    fitted = (await client.get(f"/api/v1/vehicles/{vehicle_ids[0]}/parts")).json()
+    assert {part["id"] for part in fitted} == {part_id, other_part}
+
+    unlinked = await client.post(
+        "/api/v1/fitment/links:delete",
+        json={"links": [{"part_id": part_id, "vehicle_id": v} for v in vehicle_ids[:2]]},
+    )
+    assert unlinked.json() == {"requested": 2, "created": 0, "removed": 2}
+    fitted = (await client.get(f"/api/v1/vehicles/{vehicle_ids[0]}/parts")).json()
+    assert [part["id"] for part in fitted] == [other_part]
+
+
+@pytest.mark.asyncio
+async def test_bulk_link_rejects_unknown_ids(client: AsyncClient, create_part):
+    part_id = await create_part("BR-1", system="Brakes")
+    unknown = "00000000-0000-0000-0000-000000000000"
+    response = await client.post(
+        "/api/v1/fitment/links", json={"part_id": part_id, "vehicle_ids": [unknown]}
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"]["missing_vehicle_ids"] == [unknown]
+
+    invalid = await client.post("/api/v1/fitment/links", json={"vehicle_ids": [unknown]})
+    assert invalid.status_code == 422
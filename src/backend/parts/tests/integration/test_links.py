@@ -38,6 +38,11 @@ async def test_link_lifecycle(client: AsyncClient):
     v_parts_resp = await client.get(f"/api/v1/vehicles/{vid}/parts")
     assert v_parts_resp.status_code == 200
     assert any(p["id"] == pid for p in v_parts_resp.json())
+    etag = v_parts_resp.headers["etag"]
+    not_modified = await client.get(
+        f"/api/v1/vehicles/{vid}/parts", headers={"If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
 
     # 5. View vehicles for part
     p_vehs_resp = await client.get(f"/api/v1/parts/{pid}/vehicles")
@@ -49,5 +54,57 @@ async def test_link_lifecycle(client: AsyncClient):
     assert unlink_resp.status_code == 204
 
     # 7. Verify unlinked
-    v_parts_gone = await client.get(f"/api/v1/vehicles/{vid}/parts")
+    v_parts_gone = await client.get(
+        f"/api/v1/vehicles/{vid}/parts", headers={"If-None-Match": etag}
+    )
+    assert v_parts_gone.status_code == 200
     assert not any(p["id"] == pid for p in v_parts_gone.json())
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoints(client: AsyncClient):
+    pids = []
+    for i in range(3):
+        resp = await client.post(
+            "/api/v1/parts/",
+            json={
+                "manufacturer_part_number": f"B{i}",
+                "description": f"Batch {i}",
+                "part_type": "T1",
+                "system": "S1",
+            },
+        )
+        pids.append(resp.json()["id"])
+    v_resp = await client.post(
+        "/api/v1/vehicles/",
+        json={
+            "make": "M1",
+            "model": "M1",
+            "from_year": 2020,
+            "power_type": "EV",
+            "body_style": "SUV",
+            "drive_type": "AWD",
+        },
+    )
+    vid = v_resp.json()["id"]
+    l_resp = await client.post("/api/v1/locations/", json={"name": "Bay", "address": "1 Road"})
+    lid = l_resp.json()["id"]
+    await client.post(f"/api/v1/parts/{pids[0]}/vehicles/{vid}")
+    await client.post(f"/api/v1/parts/{pids[1]}/stock", json={"location_id": lid, "quantity": 4})
+
+    unknown = "00000000-0000-0000-0000-000000000000"
+    ids = [pids[2], unknown, pids[0], pids[2]]
+
+    parts = (await client.post("/api/v1/parts/batch-get", json={"ids": ids})).json()
+    assert [p["id"] for p in parts] == [pids[2], pids[0]]
+
+    vehicles = (await client.post("/api/v1/parts/vehicles:batch", json={"ids": pids})).json()
+    assert [v["id"] for v in vehicles[pids[0]]] == [vid]
+    assert vehicles[pids[1]] == [] and vehicles[pids[2]] == []
+
+    stock = (await client.post("/api/v1/parts/stock:batch", json={"ids": pids})).json()
+    assert [s["quantity"] for s in stock[pids[1]]] == [4]
+    assert stock[pids[0]] == []
+
+    empty = await client.post("/api/v1/parts/stock:batch", json={"ids": []})
+    assert empty.status_code == 422
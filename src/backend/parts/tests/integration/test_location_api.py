@@ -31,3 +31,26 @@ async def test_location_crud_lifecycle(client: AsyncClient):
     # 6. Read (Verify 404)
     get_gone = await client.get(f"/api/v1/locations/{lid}")
     assert get_gone.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_location_reads_are_cached_and_invalidated(client: AsyncClient):
+    lid = (
+        await client.post("/api/v1/locations/", json={"name": "Depot", "address": "1 Yard"})
+    ).json()["id"]
+
+    before = (await client.get("/health/caches")).json()["local"]["locations"]
+    await client.get(f"/api/v1/locations/{lid}")
+    await client.get(f"/api/v1/locations/{lid}")
+    await client.get("/api/v1/locations/")
+    after = (await client.get("/health/caches")).json()["local"]["locations"]
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 2
+
+    await client.patch(f"/api/v1/locations/{lid}", json={"name": "Main Depot"})
+    assert (await client.get(f"/api/v1/locations/{lid}")).json()["name"] == "Main Depot"
+    assert (await client.get("/api/v1/locations/")).json()[0]["name"] == "Main Depot"
+
+    await client.delete(f"/api/v1/locations/{lid}")
+    assert (await client.get(f"/api/v1/locations/{lid}")).status_code == 404
+    assert (await client.get("/api/v1/locations/")).json() == []
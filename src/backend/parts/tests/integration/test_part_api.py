@@ -1,5 +1,15 @@
+import csv
+import io
+import json
+from uuid import UUID
+
 import pytest
+from conftest import engine
 from httpx import AsyncClient
+from parts.core.pagination import encode_cursor
+from parts.db.models import Part
+from sqlalchemy import select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 @pytest.mark.asyncio
@@ -66,6 +76,79 @@ async def test_update_part(client: AsyncClient):
     assert data["last_known_price"] == 99.99
 
 
+@pytest.mark.asyncio
+async def test_get_part_is_cached_until_updated(client: AsyncClient):
+    create_resp = await client.post(
+        "/api/v1/parts/",
+        json={
+            "manufacturer_part_number": "C-1",
+            "description": "Old",
+            "part_type": "Type",
+            "system": "Sys",
+        },
+    )
+    part_id = create_resp.json()["id"]
+
+    before = (await client.get("/health/caches")).json()["shared"]["parts"]
+    await client.get(f"/api/v1/parts/{part_id}")
+    assert (await client.get(f"/api/v1/parts/{part_id}")).json()["description"] == "Old"
+    after = (await client.get("/health/caches")).json()["shared"]["parts"]
+    assert after["hits"] - before["hits"] == 1
+
+    await client.patch(f"/api/v1/parts/{part_id}", json={"description": "New"})
+    assert (await client.get(f"/api/v1/parts/{part_id}")).json()["description"] == "New"
+
+
+@pytest.mark.asyncio
+async def test_get_part_is_conditional(client: AsyncClient):
+    create_resp = await client.post(
+        "/api/v1/parts/",
+        json={
+            "manufacturer_part_number": "E-1",
+            "description": "Old",
+            "part_type": "Type",
+            "system": "Sys",
+        },
+    )
+    part_id = create_resp.json()["id"]
+    assert create_resp.json()["version"] == 1
+
+    first = await client.get(f"/api/v1/parts/{part_id}")
+    etag = first.headers["etag"]
+    unchanged = await client.get(f"/api/v1/parts/{part_id}", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers["etag"] == etag
+
+    await client.patch(f"/api/v1/parts/{part_id}", json={"description": "New"})
+    changed = await client.get(f"/api/v1/parts/{part_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["version"] == 2
+    assert changed.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_update_part_conflicts_with_concurrent_write(
+    client: AsyncClient, session: AsyncSession
+):
+    payload = {"manufacturer_part_number": "C-1", "description": "Old"}
+    payload |= {"part_type": "Type", "system": "Sys"}
+    part_id = (await client.post("/api/v1/parts/", json=payload)).json()["id"]
+    # Held by the session's identity map, as within one request
+    read = await session.get(Part, UUID(part_id))
+    assert read.version == 1
+
+    # Another worker updates the row after this session read it
+    async with engine.begin() as conn:
+        await conn.execute(update(Part.__table__).values(description="Theirs", version=2))
+
+    resp = await client.patch(f"/api/v1/parts/{part_id}", json={"description": "Mine"})
+    assert resp.status_code == 409
+    await session.rollback()
+    async with engine.connect() as conn:
+        row = (await conn.execute(select(Part.__table__))).one()
+    assert (row.description, row.version) == ("Theirs", 2)
+
+
 @pytest.mark.asyncio
 async def test_delete_part(client: AsyncClient):
     # Create one first
@@ -87,3 +170,186 @@ async def test_delete_part(client: AsyncClient):
     # Verify it's gone
     get_resp = await client.get(f"/api/v1/parts/{part_id}")
     assert get_resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_list_parts_keyset_pagination(client: AsyncClient):
+    for i in range(5):
+        await client.post(
+            "/api/v1/parts/",
+            json={
+                "manufacturer_part_number": f"PG-{i}",
+                "description": f"Paged {i}",
+                "part_type": "Type",
+                "system": "Sys",
+            },
+        )
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "include_total": True}
+        if cursor:
+            params["cursor"] = cursor
+        resp = await client.get("/api/v1/parts/", params=params)
+        assert resp.status_code == 200
+        assert resp.headers["X-Total-Count"] == "5"
+        seen.extend(p["internal_part_code"] for p in resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == sorted(seen)
+    assert len(seen) == 5
+
+
+@pytest.mark.asyncio
+async def test_list_parts_pages_through_parts_without_a_code(
+    client: AsyncClient, session: AsyncSession
+):
+    ids = []
+    for i in range(5):
+        resp = await client.post(
+            "/api/v1/parts/",
+            json={
+                "manufacturer_part_number": f"NC-{i}",
+                "description": f"Uncoded {i}",
+                "part_type": "Type",
+                "system": "Sys",
+            },
+        )
+        ids.append(resp.json()["id"])
+    # Parts created before codes were allocated
+    uncoded = [UUID(part_id) for part_id in ids[:3]]
+    await session.exec(update(Part).where(Part.id.in_(uncoded)).values(internal_part_code=None))
+    await session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = await client.get("/api/v1/parts/", params=params)
+        assert resp.status_code == 200
+        seen.extend((p["internal_part_code"], p["id"]) for p in resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert len(seen) == 5
+    assert [code for code, _ in seen[3:]] == [None, None]
+    assert [part_id for _, part_id in seen[2:]] == sorted(part_id for _, part_id in seen[2:])
+
+
+@pytest.mark.asyncio
+async def test_list_cursors_are_type_checked(client: AsyncClient):
+    uuid = "00000000-0000-0000-0000-000000000001"
+    for path, values in (
+        ("/api/v1/parts/", [1, uuid]),
+        ("/api/v1/vehicles/", [None, None, uuid]),
+        ("/api/v1/vehicles/", ["Nissan", 3, uuid]),
+        ("/api/v1/stock/ledger", ["12"]),
+        ("/api/v1/stock/ledger", [True]),
+    ):
+        resp = await client.get(path, params={"limit": 2, "cursor": encode_cursor(values)})
+        assert resp.status_code == 400, (path, values)
+
+
+@pytest.mark.asyncio
+async def test_list_parts_field_projection(client: AsyncClient):
+    await client.post(
+        "/api/v1/parts/",
+        json={
+            "manufacturer_part_number": "PRJ-1",
+            "description": "Projected",
+            "part_type": "Type",
+            "system": "Sys",
+        },
+    )
+
+    resp = await client.get("/api/v1/parts/", params={"fields": "id,description"})
+    assert resp.status_code == 200
+    assert set(resp.json()[0]) == {"id", "description"}
+    assert "X-Total-Count" not in resp.headers
+
+    resp = await client.get("/api/v1/parts/", params={"fields": "id,secret"})
+    assert resp.status_code == 400
+
+    resp = await client.get("/api/v1/parts/", params={"cursor": "not-a-cursor"})
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_export_parts_streams_ndjson_and_csv(client: AsyncClient):
+    p_resp = await client.post(
+        "/api/v1/parts/",
+        json={
+            "manufacturer_part_number": "EXP-1",
+            "description": "Exported, with comma",
+            "part_type": "Type",
+            "system": "Sys",
+        },
+    )
+    pid = p_resp.json()["id"]
+    v_resp = await client.post(
+        "/api/v1/vehicles/",
+        json={
+            "make": "Kia",
+            "model": "Niro",
+            "from_year": 2019,
+            "power_type": "EV",
+            "body_style": "SUV",
+            "drive_type": "FWD",
+        },
+    )
+    await client.post(f"/api/v1/parts/{pid}/vehicles/{v_resp.json()['id']}")
+
+    resp = await client.get(
+        "/api/v1/parts/export", params={"format": "ndjson", "include": ["vehicles", "stock"]}
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["id"] == pid
+    assert [v["make"] for v in lines[0]["vehicles"]] == ["Kia"]
+    assert lines[0]["stock"] == []
+
+    resp = await client.get("/api/v1/parts/export", params={"format": "csv"})
+    assert resp.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert len(rows) == 1
+    assert rows[0]["description"] == "Exported, with comma"
+    assert "vehicles" not in rows[0]
+
+
+@pytest.mark.asyncio
+async def test_lookup_part_by_normalised_number(client: AsyncClient):
+    part = {
+        "manufacturer_part_number": "BOSCH 0 986 494 104",
+        "oe_part_number": "1K0-615-301-AA",
+        "description": "Brake disc",
+        "part_type": "Brake Disc",
+        "system": "Brakes",
+    }
+    created = (await client.post("/api/v1/parts/", json=part)).json()
+
+    numbers = ("1k0615301aa", "1K0 615 301 AA", "bosch0986494104", created["internal_part_code"])
+    for number in numbers:
+        resp = await client.get("/api/v1/parts/lookup", params={"number": number})
+        assert resp.status_code == 200
+        assert [p["id"] for p in resp.json()] == [created["id"]], number
+
+    # Prefixes are not exact matches
+    resp = await client.get("/api/v1/parts/lookup", params={"number": "1K0-615"})
+    assert resp.json() == []
+
+    # The keys follow updates
+    await client.patch(f"/api/v1/parts/{created['id']}", json={"oe_part_number": "5Q0.615.301"})
+    resp = await client.get("/api/v1/parts/lookup", params={"number": "1k0615301aa"})
+    assert resp.json() == []
+    resp = await client.get("/api/v1/parts/lookup", params={"number": "5q0615301"})
+    assert [p["id"] for p in resp.json()] == [created["id"]]
+
+    # Search finds a pasted number in any format
+    resp = await client.get("/api/v1/search/", params={"q": "5Q0615301"})
+    assert [p["id"] for p in resp.json()["parts"]] == [created["id"]]
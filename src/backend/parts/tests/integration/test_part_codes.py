@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from parts.db.models import Part
+from parts.db.sequences import allocate_internal_part_codes, reserve_sequence
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+PAYLOAD = {
+    "manufacturer_part_number": "SEQ-1",
+    "description": "Sequenced",
+    "part_type": "Filter",
+    "system": "Engine",
+    "last_known_supplier": "Mann",
+}
+
+
+@pytest.mark.asyncio
+async def test_codes_are_not_reissued_after_delete(client: AsyncClient):
+    first = (await client.post("/api/v1/parts/", json=PAYLOAD)).json()
+    await client.delete(f"/api/v1/parts/{first['id']}")
+    second = (await client.post("/api/v1/parts/", json=PAYLOAD)).json()
+
+    assert first["internal_part_code"] == "MAN-ENG-FIL-00001"
+    assert second["internal_part_code"] == "MAN-ENG-FIL-00002"
+
+
+@pytest.mark.asyncio
+async def test_sequences_are_per_prefix(client: AsyncClient):
+    await client.post("/api/v1/parts/", json=PAYLOAD)
+    other = (await client.post("/api/v1/parts/", json={**PAYLOAD, "system": "Cabin"})).json()
+    assert other["internal_part_code"] == "MAN-CAB-FIL-00001"
+
+
+@pytest.mark.asyncio
+async def test_first_reservation_continues_existing_codes(session: AsyncSession):
+    session.add(Part(**PAYLOAD, internal_part_code="MAN-ENG-FIL-00041"))
+    await session.commit()
+
+    codes = await allocate_internal_part_codes(
+        session, ["MAN-ENG-FIL", "MAN-ENG-FIL", "BOS-BRA-PAD"]
+    )
+    assert codes == ["MAN-ENG-FIL-00042", "MAN-ENG-FIL-00043", "BOS-BRA-PAD-00001"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reservations_do_not_overlap(session: AsyncSession):
+    async def reserve():
+        async with AsyncSession(session.bind) as own_session:
+            first = await reserve_sequence(own_session, "CON-CUR-ENT", 10)
+            await own_session.commit()
+            return first
+
+    firsts = await asyncio.gather(*(reserve() for _ in range(8)))
+    assert sorted(firsts) == [1 + 10 * i for i in range(8)]
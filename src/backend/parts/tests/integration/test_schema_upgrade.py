@@ -0,0 +1,83 @@
+import pytest
+from conftest import engine
+from httpx import AsyncClient
+from sqlalchemy import inspect
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Stored UUIDs, as the sqlite dialect writes them
+A, B, C, PART, MAIN, VAN = (f"{n:032x}" for n in range(1, 7))
+
+
+async def _upgrade(*statements: str):
+    # Turns the fresh schema into an older one, then runs the startup `create_all`
+    async with engine.begin() as conn:
+        for statement in statements:
+            await conn.exec_driver_sql(statement)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+
+@pytest.mark.asyncio
+async def test_create_all_adds_version_columns(session: AsyncSession):
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql(
+            "INSERT INTO location (id, name, address, version) VALUES ('l1', 'Main', 'x', 1)"
+        )
+    await _upgrade(*(f"ALTER TABLE {name} DROP COLUMN version" for name in ("part", "location")))
+
+    async with engine.connect() as conn:
+        columns = await conn.run_sync(lambda c: inspect(c).get_columns("part"))
+        versions = (await conn.exec_driver_sql("SELECT version FROM location")).scalars().all()
+    assert "version" in {column["name"] for column in columns}
+    assert versions == [1]
+
+
+@pytest.mark.asyncio
+async def test_create_all_adds_indexes_of_existing_tables(session: AsyncSession):
+    await _upgrade("DROP INDEX ix_vehicle_fitment")
+
+    async with engine.connect() as conn:
+        indexes = await conn.run_sync(lambda c: inspect(c).get_indexes("vehicle"))
+    assert "ix_vehicle_fitment" in {index["name"] for index in indexes}
+
+
+@pytest.mark.asyncio
+async def test_create_all_merges_duplicate_stock_levels(session: AsyncSession):
+    await _upgrade(
+        "DROP INDEX ux_stocklevel_part_location",
+        "DROP INDEX ix_stocklevel_location_stock",
+        "ALTER TABLE stocklevel DROP COLUMN reserved",
+        "INSERT INTO stocklevel (id, part_id, location_id, quantity, version) VALUES "
+        f"('{A}', '{PART}', '{MAIN}', 2, 1), ('{B}', '{PART}', '{MAIN}', 3, 4), "
+        f"('{C}', '{PART}', '{VAN}', 1, 1)",
+    )
+
+    async with engine.connect() as conn:
+        rows = (
+            await conn.exec_driver_sql(
+                "SELECT id, quantity, reserved, version FROM stocklevel ORDER BY id"
+            )
+        ).all()
+        indexes = await conn.run_sync(lambda c: inspect(c).get_indexes("stocklevel"))
+    assert [tuple(row) for row in rows] == [(A, 5, 0, 5), (C, 1, 0, 1)]
+    assert {"ux_stocklevel_part_location", "ix_stocklevel_location_stock"} <= {
+        index["name"] for index in indexes
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_all_adds_and_backfills_part_number_keys(client: AsyncClient):
+    payload = {"manufacturer_part_number": "bp-123", "oe_part_number": "1K0 615 301"}
+    payload |= {"description": "Brake pad", "part_type": "Pad", "system": "Brakes"}
+    part_id = (await client.post("/api/v1/parts/", json=payload)).json()["id"]
+    keys = ("internal_part_code_key", "oe_part_number_key", "manufacturer_part_number_key")
+    await _upgrade(
+        *(f"DROP INDEX ix_part_{key}" for key in keys),
+        *(f"ALTER TABLE part DROP COLUMN {key}" for key in keys),
+    )
+
+    async with engine.connect() as conn:
+        row = (await conn.exec_driver_sql(f"SELECT {', '.join(keys)} FROM part")).one()
+    assert row[1:] == ("1K0615301", "BP123")
+    resp = await client.get("/api/v1/parts/lookup", params={"number": "1k0-615-301"})
+    assert [part["id"] for part in resp.json()] == [part_id]
@@ -1,5 +1,13 @@
 import pytest
+from conftest import engine
+from core.shared_cache import invalidation_bus
 from httpx import AsyncClient
+from parts.core import catalogue_index
+from parts.core.fuzzy import fuzzy_search
+from parts.db.models import Part
+from parts.db.search_index import search_parts
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 @pytest.mark.asyncio
@@ -41,3 +49,261 @@ async def test_search(client: AsyncClient):
     assert resp3.status_code == 200
     assert len(resp3.json()["parts"]) == 0
     assert len(resp3.json()["vehicles"]) == 0
+
+
+@pytest.mark.asyncio
+async def test_search_index_tracks_writes(client: AsyncClient):
+    create_resp = await client.post(
+        "/api/v1/parts/",
+        json={
+            "manufacturer_part_number": "1K0-615-301-AA",
+            "description": "Brake Disc",
+            "part_type": "Disc",
+            "system": "Braking",
+        },
+    )
+    pid = create_resp.json()["id"]
+
+    # Part number fragments and word prefixes both match
+    resp = await client.get("/api/v1/search/", params={"q": "615-301"})
+    assert [p["id"] for p in resp.json()["parts"]] == [pid]
+    resp = await client.get("/api/v1/search/", params={"q": "brak"})
+    assert [p["id"] for p in resp.json()["parts"]] == [pid]
+
+    # Updates replace the indexed text
+    await client.patch(f"/api/v1/parts/{pid}", json={"description": "Rotor"})
+    resp = await client.get("/api/v1/search/", params={"q": "disc"})
+    assert resp.json()["parts"] == []
+    resp = await client.get("/api/v1/search/", params={"q": "rotor"})
+    assert len(resp.json()["parts"]) == 1
+
+    # Deletes remove the part from the index
+    await client.delete(f"/api/v1/parts/{pid}")
+    resp = await client.get("/api/v1/search/", params={"q": "rotor"})
+    assert resp.json()["parts"] == []
+
+
+LEGACY_PART_FTS = (
+    "DROP TRIGGER part_fts_ai",
+    "DROP TRIGGER part_fts_ad",
+    "DROP TRIGGER part_fts_au",
+    "DROP TABLE part_fts",
+    "DROP TABLE part_fts_doc",
+    "CREATE VIRTUAL TABLE part_fts USING fts5(description, content='part', content_rowid='rowid')",
+)
+
+
+@pytest.mark.asyncio
+async def test_search_index_upgrades_rowid_keyed_index(client: AsyncClient, session: AsyncSession):
+    payload = {"manufacturer_part_number": "V-1", "description": "Spark plug"}
+    payload |= {"part_type": "Ignition", "system": "Engine"}
+    pid = (await client.post("/api/v1/parts/", json=payload)).json()["id"]
+
+    # An index created before documents had their own stable id
+    async with engine.begin() as conn:
+        for statement in LEGACY_PART_FTS:
+            await conn.exec_driver_sql(statement)
+        await conn.run_sync(SQLModel.metadata.create_all)
+    # VACUUM may renumber the implicit rowids of tables without an INTEGER PRIMARY KEY
+    async with engine.connect() as conn:
+        autocommit = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await autocommit.exec_driver_sql("VACUUM")
+        ddl = (await autocommit.exec_driver_sql("SELECT sql FROM sqlite_master")).scalars().all()
+
+    assert not any("content_rowid" in (sql or "") for sql in ddl)
+    assert [str(part.id) for part in await search_parts(session, "spark", 10)] == [pid]
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_better_matches_first(client: AsyncClient):
+    for mpn, description in [("R-1", "Wiper arm"), ("R-2", "Wiper blade, wiper motor")]:
+        await client.post(
+            "/api/v1/parts/",
+            json={
+                "manufacturer_part_number": mpn,
+                "description": description,
+                "part_type": "Wiper",
+                "system": "Body",
+            },
+        )
+
+    resp = await client.get("/api/v1/search/", params={"q": "wiper", "limit": 1})
+    parts = resp.json()["parts"]
+    assert len(parts) == 1
+    assert parts[0]["manufacturer_part_number"] == "R-2"
+
+
+@pytest.mark.asyncio
+async def test_search_with_stock(client: AsyncClient):
+    part_ids = []
+    for mpn in ("PAD-1", "PAD-2"):
+        resp = await client.post(
+            "/api/v1/parts/",
+            json={
+                "manufacturer_part_number": mpn,
+                "description": "Brake pad",
+                "part_type": "Pad",
+                "system": "Brakes",
+            },
+        )
+        part_ids.append(resp.json()["id"])
+    main = (await client.post("/api/v1/locations/", json={"name": "Main", "address": "x"})).json()
+    van = (await client.post("/api/v1/locations/", json={"name": "Van", "address": "y"})).json()
+    movements = [
+        {"type": "receive", "part_id": part_ids[0], "location_id": main["id"], "quantity": 3},
+        {"type": "receive", "part_id": part_ids[0], "location_id": van["id"], "quantity": 2},
+        {"type": "reserve", "part_id": part_ids[0], "location_id": van["id"], "quantity": 2},
+    ]
+    await client.post("/api/v1/stock/movements", json={"movements": movements})
+
+    plain = (await client.get("/api/v1/search/", params={"q": "pad"})).json()
+    assert all(part["stock"] is None for part in plain["parts"])
+
+    resp = await client.get("/api/v1/search/", params={"q": "pad", "include_stock": True})
+    stock = {part["id"]: part["stock"] for part in resp.json()["parts"]}
+    assert stock[part_ids[0]] == {"quantity": 5, "reserved": 2, "available": 3}
+    assert stock[part_ids[1]] == {"quantity": 0, "reserved": 0, "available": 0}
+
+    resp = await client.get("/api/v1/search/", params={"q": "pad", "in_stock_only": True})
+    assert [part["id"] for part in resp.json()["parts"]] == [part_ids[0]]
+
+    # Everything at the van is reserved
+    resp = await client.get(
+        "/api/v1/search/",
+        params={"q": "pad", "in_stock_only": True, "location_id": van["id"]},
+    )
+    assert resp.json()["parts"] == []
+
+
+@pytest.mark.asyncio
+async def test_suggest(client: AsyncClient):
+    part = {
+        "manufacturer_part_number": "MPN-7788",
+        "oe_part_number": "1K0-615-301",
+        "description": "Front brake disc",
+        "part_type": "Brake Disc",
+        "system": "Brakes",
+    }
+    vehicle = {
+        "make": "Volkswagen",
+        "model": "Golf",
+        "from_year": 2020,
+        "power_type": "MHEV",
+        "body_style": "Hatchback",
+        "drive_type": "FWD",
+    }
+    part_id = (await client.post("/api/v1/parts/", json=part)).json()["id"]
+    vehicle_id = (await client.post("/api/v1/vehicles/", json=vehicle)).json()["id"]
+
+    resp = await client.get("/api/v1/search/suggest", params={"q": "1k0615"})
+    assert resp.status_code == 200
+    assert resp.json() == [
+        {"kind": "part", "id": part_id, "value": "1K0-615-301", "label": "Front brake disc"}
+    ]
+    resp = await client.get("/api/v1/search/suggest", params={"q": "volkswagen g"})
+    assert [s["id"] for s in resp.json()] == [vehicle_id]
+
+    # Writes after the index is loaded are applied to it
+    await client.patch(f"/api/v1/parts/{part_id}", json={"oe_part_number": "5Q0-615-301"})
+    resp = await client.get("/api/v1/search/suggest", params={"q": "1k0615"})
+    assert resp.json() == []
+    resp = await client.get("/api/v1/search/suggest", params={"q": "5q0", "kinds": "part"})
+    assert [s["id"] for s in resp.json()] == [part_id]
+
+    await client.delete(f"/api/v1/vehicles/{vehicle_id}")
+    resp = await client.get("/api/v1/search/suggest", params={"q": "golf"})
+    assert resp.json() == []
+
+
+@pytest.mark.asyncio
+async def test_suggest_reloads_after_a_lost_message(
+    client: AsyncClient, session: AsyncSession, monkeypatch
+):
+    monkeypatch.setattr(catalogue_index, "CATALOGUE_CHECK_SECONDS", 0)
+    payload = {"manufacturer_part_number": "LOST-1", "description": "Lost"}
+    payload |= {"part_type": "Type", "system": "Sys"}
+    await client.post("/api/v1/parts/", json=payload)
+    assert len((await client.get("/api/v1/search/suggest", params={"q": "lost"})).json()) == 1
+
+    # Another worker's write whose pub/sub message never arrived
+    session.add(Part(**{**payload, "manufacturer_part_number": "LOST-2"}))
+    await session.commit()
+    await invalidation_bus.backend.incr(catalogue_index.GENERATION_KEY)
+
+    # The first check may see the message in flight, the next one reloads
+    for expected in (1, 2):
+        resp = await client.get("/api/v1/search/suggest", params={"q": "lost"})
+        assert len(resp.json()) == expected
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_index_reloads_after_a_lost_message(
+    client: AsyncClient, session: AsyncSession, monkeypatch
+):
+    monkeypatch.setattr(catalogue_index, "CATALOGUE_CHECK_SECONDS", 0)
+    payload = {"manufacturer_part_number": "F-1", "description": "Gasket"}
+    payload |= {"part_type": "Seal", "system": "Engine"}
+    await client.post("/api/v1/parts/", json=payload)
+    assert len(await fuzzy_search(session, "part", "gaskte", 10)) == 1
+
+    # Another worker's write whose pub/sub message never arrived
+    session.add(Part(**{**payload, "manufacturer_part_number": "F-2"}))
+    await session.commit()
+    await invalidation_bus.backend.incr(catalogue_index.GENERATION_KEY)
+
+    # The first check may see the message in flight, the next one reloads
+    for expected in (1, 2):
+        assert len(await fuzzy_search(session, "part", "gaskte", 10)) == expected
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_search(client: AsyncClient):
+    parts = [
+        ("1K0-615-301", "Brake pad set, front"),
+        ("1K0-698-151", "Brake pad set, rear"),
+        ("5Q0-955-427", "Wiper blade"),
+    ]
+    part_ids = []
+    for oe, description in parts:
+        resp = await client.post(
+            "/api/v1/parts/",
+            json={
+                "manufacturer_part_number": f"MPN-{oe}",
+                "oe_part_number": oe,
+                "description": description,
+                "part_type": "Pad",
+                "system": "Brakes",
+            },
+        )
+        part_ids.append(resp.json()["id"])
+
+    # The standard search needs every word as typed
+    resp = await client.get("/api/v1/search/", params={"q": "brak pda"})
+    assert resp.json()["parts"] == []
+
+    resp = await client.get("/api/v1/search/", params={"q": "brak pad", "mode": "fuzzy"})
+    hits = resp.json()["parts"]
+    assert {hit["id"] for hit in hits} == set(part_ids[:2])
+    assert all(hit["score"] > 0 for hit in hits)
+
+    # Swapped digits in a part number
+    resp = await client.get("/api/v1/search/", params={"q": "1k0651301", "mode": "fuzzy"})
+    assert resp.json()["parts"][0]["id"] == part_ids[0]
+
+    page = await client.get(
+        "/api/v1/search/", params={"q": "brak pad", "mode": "fuzzy", "limit": 1, "offset": 1}
+    )
+    assert [hit["id"] for hit in page.json()["parts"]] == [hits[1]["id"]]
+
+    # Writes reach the in-process index
+    await client.patch(f"/api/v1/parts/{part_ids[2]}", json={"description": "Brake pad shim"})
+    resp = await client.get("/api/v1/search/", params={"q": "brak pad", "mode": "fuzzy"})
+    assert part_ids[2] in {hit["id"] for hit in resp.json()["parts"]}
+
+    location = (await client.post("/api/v1/locations/", json={"name": "M", "address": "x"})).json()
+    movement = {"type": "receive", "part_id": part_ids[1], "location_id": location["id"]}
+    await client.post("/api/v1/stock/movements", json={"movements": [{**movement, "quantity": 1}]})
+    resp = await client.get(
+        "/api/v1/search/", params={"q": "brak pad", "mode": "fuzzy", "in_stock_only": True}
+    )
+    assert [hit["id"] for hit in resp.json()["parts"]] == [part_ids[1]]
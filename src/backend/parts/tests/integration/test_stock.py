@@ -38,3 +38,119 @@ async def test_stock_level_lifecycle(client: AsyncClient):
         f"/api/v1/parts/{pid}/stock", json={"location_id": lid, "quantity": 5}
     )
     assert update_stock_resp.json()["quantity"] == 5
+
+
+@pytest.mark.asyncio
+async def test_stock_levels_are_conditional(client: AsyncClient):
+    p_resp = await client.post(
+        "/api/v1/parts/",
+        json={
+            "manufacturer_part_number": "P-ETAG",
+            "description": "Polled Part",
+            "part_type": "T1",
+            "system": "S1",
+        },
+    )
+    pid = p_resp.json()["id"]
+    l_resp = await client.post("/api/v1/locations/", json={"name": "Bay", "address": "1 Road"})
+    lid = l_resp.json()["id"]
+    await client.post(f"/api/v1/parts/{pid}/stock", json={"location_id": lid, "quantity": 1})
+
+    first = await client.get(f"/api/v1/parts/{pid}/stock")
+    etag = first.headers["etag"]
+    unchanged = await client.get(f"/api/v1/parts/{pid}/stock", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+
+    await client.post(f"/api/v1/parts/{pid}/stock", json={"location_id": lid, "quantity": 2})
+    changed = await client.get(f"/api/v1/parts/{pid}/stock", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()[0]["quantity"] == 2
+    assert changed.headers["etag"] != etag
+
+
+async def _part_and_locations(client: AsyncClient, count: int = 2):
+    p_resp = await client.post(
+        "/api/v1/parts/",
+        json={
+            "manufacturer_part_number": "P-MOVE",
+            "description": "Moved Part",
+            "part_type": "T1",
+            "system": "S1",
+        },
+    )
+    locations = []
+    for i in range(count):
+        l_resp = await client.post("/api/v1/locations/", json={"name": f"L{i}", "address": "x"})
+        locations.append(l_resp.json()["id"])
+    return p_resp.json()["id"], locations
+
+
+@pytest.mark.asyncio
+async def test_stock_movements(client: AsyncClient):
+    pid, (a, b) = await _part_and_locations(client)
+
+    def move(kind, quantity, location, **extra):
+        return {"type": kind, "part_id": pid, "location_id": location, "quantity": quantity} | extra
+
+    resp = await client.post(
+        "/api/v1/stock/movements",
+        json={
+            "movements": [
+                move("receive", 10, a),
+                move("reserve", 4, a),
+                move("transfer", 5, a, to_location_id=b),
+                move("consume", 2, b),
+            ]
+        },
+    )
+    assert resp.status_code == 200
+    levels = {level["location_id"]: level for level in resp.json()}
+    assert (levels[a]["quantity"], levels[a]["reserved"]) == (5, 4)
+    assert (levels[b]["quantity"], levels[b]["reserved"]) == (3, 0)
+
+    # Only one unreserved unit is left at A, so the batch is rejected as a whole
+    rejected = await client.post(
+        "/api/v1/stock/movements",
+        json={"movements": [move("consume", 3, b), move("consume", 2, a)]},
+    )
+    assert rejected.status_code == 409
+    stock = (await client.get(f"/api/v1/parts/{pid}/stock")).json()
+    assert sorted(level["quantity"] for level in stock) == [3, 5]
+
+    # Releasing the reservation first frees the stock within the same batch
+    released = await client.post(
+        "/api/v1/stock/movements",
+        json={"movements": [move("release", 4, a), move("consume", 5, a)]},
+    )
+    assert released.status_code == 200
+    assert (released.json()[0]["quantity"], released.json()[0]["reserved"]) == (0, 0)
+
+    negative = await client.post(
+        "/api/v1/stock/movements",
+        json={"movements": [move("consume", 1, a)], "allow_negative": True},
+    )
+    assert negative.json()[0]["quantity"] == -1
+
+
+@pytest.mark.asyncio
+async def test_stock_movements_validation(client: AsyncClient):
+    pid, (a,) = await _part_and_locations(client, count=1)
+    unknown = "00000000-0000-0000-0000-000000000000"
+
+    missing = await client.post(
+        "/api/v1/stock/movements",
+        json={
+            "movements": [
+                {"type": "receive", "part_id": pid, "location_id": unknown, "quantity": 1}
+            ]
+        },
+    )
+    assert missing.status_code == 404
+    assert missing.json()["detail"]["missing_location_ids"] == [unknown]
+
+    no_destination = await client.post(
+        "/api/v1/stock/movements",
+        json={"movements": [{"type": "transfer", "part_id": pid, "location_id": a, "quantity": 1}]},
+    )
+    assert no_destination.status_code == 422
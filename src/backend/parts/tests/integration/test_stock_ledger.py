@@ -0,0 +1,158 @@
+import asyncio
+from datetime import UTC, datetime, timedelta, timezone
+
+import pytest
+from conftest import engine
+from httpx import AsyncClient
+from parts.core import stock
+from parts.db.models import StockLedgerEntry, StockSnapshot, StockSnapshotLevel
+from sqlalchemy import event
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+async def _setup(client: AsyncClient) -> tuple[str, str]:
+    p_resp = await client.post(
+        "/api/v1/parts/",
+        json={
+            "manufacturer_part_number": "P-LEDGER",
+            "description": "Ledger Part",
+            "part_type": "T1",
+            "system": "S1",
+        },
+    )
+    l_resp = await client.post("/api/v1/locations/", json={"name": "Stores", "address": "x"})
+    return p_resp.json()["id"], l_resp.json()["id"]
+
+
+async def _move(client: AsyncClient, kind: str, quantity: int, pid: str, lid: str):
+    movement = {"type": kind, "part_id": pid, "location_id": lid, "quantity": quantity}
+    resp = await client.post("/api/v1/stock/movements", json={"movements": [movement]})
+    assert resp.status_code == 200
+    # Keep ledger timestamps apart
+    await asyncio.sleep(0.01)
+
+
+async def _quantity_as_of(client: AsyncClient, at: datetime, pid: str) -> int | None:
+    resp = await client.get(
+        "/api/v1/stock/levels", params={"as_of": at.isoformat(), "part_id": pid}
+    )
+    assert resp.status_code == 200
+    return resp.json()[0]["quantity"] if resp.json() else None
+
+
+@pytest.mark.asyncio
+async def test_ledger_records_every_change(client: AsyncClient):
+    pid, lid = await _setup(client)
+    await _move(client, "receive", 10, pid, lid)
+    await client.post(f"/api/v1/parts/{pid}/stock", json={"location_id": lid, "quantity": 4})
+    await _move(client, "reserve", 1, pid, lid)
+
+    entries = (await client.get("/api/v1/stock/ledger", params={"part_id": pid})).json()
+    assert [(e["movement_type"], e["quantity_delta"], e["reserved_delta"]) for e in entries] == [
+        ("receive", 10, 0),
+        ("count", -6, 0),
+        ("reserve", 0, 1),
+    ]
+    current = (await client.get("/api/v1/stock/levels", params={"part_id": pid})).json()
+    assert (current[0]["quantity"], current[0]["reserved"]) == (4, 1)
+
+
+@pytest.mark.asyncio
+async def test_first_count_creates_the_stock_level(client: AsyncClient):
+    pid, lid = await _setup(client)
+    for quantity in (4, 6):
+        resp = await client.post(
+            f"/api/v1/parts/{pid}/stock", json={"location_id": lid, "quantity": quantity}
+        )
+        assert resp.json()["quantity"] == quantity
+
+    entries = (await client.get("/api/v1/stock/ledger", params={"part_id": pid})).json()
+    assert [(e["movement_type"], e["quantity_delta"]) for e in entries] == [
+        ("count", 4),
+        ("count", 2),
+    ]
+    assert (await client.get(f"/api/v1/parts/{pid}/stock")).json()[0]["version"] == 3
+
+
+@pytest.mark.asyncio
+async def test_stock_as_of_uses_snapshots(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(stock, "STOCK_SNAPSHOT_SETTLE_SECONDS", 0)
+    pid, lid = await _setup(client)
+    before = datetime.now(UTC)
+    await asyncio.sleep(0.01)
+
+    await _move(client, "receive", 10, pid, lid)
+    snapshot = (await client.post("/api/v1/stock/snapshots")).json()
+    assert snapshot["last_entry_id"] >= 1
+    await _move(client, "consume", 3, pid, lid)
+    middle = datetime.now(UTC)
+    await _move(client, "receive", 5, pid, lid)
+
+    assert await _quantity_as_of(client, before, pid) is None
+    assert await _quantity_as_of(client, middle, pid) == 7
+    assert await _quantity_as_of(client, middle.astimezone(timezone(timedelta(hours=5))), pid) == 7
+    assert await _quantity_as_of(client, datetime.now(UTC), pid) == 12
+
+    # A second snapshot builds on the first
+    await client.post("/api/v1/stock/snapshots")
+    await asyncio.sleep(0.01)
+    assert await _quantity_as_of(client, datetime.now(UTC), pid) == 12
+    assert await _quantity_as_of(client, middle, pid) == 7
+
+
+@pytest.mark.asyncio
+async def test_ledger_times_are_bound_as_aware_utc(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(stock, "STOCK_SNAPSHOT_SETTLE_SECONDS", 0)
+    pid, lid = await _setup(client)
+    bound: list[datetime] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        # Values as passed to the statement, before the dialect converts them; raw SQL
+        # has none
+        for params in getattr(context, "compiled_parameters", ()):
+            bound.extend(value for value in params.values() if isinstance(value, datetime))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        await _move(client, "receive", 10, pid, lid)
+        await client.post(f"/api/v1/parts/{pid}/stock", json={"location_id": lid, "quantity": 4})
+        await client.post("/api/v1/stock/snapshots")
+        # Opening balances of a ledger added to an existing database
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("DROP TABLE stockledgerentry")
+            await conn.run_sync(SQLModel.metadata.create_all)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    # Ledger entries, the count, the snapshot's two times and the opening balances
+    assert len(bound) >= 5
+    assert all(value.utcoffset() == timedelta(0) for value in bound)
+    columns = (StockLedgerEntry.created_at, StockSnapshot.taken_at, StockSnapshot.covers_until)
+    assert all(column.type.timezone for column in columns)
+
+
+@pytest.mark.asyncio
+async def test_periodic_snapshots_are_taken_once_and_pruned(
+    client: AsyncClient, session: AsyncSession
+):
+    pid, lid = await _setup(client)
+    await _move(client, "receive", 10, pid, lid)
+    now = datetime.now(UTC)
+    assert await stock.claim_periodic_snapshot(session, 3600, now)
+
+    for days_ago in (100, 95, 1):
+        await stock.take_snapshot(session, now - timedelta(days=days_ago))
+    await session.commit()
+    # Another worker's timer fires shortly after the latest snapshot
+    latest = now - timedelta(days=1)
+    assert not await stock.claim_periodic_snapshot(session, 3600, latest + timedelta(minutes=10))
+    assert await stock.claim_periodic_snapshot(session, 3600, latest + timedelta(hours=1))
+
+    assert await stock.prune_snapshots(session, now, retention_days=90) == 2
+    assert await stock.prune_snapshots(session, now + timedelta(days=200), retention_days=90) == 0
+    await session.commit()
+    kept = (await session.exec(select(StockSnapshot.id))).all()
+    levels = (await session.exec(select(StockSnapshotLevel.snapshot_id))).all()
+    assert len(kept) == 1
+    assert set(levels) <= set(kept)
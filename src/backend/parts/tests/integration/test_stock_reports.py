@@ -0,0 +1,45 @@
+import pytest
+from httpx import AsyncClient
+
+
+@pytest.mark.asyncio
+async def test_stock_reports(client: AsyncClient, create_part):
+    pad = await create_part("PAD", system="Brakes", part_type="Pad")
+    disc = await create_part("DISC", system="Brakes", part_type="Disc")
+    filt = await create_part("FILTER", system="Engine", part_type="Filter")
+    main = (await client.post("/api/v1/locations/", json={"name": "Main", "address": "x"})).json()
+    van = (await client.post("/api/v1/locations/", json={"name": "Van", "address": "y"})).json()
+    await client.post("/api/v1/locations/", json={"name": "Empty", "address": "z"})
+
+    movements = [
+        {"type": "receive", "part_id": pad, "location_id": main["id"], "quantity": 10},
+        {"type": "receive", "part_id": disc, "location_id": main["id"], "quantity": 2},
+        {"type": "reserve", "part_id": disc, "location_id": main["id"], "quantity": 1},
+        {"type": "receive", "part_id": filt, "location_id": van["id"], "quantity": 1},
+    ]
+    await client.post("/api/v1/stock/movements", json={"movements": movements})
+
+    by_location = (await client.get("/api/v1/stock/reports/by-location")).json()
+    rows = [(r["location_name"], r["parts"], r["quantity"], r["reserved"]) for r in by_location]
+    assert rows == [
+        ("Empty", 0, 0, 0),
+        ("Main", 2, 12, 1),
+        ("Van", 1, 1, 0),
+    ]
+
+    by_system = (await client.get("/api/v1/stock/reports/by-category")).json()
+    assert [(r["system"], r["quantity"]) for r in by_system] == [("Brakes", 12), ("Engine", 1)]
+    by_type = (
+        await client.get(
+            "/api/v1/stock/reports/by-category",
+            params={"group_by": ["system", "part_type"], "location_id": main["id"]},
+        )
+    ).json()
+    assert [(r["system"], r["part_type"], r["quantity"]) for r in by_type] == [
+        ("Brakes", "Disc", 2),
+        ("Brakes", "Pad", 10),
+    ]
+
+    low = (await client.get("/api/v1/stock/reports/low-stock", params={"threshold": 1})).json()
+    # Equal availability is ordered by internal part code
+    assert [(r["part_id"], r["available"]) for r in low] == [(disc, 1), (filt, 1)]
@@ -0,0 +1,26 @@
+from uuid import uuid4
+
+from parts.core.conditional import collection_etag, entity_etag, etag_matches
+from starlette.requests import Request
+
+
+def _request(if_none_match: str | None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def test_collection_etag_ignores_order_and_tracks_changes():
+    a, b = uuid4(), uuid4()
+    etag = collection_etag("stock", "p", [(a, 1), (b, 1)])
+    assert collection_etag("stock", "p", [(b, 1), (a, 1)]) == etag
+    assert collection_etag("stock", "p", [(a, 1), (b, 2)]) != etag
+    assert collection_etag("stock", "p", [(a, 1)]) != etag
+
+
+def test_etag_matches():
+    etag = entity_etag("part", "p", 3)
+    assert etag_matches(_request(etag), etag)
+    assert etag_matches(_request(f'"other", W/{etag}'), etag)
+    assert etag_matches(_request("*"), etag)
+    assert not etag_matches(_request(entity_etag("part", "p", 2)), etag)
+    assert not etag_matches(_request(None), etag)
@@ -0,0 +1,47 @@
+from parts.core.fuzzy import TrigramIndex, trigrams
+
+
+def _part(**fields) -> dict:
+    return {"description": None, "notes": None, **fields}
+
+
+def _index() -> TrigramIndex:
+    index = TrigramIndex()
+    index.loaded = True
+    index.upsert("part", "pad", _part(description="Brake pad, front", oe_part_number="1K0-615-301"))
+    index.upsert("part", "disc", _part(description="Brake disc", notes="Fits with new pads"))
+    index.upsert("part", "note", _part(description="Wiper blade", notes="Brake pad kit upsell"))
+    index.upsert("vehicle", "golf", {"make": "Volkswagen", "model": "Golf"})
+    return index
+
+
+def test_trigrams_match_pg_trgm():
+    assert trigrams("Cat") == {"  c", " ca", "cat", "at "}
+    assert trigrams("a-b") == {"  a", " a ", "  b", " b "}
+    assert trigrams(" -- ") == frozenset()
+
+
+def test_typos_and_swapped_digits_match():
+    index = _index()
+    assert [id for id, _ in index.search("part", "brak pad")][:1] == ["pad"]
+    assert [id for id, _ in index.search("part", "1k0651301")] == ["pad"]
+    assert index.search("part", "zzzz") == []
+    assert [id for id, _ in index.search("vehicle", "volkswagon")] == ["golf"]
+
+
+def test_weighted_columns_rank_descriptions_above_notes():
+    ranked = _index().search("part", "brake pad")
+    # Every word matches the description of "pad" and the notes of "note"; only "brake"
+    # matches the description of "disc"
+    assert [id for id, _ in ranked] == ["pad", "disc", "note"]
+    scores = dict(ranked)
+    assert scores["pad"] == 2 * scores["note"]
+
+
+def test_remove_and_reupsert_update_postings():
+    index = _index()
+    index.remove("part", "pad")
+    assert [id for id, _ in index.search("part", "brake pad")] == ["disc", "note"]
+    index.upsert("part", "note", _part(description="Wiper blade"))
+    assert [id for id, _ in index.search("part", "brake pad")] == ["disc"]
+    assert len(index) == 3
@@ -1,4 +1,4 @@
-from parts.core.logic import generate_internal_part_code
+from parts.core.logic import generate_internal_part_code, normalise_part_number
 
 
 def test_generate_internal_part_code():
@@ -10,3 +10,14 @@ def test_generate_internal_part_code_normalisation():
     code = generate_internal_part_code("Land Rover", "Suspension & Steering", "Bushing!", 123)
     # Norm: LANDROVER -> LAN, SUSPENSIONSTEERING -> SUS, BUSHING -> BUS
     assert code == "LAN-SUS-BUS-00123"
+
+
+def test_generate_internal_part_code_keeps_digits():
+    assert generate_internal_part_code("3M", "Body", "4x4 Kit", 7) == "3M-BOD-4X4-00007"
+
+
+def test_normalise_part_number():
+    assert normalise_part_number("1K0-615-301-AA") == "1K0615301AA"
+    assert normalise_part_number(" 1k0 615.301 aa ") == "1K0615301AA"
+    assert normalise_part_number(" -- ") is None
+    assert normalise_part_number(None) is None
@@ -0,0 +1,39 @@
+from uuid import uuid4
+
+import pytest
+from parts.core.pagination import decode_cursor, encode_cursor, parse_fields
+from parts.db.models import Part, Vehicle
+
+
+def test_cursor_round_trip():
+    columns = [Vehicle.make, Vehicle.model, Vehicle.id]
+    values = ["Nissan", "Leaf", uuid4()]
+    assert decode_cursor(encode_cursor(values), columns) == values
+
+
+def test_decode_cursor_rejects_tampering():
+    columns = [Vehicle.make, Vehicle.id]
+    with pytest.raises(ValueError):
+        decode_cursor("%%%", columns)
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(["Nissan"]), columns)
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(["Nissan", "not-a-uuid"]), columns)
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor([None, uuid4()]), columns)
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor([2019, uuid4()]), columns)
+
+
+def test_decode_cursor_accepts_null_for_nullable_columns():
+    columns = [Part.internal_part_code, Part.id]
+    values = [None, uuid4()]
+    assert decode_cursor(encode_cursor(values), columns) == values
+
+
+def test_parse_fields():
+    allowed = ["id", "make", "model"]
+    assert parse_fields(None, allowed) is None
+    assert parse_fields("model, id,model", allowed) == ["model", "id"]
+    with pytest.raises(ValueError):
+        parse_fields("id,price", allowed)
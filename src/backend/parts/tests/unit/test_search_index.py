@@ -0,0 +1,19 @@
+from parts.db.search_index import build_fts5_match, build_tsquery, tokenise
+
+
+def test_tokenise():
+    assert tokenise("1K0-615-301 Brake Pad") == ["1k0", "615", "301", "brake", "pad"]
+
+
+def test_build_fts5_match_quotes_tokens():
+    # FTS5 operators in user input must be treated as plain words
+    assert build_fts5_match('spark NOT "plug') == '"spark"* "not"* "plug"*'
+
+
+def test_build_queries_empty():
+    assert build_fts5_match("  -- ") is None
+    assert build_tsquery("") is None
+
+
+def test_build_tsquery():
+    assert build_tsquery("brake pad") == "brake:* & pad:*"
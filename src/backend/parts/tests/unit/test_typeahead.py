@@ -0,0 +1,76 @@
+import pytest
+from parts.core.catalogue_index import CatalogueIndex
+from parts.core.typeahead import PrefixIndex
+
+
+def _part(description: str, *codes: str) -> dict:
+    codes += (None,) * (3 - len(codes))
+    return {
+        "internal_part_code": codes[0],
+        "oe_part_number": codes[1],
+        "manufacturer_part_number": codes[2],
+        "description": description,
+    }
+
+
+def _index() -> PrefixIndex:
+    index = PrefixIndex()
+    index.loaded = True
+    index.upsert("part", "p1", _part("Brake pad", "PRT-BRK-0001", "1K0-615-301", "BP123"))
+    index.upsert("part", "p2", _part("Brake disc", "PRT-BRK-0002", "1K0-615-301A"))
+    index.upsert(
+        "vehicle",
+        "v1",
+        {"make": "Ford", "model": "Focus", "variant": None, "from_year": 2018, "to_year": None},
+    )
+    return index
+
+
+def test_suggest_matches_prefix_of_any_value():
+    index = _index()
+    assert [s["id"] for s in index.suggest("1k0 615")] == ["p1", "p2"]
+    assert index.suggest("bp1") == [
+        {"kind": "part", "id": "p1", "value": "BP123", "label": "Brake pad"}
+    ]
+    assert [s["id"] for s in index.suggest("prt-brk")] == ["p1", "p2"]
+    assert index.suggest("zzz") == []
+    assert index.suggest("--") == []
+
+
+def test_suggest_one_entry_per_entity_with_limit_and_kinds():
+    index = _index()
+    # "Ford" and "Ford Focus" both match but v1 is suggested once
+    assert index.suggest("fo") == [
+        {"kind": "vehicle", "id": "v1", "value": "Focus", "label": "Ford Focus 2018-"}
+    ]
+    assert len(index.suggest("1k0", limit=1)) == 1
+    assert index.suggest("1k0", kinds={"vehicle"}) == []
+
+
+def test_upsert_replaces_and_remove_drops_values():
+    index = _index()
+    index.upsert("part", "p1", _part("Brake pad", "NEW-1"))
+    assert [s["id"] for s in index.suggest("1k0")] == ["p2"]
+    assert index.suggest("new")[0]["id"] == "p1"
+
+    index.remove("part", "p1")
+    index.remove("part", "missing")
+    assert index.suggest("new") == []
+    assert len(index) == 2
+
+
+def test_messages_are_ignored_until_loaded_and_reload_clears():
+    index = PrefixIndex()
+    index.apply({"op": "upsert", "kind": "part", "id": "p1", "fields": _part("x", "A1")})
+    assert len(index) == 0
+
+    index = _index()
+    index.apply({"op": "remove", "kind": "part", "id": "p1"})
+    assert len(index) == 2
+    index.apply({"op": "reload"})
+    assert not index.loaded and len(index) == 0
+
+
+def test_catalogue_index_requires_the_index_operations():
+    with pytest.raises(TypeError):
+        CatalogueIndex()
@@ -0,0 +1,56 @@
+from uuid import uuid4
+
+import pytest
+from core.profiling import QueryBudgetError, QueryProfilingMiddleware, query_budget
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from parts.db.models import Part
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+@pytest.mark.asyncio
+async def test_part_endpoint_query_budgets(client: AsyncClient, create_part):
+    ids = [await create_part(f"QB-{i}") for i in range(5)]
+    location = await client.post("/api/v1/locations/", json={"name": "Main", "address": "x"})
+    stock = {"location_id": location.json()["id"], "quantity": 4}
+
+    with query_budget(1):
+        await client.get(f"/api/v1/parts/{ids[0]}")
+        await client.get("/api/v1/parts/", params={"limit": 3})
+        await client.post("/api/v1/parts/batch-get", json={"ids": ids})
+        await client.post("/api/v1/parts/stock:batch", json={"ids": ids})
+    with query_budget(2):
+        await client.patch(f"/api/v1/parts/{ids[1]}", json={"description": "Pad"})
+    with query_budget(3):
+        # No stock yet, so it also checks the part exists
+        await client.get(f"/api/v1/parts/{ids[0]}/stock")
+        await client.get("/api/v1/search/", params={"q": "brake"})
+    with query_budget(4):
+        await client.get(f"/api/v1/parts/{ids[0]}/alternatives")
+    with query_budget(5) as profiles:
+        await client.post(f"/api/v1/parts/{ids[0]}/stock", json=stock)
+    assert profiles[0].route == "/api/v1/parts/{part_id}/stock"
+
+
+@pytest.mark.asyncio
+async def test_repeated_statements_fail_the_budget(session: AsyncSession):
+    app = FastAPI()
+    app.add_middleware(QueryProfilingMiddleware, enabled=True)
+
+    @app.get("/parts")
+    async def one_query_per_part():
+        for _ in range(3):
+            await session.exec(select(Part.id).where(Part.id == uuid4()))
+        return []
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        with pytest.raises(QueryBudgetError, match="3 x SELECT part.id"):
+            with query_budget(10):
+                response = await client.get("/parts")
+        with query_budget(10, allow_repeats=True) as profiles:
+            await client.get("/parts")
+
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert 'desc="3 queries"' in response.headers["server-timing"]
+    assert profiles[0].count == 3
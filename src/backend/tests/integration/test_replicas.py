@@ -0,0 +1,73 @@
+import pytest
+from db.replicas import (
+    LEAST_LOADED,
+    PRIMARY_READS_COOKIE,
+    ROUND_ROBIN,
+    ReadYourWritesMiddleware,
+    Replica,
+    ReplicaSet,
+    wants_primary,
+)
+from db.session import _connect
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+
+
+def _replica(name: str, url: str = "sqlite+aiosqlite://") -> Replica:
+    return Replica(name, create_async_engine(url))
+
+
+def test_round_robin_rotates_through_replicas():
+    replicas = ReplicaSet([_replica("a"), _replica("b")], ROUND_ROBIN, retry_seconds=30)
+    firsts = [replicas.candidates()[0].name for _ in range(4)]
+    assert firsts == ["a", "b", "a", "b"]
+
+
+def test_least_loaded_prefers_idle_replica():
+    busy, idle = _replica("busy"), _replica("idle")
+    busy.in_flight = 3
+    replicas = ReplicaSet([busy, idle], LEAST_LOADED, retry_seconds=30)
+    assert replicas.candidates()[0].name == "idle"
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_replica_fails_over():
+    down = _replica("down", "sqlite+aiosqlite:////nonexistent/dir/replica.db")
+    up = _replica("up")
+    replicas = ReplicaSet([down, up], ROUND_ROBIN, retry_seconds=30)
+
+    replica, connection = await replicas.connect(_connect)
+    await connection.close()
+    assert replica.name == "up"
+    assert not down.healthy
+    assert [r.name for r in replicas.candidates()] == ["up"]
+
+
+def test_read_your_writes_routing():
+    assert wants_primary({"x-read-consistency": "strong"}, {})
+    assert wants_primary({}, {PRIMARY_READS_COOKIE: "1"})
+    assert not wants_primary({}, {})
+
+
+@pytest.mark.asyncio
+async def test_writes_set_primary_reads_cookie():
+    app = FastAPI()
+
+    @app.get("/thing")
+    async def read():
+        return {}
+
+    @app.post("/thing")
+    async def write():
+        return {}
+
+    @app.post("/thing:batch")
+    async def batch_read():
+        return {}
+
+    app.add_middleware(ReadYourWritesMiddleware, window_seconds=5, read_only_paths=(":batch",))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert PRIMARY_READS_COOKIE not in (await client.get("/thing")).cookies
+        assert PRIMARY_READS_COOKIE not in (await client.post("/thing:batch")).cookies
+        assert (await client.post("/thing")).cookies[PRIMARY_READS_COOKIE] == "1"
@@ -0,0 +1,40 @@
+import pytest
+from core.metrics import registry
+from httpx import AsyncClient
+
+PART_ROUTE = "/api/v1/parts/{part_id}"
+
+
+def _value(name: str, labels: dict[str, str]) -> float:
+    return registry.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template(client: AsyncClient):
+    created = await client.post(
+        "/api/v1/parts/",
+        json={
+            "manufacturer_part_number": "MET-1",
+            "description": "Brake pad",
+            "part_type": "Pad",
+            "system": "Brakes",
+        },
+    )
+    part_id = created.json()["id"]
+    labels = {"method": "GET", "route": PART_ROUTE}
+    before = _value("http_requests_total", {**labels, "status": "200"})
+    queried = _value("http_request_db_queries_count", labels)
+
+    assert (await client.get(f"/api/v1/parts/{part_id}")).status_code == 200
+
+    assert _value("http_requests_total", {**labels, "status": "200"}) == before + 1
+    assert _value("http_request_db_queries_count", labels) == queried + 1
+
+    response = await client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert f'http_requests_total{{method="GET",route="{PART_ROUTE}",status="200"}}' in (
+        response.text
+    )
+    assert "db_queries_total " in response.text
+    assert 'http_requests_in_flight{method="GET"} 1.0' in response.text
+    assert 'cache_hits_total{cache="vehicles",tier="local"}' in response.text
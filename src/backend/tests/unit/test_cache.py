@@ -0,0 +1,69 @@
+import pytest
+from core.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache("test", maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    clock.now = 6
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache("test", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_by_key_and_predicate():
+    cache = TTLCache("test", maxsize=10, ttl=60)
+    cache.set(("item", 1), "x")
+    cache.set(("list", None), ["x"])
+    cache.set(("item", 2), "y")
+    cache.invalidate(("item", 1), where=lambda key: key[0] == "list")
+    assert cache.get(("item", 1)) is None
+    assert cache.get(("list", None)) is None
+    assert cache.get(("item", 2)) == "y"
+
+
+@pytest.mark.asyncio
+async def test_load_racing_an_invalidation_is_not_cached():
+    cache = TTLCache("test", maxsize=10, ttl=60)
+
+    async def stale_load():
+        # A writer invalidates while this read is in flight
+        cache.invalidate("key")
+        return "stale"
+
+    assert await cache.get_or_load("key", stale_load) == "stale"
+    assert cache.get("key") is None
+
+
+def test_nothing_is_cached_during_the_holdoff_after_an_invalidation():
+    clock = FakeClock()
+    cache = TTLCache("test", maxsize=10, ttl=60, clock=clock, holdoff=5)
+    cache.set("a", "old")
+    cache.invalidate("a")
+    # A lagging replica still returns the pre-write value
+    cache.set("a", "stale")
+    assert cache.get("a") is None
+    clock.now = 5
+    cache.set("a", "new")
+    assert cache.get("a") == "new"
@@ -0,0 +1,101 @@
+import gzip
+
+from core.compression import CompressionMiddleware, accepted_encodings
+from core.static_files import IMMUTABLE_CACHE_CONTROL, PrecompressedStaticFiles, SpaIndex
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+BODY = "brake pad " * 500
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    async def large():
+        return {"body": BODY}
+
+    @app.get("/versioned")
+    async def versioned():
+        return JSONResponse({"body": BODY}, headers={"ETag": '"part-1-v2"'})
+
+    @app.get("/small")
+    async def small():
+        return {"body": "pad"}
+
+    return TestClient(app)
+
+
+def test_accepted_encodings_skips_refused():
+    headers = Headers({"accept-encoding": "gzip;q=0.5, br;q=0, Deflate"})
+    assert accepted_encodings(headers) == {"gzip", "deflate"}
+
+
+def test_compresses_large_responses_only():
+    client = make_client()
+    large = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert large.headers["content-encoding"] == "gzip"
+    assert large.json() == {"body": BODY}
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    identity = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+
+
+def test_compresses_with_brotli_when_accepted():
+    client = make_client()
+    response = client.get("/large", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["vary"] == "Accept-Encoding"
+    # Decoded by httpx, which handles br when brotli is installed
+    assert response.json() == {"body": BODY}
+
+
+def test_compressed_responses_have_weak_etags():
+    client = make_client()
+    for encoding in ("br", "gzip"):
+        response = client.get("/versioned", headers={"Accept-Encoding": encoding})
+        assert response.headers["content-encoding"] == encoding
+        assert response.headers["etag"] == 'W/"part-1-v2"'
+    identity = client.get("/versioned", headers={"Accept-Encoding": "identity"})
+    assert identity.headers["etag"] == '"part-1-v2"'
+
+
+def test_serves_precompressed_assets(tmp_path):
+    asset = tmp_path / "index-abc123.js"
+    asset.write_text("console.log('parts')")
+    (tmp_path / "index-abc123.js.gz").write_bytes(gzip.compress(asset.read_bytes()))
+    app = FastAPI()
+    app.mount("/assets", PrecompressedStaticFiles(directory=tmp_path))
+    client = TestClient(app)
+
+    response = client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith("text/javascript")
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == "console.log('parts')"
+
+    plain = client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.text == "console.log('parts')"
+
+    revalidated = client.get(
+        "/assets/index-abc123.js",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+
+
+def test_spa_index_is_read_once(tmp_path):
+    index = tmp_path / "index.html"
+    index.write_text("<div id=root></div>")
+    spa_index = SpaIndex(str(index))
+    index.write_text("changed")
+    response = spa_index.response()
+    assert response.body == b"<div id=root></div>"
+    assert response.headers["cache-control"] == "no-cache"
+    assert SpaIndex(str(tmp_path / "missing.html")).response() is None
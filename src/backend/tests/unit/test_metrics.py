@@ -0,0 +1,47 @@
+from core import metrics
+from core.metrics import CacheCollector, EnginePoolCollector
+from prometheus_client import CollectorRegistry, Counter, Gauge, values
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy import create_engine
+
+
+def _samples(text: bytes) -> dict[tuple[str, tuple], float]:
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(text.decode())
+        for sample in family.samples
+    }
+
+
+def test_collects_cache_and_pool_state(tmp_path):
+    registry = CollectorRegistry()
+    registry.register(CacheCollector())
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+    registry.register(EnginePoolCollector({"primary": engine}))
+    with engine.connect():
+        assert registry.get_sample_value("db_pool_checked_out", {"engine": "primary"}) == 1
+    assert registry.get_sample_value("db_pool_checked_out", {"engine": "primary"}) == 0
+    engine.dispose()
+
+
+def test_aggregates_worker_processes(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    for pid in (101, 102):
+        # What each worker would create at import
+        monkeypatch.setattr(values, "ValueClass", values.MultiProcessValue(lambda pid=pid: pid))
+        requests = Counter("worker_requests_total", "Requests.", ("route",), registry=None)
+        in_flight = Gauge(
+            "worker_in_flight", "In flight.", multiprocess_mode="livesum", registry=None
+        )
+        requests.labels(route="/parts").inc(pid - 100)
+        in_flight.inc()
+
+    samples = _samples(metrics.render())
+    assert samples[("worker_requests_total", (("route", "/parts"),))] == 3
+    assert samples[("worker_in_flight", ())] == 2
+
+    metrics.mark_process_dead(102)
+    samples = _samples(metrics.render())
+    assert samples[("worker_in_flight", ())] == 1
+    assert samples[("worker_requests_total", (("route", "/parts"),))] == 3
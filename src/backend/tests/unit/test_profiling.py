@@ -0,0 +1,31 @@
+import pytest
+from core.profiling import QueryBudgetError, QueryProfile, query_budget, statement_shape
+
+
+def test_statement_shape_collapses_parameter_lists():
+    assert statement_shape("SELECT part.id\nFROM part\nWHERE part.id IN (?, ?, ?)") == (
+        "SELECT part.id FROM part WHERE part.id IN (?)"
+    )
+    assert statement_shape("SELECT 1 WHERE a IN ($1, $2) AND b = $3") == (
+        "SELECT 1 WHERE a IN (?) AND b = $3"
+    )
+
+
+def test_repeated_shapes():
+    profile = QueryProfile(
+        "GET",
+        "/parts",
+        [
+            ("SELECT * FROM stocklevel WHERE part_id IN (?, ?)", 0.001),
+            ("SELECT * FROM stocklevel WHERE part_id IN (?)", 0.001),
+            ("SELECT * FROM part", 0.001),
+        ],
+    )
+    assert profile.repeated(threshold=2) == {"SELECT * FROM stocklevel WHERE part_id IN (?)": 2}
+    assert profile.repeated(threshold=3) == {}
+
+
+def test_budget_without_profiled_requests_fails():
+    with pytest.raises(QueryBudgetError, match="No request was profiled"):
+        with query_budget(1):
+            pass
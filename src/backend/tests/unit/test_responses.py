@@ -0,0 +1,30 @@
+import json
+from datetime import UTC, datetime
+from uuid import UUID
+
+from core import responses
+from core.responses import FastJSONResponse
+
+ROW = {
+    "id": UUID("12345678-1234-5678-1234-567812345678"),
+    "price": 1.5,
+    "at": datetime(2025, 1, 2, 3, 4, 5, tzinfo=UTC),
+    "name": "Bremsbelag ä",
+}
+EXPECTED = {
+    "id": "12345678-1234-5678-1234-567812345678",
+    "price": 1.5,
+    "at": "2025-01-02T03:04:05+00:00",
+    "name": "Bremsbelag ä",
+}
+
+
+def test_encodes_rows_and_uuid_keys():
+    body = FastJSONResponse([ROW, {ROW["id"]: []}]).body
+    assert json.loads(body) == [EXPECTED, {EXPECTED["id"]: []}]
+
+
+def test_stdlib_fallback_matches(monkeypatch):
+    monkeypatch.setattr(responses, "orjson", None)
+    body = FastJSONResponse([ROW, {ROW["id"]: []}]).body
+    assert json.loads(body) == [EXPECTED, {EXPECTED["id"]: []}]
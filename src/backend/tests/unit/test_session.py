@@ -0,0 +1,23 @@
+from db.session import engine_options, resolve_url
+from sqlalchemy.engine import make_url
+
+
+def test_plain_sqlite_url_is_upgraded_to_async_driver():
+    assert resolve_url("sqlite:///./dev.db").drivername == "sqlite+aiosqlite"
+
+
+def test_explicit_driver_is_kept():
+    assert resolve_url("sqlite+aiosqlite:///./dev.db").drivername == "sqlite+aiosqlite"
+
+
+def test_echo_is_off_by_default():
+    assert engine_options(resolve_url("sqlite:///./dev.db"))["echo"] is False
+
+
+def test_server_databases_get_a_tuned_pool():
+    url = make_url("postgresql+asyncpg://user:pw@db/parts")
+    options = engine_options(url)
+    assert options["pool_pre_ping"] is True
+    assert options["pool_size"] > 0
+    assert options["pool_recycle"] > 0
+    assert "statement_cache_size" in options["connect_args"]
@@ -0,0 +1,177 @@
+import asyncio
+import sys
+
+import pytest
+from core.cache import get_cache
+from core.shared_cache import (
+    InMemoryCacheBackend,
+    InvalidationBus,
+    SharedCache,
+    create_backend,
+)
+
+
+async def _settle():
+    # Lets the listener tasks drain their subscription queues
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+async def workers():
+    """
+    Two invalidation buses on one backend, standing in for two workers.
+    """
+    backend = InMemoryCacheBackend()
+    buses = [InvalidationBus(backend), InvalidationBus(backend)]
+    for bus in buses:
+        bus.start()
+    await _settle()
+    yield buses
+    for bus in buses:
+        await bus.stop()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_load_once():
+    cache = InvalidationBus(InMemoryCacheBackend()).shared_cache("parts")
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return {"id": "a"}
+
+    results = await asyncio.gather(*[cache.get_or_load("a", load) for _ in range(20)])
+    assert results == [{"id": "a"}] * 20
+    assert loads == 1
+    assert await cache.get_or_load("a", load) == {"id": "a"}
+    assert loads == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_load_is_raised_to_every_waiter_and_not_cached():
+    cache = InvalidationBus(InMemoryCacheBackend()).shared_cache("parts")
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database down")
+
+    results = await asyncio.gather(
+        *[cache.get_or_load("a", load) for _ in range(3)], return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def recovered():
+        return 1
+
+    assert await cache.get_or_load("a", recovered) == 1
+
+
+@pytest.mark.asyncio
+async def test_workers_share_entries_and_namespace_invalidation(workers):
+    first, second = (bus.shared_cache("search") for bus in workers)
+
+    async def old():
+        return "old"
+
+    async def new():
+        return "new"
+
+    assert await first.get_or_load("brake", old) == "old"
+    assert await second.get_or_load("brake", new) == "old"
+
+    await workers[0].invalidate_shared("search")
+    await _settle()
+    assert await second.get_or_load("brake", new) == "new"
+    assert await first.get_or_load("brake", old) == "new"
+
+
+@pytest.mark.asyncio
+async def test_local_invalidation_reaches_other_workers(workers, monkeypatch):
+    # Both buses see the same process-wide cache here, so stop the publisher from applying
+    # the message itself to check that the other worker does
+    monkeypatch.setattr(workers[0], "apply", lambda message: None)
+    cache = get_cache("shared-cache-test")
+    cache.set("item:1", 1)
+    cache.set("list:10::False", [1])
+    cache.set("other", 2)
+
+    await workers[0].invalidate_local("shared-cache-test", "item:1", prefixes=("list:",))
+    await _settle()
+
+    assert cache.get("item:1") is None
+    assert cache.get("list:10::False") is None
+    assert cache.get("other") == 2
+
+
+@pytest.mark.asyncio
+async def test_loads_are_not_stored_while_replicas_settle():
+    clock = [0.0]
+    backend = InMemoryCacheBackend(clock=lambda: clock[0])
+    cache = SharedCache("search", backend, holdoff=5)
+
+    async def stale():
+        return "stale"
+
+    async def new():
+        return "new"
+
+    await cache.invalidate_all()
+    assert await cache.get_or_load("brake", stale) == "stale"
+    assert await cache.get_or_load("brake", new) == "new"
+    clock[0] = 5
+    assert await cache.get_or_load("brake", new) == "new"
+    assert await cache.get_or_load("brake", stale) == "new"
+
+
+@pytest.mark.asyncio
+async def test_key_invalidation_holds_off_replica_reads():
+    clock = [0.0]
+    backend = InMemoryCacheBackend(clock=lambda: clock[0])
+    cache = SharedCache("parts", backend, holdoff=5)
+
+    async def stale():
+        return "stale"
+
+    async def new():
+        return "new"
+
+    await cache.invalidate("p1")
+    assert await cache.get_or_load("p1", stale) == "stale"
+    assert await cache.get_or_load("p1", new) == "new"
+    clock[0] = 5
+    assert await cache.get_or_load("p1", new) == "new"
+    assert await cache.get_or_load("p1", stale) == "new"
+
+
+@pytest.mark.asyncio
+async def test_load_racing_a_key_invalidation_is_not_stored():
+    backend = InMemoryCacheBackend()
+    cache = SharedCache("parts", backend, holdoff=0)
+    started, written = asyncio.Event(), asyncio.Event()
+
+    async def read_before_write():
+        started.set()
+        await written.wait()
+        return "old"
+
+    async def new():
+        return "new"
+
+    load = asyncio.create_task(cache.get_or_load("p1", read_before_write))
+    await started.wait()
+    await cache.invalidate("p1")
+    # A miss after the invalidation does not join the load that started before it
+    assert await cache.get_or_load("p1", new) == "new"
+    written.set()
+    assert await load == "old"
+    assert await cache.get_or_load("p1", new) == "new"
+
+
+def test_configured_redis_without_client_fails_at_startup(monkeypatch):
+    monkeypatch.setitem(sys.modules, "redis.asyncio", None)
+    with pytest.raises(RuntimeError, match="redis client is not installed"):
+        create_backend("redis://cache:6379/0")
+    assert isinstance(create_backend(""), InMemoryCacheBackend)
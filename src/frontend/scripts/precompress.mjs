@@ -0,0 +1,22 @@
+// Writes .br and .gz next to every compressible build asset, so the backend can serve
+// them without compressing per request. Runs after `vite build`.
+import { readdirSync, readFileSync, statSync, writeFileSync } from 'node:fs'
+import { join } from 'node:path'
+import { brotliCompressSync, constants, gzipSync } from 'node:zlib'
+
+const ASSETS = new URL('../dist/assets/', import.meta.url).pathname
+const COMPRESSIBLE = /\.(js|mjs|css|html|svg|json|txt|map)$/
+const MINIMUM_SIZE = 1024
+
+for (const name of readdirSync(ASSETS, { recursive: true })) {
+    const path = join(ASSETS, name)
+    if (!COMPRESSIBLE.test(path) || statSync(path).size < MINIMUM_SIZE) continue
+    const content = readFileSync(path)
+    writeFileSync(
+        `${path}.br`,
+        brotliCompressSync(content, {
+            params: { [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY },
+        }),
+    )
+    writeFileSync(`${path}.gz`, gzipSync(content, { level: 9 }))
+}